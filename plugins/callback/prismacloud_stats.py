@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+name: prismacloud_stats
+type: aggregate
+author:
+    - Garfield Lee Freeman (@shinmog)
+short_description: Reports the Prisma Cloud API cost of each task and play
+description:
+    - Adds up the C(prismacloud_stats) returned by the Prisma Cloud modules
+      per task, per endpoint and per play.
+    - At the end of each play, prints the tasks and endpoints that took the
+      most time, with their request counts, p50/p95/p99 latencies, bytes
+      and throttled responses.
+requirements:
+    - Enable this callback in ansible.cfg with
+      C(callbacks_enabled=paloaltonetworks.prismacloud.prismacloud_stats).
+options:
+    output_file:
+        description:
+            - Also write the summary of every play to this file as JSON, at
+              the end of the playbook.
+            - If the connection writes a trace file, each task lists the
+              C(spans) of its module invocations, to find them in the trace.
+        type: path
+        env:
+            - name: PRISMACLOUD_STATS_FILE
+        ini:
+            - section: callback_prismacloud_stats
+              key: output_file
+    top:
+        description:
+            - The number of tasks and endpoints to print for each play.
+        type: int
+        default: 10
+        env:
+            - name: PRISMACLOUD_STATS_TOP
+        ini:
+            - section: callback_prismacloud_stats
+              key: top
+'''
+
+import json
+import math
+import time
+
+from ansible.module_utils._text import to_bytes
+from ansible.plugins.callback import CallbackBase
+
+
+# The counters of a summary that are added up.
+COUNTERS = (
+    'requests', 'errors', 'throttled', 'retries',
+    'bytes_in', 'bytes_out', 'elapsed', 'cache_hits',
+)
+
+
+def new_summary():
+    ans = dict((x, 0) for x in COUNTERS)
+    ans['latencies'] = []
+    return ans
+
+
+def merge(dst, src):
+    """Adds the src summary to the dst summary."""
+    for x in COUNTERS:
+        dst[x] += src.get(x, 0)
+
+    # A module's totals have no latencies, those are in its endpoints.
+    if 'latencies' in src:
+        dst['latencies'].extend(src['latencies'])
+    else:
+        for endpoint in (src.get('endpoints') or {}).values():
+            dst['latencies'].extend(endpoint.get('latencies', ()))
+
+
+def percentile(values, pct):
+    """Returns the nearest rank percentile of the sorted values."""
+    if not values:
+        return None
+    num = int(math.ceil(pct / 100.0 * len(values))) - 1
+    return values[max(num, 0)]
+
+
+def report(summary):
+    """Returns the summary with its latencies reduced to percentiles."""
+    ans = dict((x, summary[x]) for x in COUNTERS)
+    ans['elapsed'] = round(ans['elapsed'], 3)
+    latencies = sorted(summary['latencies'])
+    for pct in (50, 95, 99):
+        ans['p{0}'.format(pct)] = percentile(latencies, pct)
+    return ans
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'paloaltonetworks.prismacloud.prismacloud_stats'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.playbook = None
+        self.started = time.time()
+        self.plays = []
+        self.play = None
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = playbook._file_name
+
+    def v2_playbook_on_play_start(self, play):
+        self._end_play()
+        self.play = {
+            'name': play.get_name(),
+            'total': new_summary(),
+            'tasks': {},
+            'endpoints': {},
+        }
+
+    def v2_runner_on_ok(self, result):
+        self._add(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._add(result)
+
+    def v2_playbook_on_stats(self, stats):
+        self._end_play()
+
+        output_file = self.get_option('output_file')
+        if output_file:
+            data = {
+                'playbook': self.playbook,
+                'started': self.started,
+                'finished': time.time(),
+                'plays': self.plays,
+            }
+            with open(output_file, 'wb') as fd:
+                fd.write(to_bytes(json.dumps(data, indent=4, sort_keys=True)))
+
+    def _add(self, result):
+        if self.play is None:
+            return
+
+        found = [result._result.get('prismacloud_stats')]
+        found.extend(x.get('prismacloud_stats') for x in result._result.get('results') or [] if isinstance(x, dict))
+        found = [x for x in found if x]
+        if not found:
+            return
+
+        task = self.play['tasks'].setdefault(result._task._uuid, {
+            'name': result._task.get_name(),
+            'total': new_summary(),
+            'spans': [],
+        })
+        for stats in found:
+            merge(self.play['total'], stats)
+            merge(task['total'], stats)
+            if stats.get('trace'):
+                task['spans'].append(stats['trace'])
+            for key, endpoint in (stats.get('endpoints') or {}).items():
+                merge(self.play['endpoints'].setdefault(key, new_summary()), endpoint)
+
+    def _end_play(self):
+        """Prints the summary of the current play and saves its report."""
+        play = self.play
+        self.play = None
+        if play is None or not play['tasks']:
+            return
+
+        tasks = sorted(play['tasks'].values(), key=lambda x: x['total']['elapsed'], reverse=True)
+        endpoints = sorted(play['endpoints'].items(), key=lambda x: x[1]['elapsed'], reverse=True)
+        ans = {
+            'name': play['name'],
+            'total': report(play['total']),
+            'tasks': [dict(report(x['total']), name=x['name'], spans=x['spans']) for x in tasks],
+            'endpoints': [dict(report(x), endpoint=key) for key, x in endpoints],
+        }
+        self.plays.append(ans)
+
+        top = self.get_option('top')
+        self._display.banner('PRISMA CLOUD API: {0}'.format(play['name']))
+        self._display.display(self._line('total', ans['total']))
+        self._display.display('tasks:')
+        for x in ans['tasks'][:top]:
+            self._display.display(self._line(x['name'], x))
+        self._display.display('endpoints:')
+        for x in ans['endpoints'][:top]:
+            self._display.display(self._line(x['endpoint'], x))
+
+    def _line(self, name, x):
+        def ms(val):
+            return '-' if val is None else '{0}ms'.format(val)
+
+        return '  {0:>9.3f}s {1:>6} req  p50 {2:>7}  p95 {3:>7}  p99 {4:>7}  {5:>10} B in  {6:>4} throttled  {7}'.format(
+            x['elapsed'], x['requests'], ms(x['p50']), ms(x['p95']), ms(x['p99']),
+            x['bytes_in'], x['throttled'], name,
+        )
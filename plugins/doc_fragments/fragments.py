@@ -15,16 +15,100 @@ options:
     search_type:
         description:
             - How to interpret the value given for the primary param.
+            - If a list of values is given for the primary param, then
+              matching any of them is a match.
+            - Other filters may also be given a list of values, in which case
+              they match any of the values given.
         choices:
             - exact
             - substring
             - regex
+            - glob
         default: 'exact'
+    ignore_case:
+        description:
+            - Match the primary param without regard to case.
+        type: bool
+        default: false
     details:
         description:
             - Whether to retrieve full detailed results or not.
         type: bool
         default: false
+    output_file:
+        description:
+            - Write the results to this file on the controller instead of
+              returning them.
+            - Results are written as newline delimited JSON, one item per
+              line, as they are retrieved.
+            - When specified, only the total, the output file and its
+              checksum are returned.
+        type: path
+    output_compression:
+        description:
+            - Compression to use for I(output_file).
+        choices:
+            - none
+            - gzip
+        default: 'none'
+    result_format:
+        description:
+            - The format of the returned listing.
+            - C(list) returns a list of dicts.
+            - C(columnar) returns the field names once, along with a list of
+              rows of values.
+            - C(columns) returns a dict of field names to lists of values.
+            - Has no effect on what is written to I(output_file).
+        choices:
+            - list
+            - columnar
+            - columns
+        default: 'list'
+    return_fields:
+        description:
+            - Only return these fields for each result.
+        type: list
+        elements: str
+    limit:
+        description:
+            - Return at most this many results.
+        type: int
+    offset:
+        description:
+            - Skip this many results before returning any.
+        type: int
+        default: 0
+    sort_by:
+        description:
+            - Sort the results on this field of the listing before applying
+              I(offset) and I(limit).
+            - Severities sort by rank (low, medium, high) instead of
+              alphabetically.
+            - Results missing this field are always sorted last.
+    sort_order:
+        description:
+            - The order to sort results in if I(sort_by) is specified.
+        choices:
+            - asc
+            - desc
+        default: 'asc'
+    queries:
+        description:
+            - Run several queries against the same listing, which is then
+              only retrieved once.
+            - Each query may set any of the optional params of this module.
+              Params not set in a query are taken from the module's params.
+            - When specified, results are returned in I(queries), keyed by
+              query name, instead of in I(listing).
+            - I(output_file) can only be set per query, and each query must
+              write to a different file.
+        type: list
+        elements: dict
+        suboptions:
+            query_name:
+                description:
+                    - The name to return the results of this query under.
+                required: true
 '''
 
     FACTS_WITHOUT_DETAILS = r'''
@@ -34,11 +118,187 @@ options:
     search_type:
         description:
             - How to interpret the value given for the primary param.
+            - If a list of values is given for the primary param, then
+              matching any of them is a match.
+            - Other filters may also be given a list of values, in which case
+              they match any of the values given.
         choices:
             - exact
             - substring
             - regex
+            - glob
         default: 'exact'
+    ignore_case:
+        description:
+            - Match the primary param without regard to case.
+        type: bool
+        default: false
+    output_file:
+        description:
+            - Write the results to this file on the controller instead of
+              returning them.
+            - Results are written as newline delimited JSON, one item per
+              line, as they are retrieved.
+            - When specified, only the total, the output file and its
+              checksum are returned.
+        type: path
+    output_compression:
+        description:
+            - Compression to use for I(output_file).
+        choices:
+            - none
+            - gzip
+        default: 'none'
+    result_format:
+        description:
+            - The format of the returned listing.
+            - C(list) returns a list of dicts.
+            - C(columnar) returns the field names once, along with a list of
+              rows of values.
+            - C(columns) returns a dict of field names to lists of values.
+            - Has no effect on what is written to I(output_file).
+        choices:
+            - list
+            - columnar
+            - columns
+        default: 'list'
+    return_fields:
+        description:
+            - Only return these fields for each result.
+        type: list
+        elements: str
+    limit:
+        description:
+            - Return at most this many results.
+        type: int
+    offset:
+        description:
+            - Skip this many results before returning any.
+        type: int
+        default: 0
+    sort_by:
+        description:
+            - Sort the results on this field of the listing before applying
+              I(offset) and I(limit).
+            - Severities sort by rank (low, medium, high) instead of
+              alphabetically.
+            - Results missing this field are always sorted last.
+    sort_order:
+        description:
+            - The order to sort results in if I(sort_by) is specified.
+        choices:
+            - asc
+            - desc
+        default: 'asc'
+    queries:
+        description:
+            - Run several queries against the same listing, which is then
+              only retrieved once.
+            - Each query may set any of the optional params of this module.
+              Params not set in a query are taken from the module's params.
+            - When specified, results are returned in I(queries), keyed by
+              query name, instead of in I(listing).
+            - I(output_file) can only be set per query, and each query must
+              write to a different file.
+        type: list
+        elements: dict
+        suboptions:
+            query_name:
+                description:
+                    - The name to return the results of this query under.
+                required: true
+'''
+
+    CATALOG_CACHE = r'''
+options:
+    catalog_cache:
+        description:
+            - Cache system default items on disk, as they only change with
+              Prisma Cloud releases.
+            - Each time the listing is retrieved, its system default items
+              are saved to the cache.  For I(cache_ttl) seconds after that,
+              lookups with I(systemDefault=true) are answered from the cache.
+            - Details of system default items are cached for as long as their
+              C(lastModifiedOn) in the listing is unchanged.
+        type: bool
+        default: false
+    cache_ttl:
+        description:
+            - How long, in seconds, a cached listing is used for.
+        type: int
+        default: 86400
+    cache_dir:
+        description:
+            - The cache directory on the controller.
+            - Each tenant is cached separately under this directory.
+        type: path
+        default: '~/.ansible/cache/prismacloud'
+'''
+
+    SNAPSHOT = r'''
+options:
+    source:
+        description:
+            - Where to get the facts from.
+            - C(api) queries the tenant.
+            - C(snapshot) answers from a snapshot of the tenant written by
+              M(paloaltonetworks.prismacloud.prismacloud_snapshot), without
+              making any API calls.
+            - The snapshot is indexed by type the first time it is queried,
+              with the indexes saved to a directory alongside it.  They are
+              rebuilt whenever the snapshot changes.
+        type: str
+        default: 'api'
+        choices:
+            - api
+            - snapshot
+    snapshot_file:
+        description:
+            - The snapshot on the controller to use when I(source=snapshot).
+        type: path
+'''
+
+    CLIENT = r'''
+options:
+    url:
+        description:
+            - The Prisma Cloud API URL, such as C(https://api.prismacloud.io).
+        type: str
+        required: true
+        env:
+            - name: PRISMACLOUD_URL
+    username:
+        description:
+            - The username (or access key) to log in with.
+        type: str
+        required: true
+        env:
+            - name: PRISMACLOUD_USERNAME
+    password:
+        description:
+            - The password (or secret key) to log in with.
+        type: str
+        required: true
+        env:
+            - name: PRISMACLOUD_PASSWORD
+    customer_name:
+        description:
+            - The customer name.
+        type: str
+        env:
+            - name: PRISMACLOUD_CUSTOMER_NAME
+    validate_certs:
+        description:
+            - Verify the API's SSL certificate.
+        type: bool
+        default: true
+        env:
+            - name: PRISMACLOUD_VALIDATE_CERTS
+    timeout:
+        description:
+            - The timeout, in seconds, of each request.
+        type: int
+        default: 30
 '''
 
     STATE = r'''
@@ -33,15 +33,172 @@ options:
         vars:
             - name: ansible_customer_name
             - name: ansible_httpapi_customer_name
+    metrics_file:
+        type: path
+        description:
+            - Write metrics of the API requests made over this connection to
+              this file, in the Prometheus text format, when the connection
+              is closed.
+            - This includes request counts by endpoint and status, latency
+              histograms, retry, throttle and login counts, and cache hits.
+            - The file is replaced atomically, so it can be read by the
+              node exporter textfile collector.
+            - Counters are added to those written by earlier connections,
+              and are kept per tenant in this file with C(.json) appended.
+              Remove both files to reset them.
+        vars:
+            - name: ansible_httpapi_prismacloud_metrics_file
+    trace_file:
+        type: path
+        description:
+            - Append a span for each request made over this connection to
+              this file, one JSON object per line, in the shape of an
+              OpenTelemetry span.
+            - Each span has its C(traceId), C(spanId), C(parentSpanId),
+              C(name), C(kind), C(startTimeUnixNano), C(endTimeUnixNano),
+              C(attributes), C(status) and the C(resource) it came from.
+            - Request spans break down where their time went, with the
+              time spent queued behind other concurrent requests,
+              serializing the request, on the network and decoding the
+              response.
+            - The requests of each module invocation are the children of
+              a span for that invocation, which is a child of a span for
+              the connection.  Modules return the IDs of their span in
+              their C(prismacloud_stats).
+            - The span of a module that failed has the
+              C(ansible.module.completed) attribute set to false, and ends
+              at its last request.
+        vars:
+            - name: ansible_httpapi_prismacloud_trace_file
+    slow_request_threshold:
+        type: float
+        description:
+            - Warn about each request that takes at least this many
+              seconds, with its method, URL, status, sizes, retries,
+              timings and the module that made it.
+        vars:
+            - name: ansible_httpapi_prismacloud_slow_request_threshold
+    profile_dir:
+        type: path
+        description:
+            - Profile the requests made by each module invocation with
+              cProfile, and write the stats of each invocation to a
+              C(.pstats) file in this directory.
+            - If set through the C(PRISMACLOUD_PROFILE_DIR) environment
+              variable, the modules themselves are also profiled, each
+              into its own file in the same directory.
+            - Modules are not told the name of their task, so set
+              C(PRISMACLOUD_PROFILE_LABEL) in the C(environment) of a task
+              to add a label, such as the task name, to its file names.
+            - The files can be merged and summarized with
+              C(tools/merge_profiles.py).
+        env:
+            - name: PRISMACLOUD_PROFILE_DIR
+        vars:
+            - name: ansible_httpapi_prismacloud_profile_dir
+    cassette_file:
+        type: path
+        description:
+            - Record each request made over this connection, and the
+              response to it, to this file, one JSON object per line.
+            - Passwords, tokens, keys and other secrets are scrubbed from
+              the requests and responses before they are written, see
+              I(cassette_scrub_fields).  The tenant URL, user (the access
+              key ID) and customer name are only written as a hash, so a
+              cassette holds no credentials.  It does still hold the data
+              of the tenant in the responses.
+            - With I(cassette_mode=replay), requests are answered from this
+              file instead of the tenant, so a recorded run can be repeated
+              offline.
+        vars:
+            - name: ansible_httpapi_prismacloud_cassette_file
+    cassette_mode:
+        type: str
+        description:
+            - Whether to C(record) to the I(cassette_file), or C(replay)
+              from it.
+            - When replaying, requests are matched on their method, path,
+              query and body, and the responses recorded for each are
+              served in the order they were recorded, repeating the last
+              one once they run out.  Only responses recorded for the same
+              tenant URL, user and customer name are served.
+            - A request that was never recorded fails.
+        choices: ['record', 'replay']
+        default: record
+        vars:
+            - name: ansible_httpapi_prismacloud_cassette_mode
+    cassette_scrub_fields:
+        type: list
+        elements: str
+        description:
+            - The fields whose values are scrubbed from the requests and
+              responses in the I(cassette_file), wherever they appear.
+            - Modules that compare a scrubbed field, such as the
+              C(externalId) of an aws account, see it as changed when
+              replayed.  Leave such fields out to replay those modules
+              faithfully, if the cassette is kept somewhere safe.
+        default: ['username', 'password', 'token', 'key', 'secret', 'client_secret', 'private_key', 'private_key_id', 'externalId']
+        vars:
+            - name: ansible_httpapi_prismacloud_cassette_scrub_fields
+    cassette_timing:
+        type: bool
+        description:
+            - When replaying, take as long to answer each request as the
+              tenant took when it was recorded.
+        default: false
+        vars:
+            - name: ansible_httpapi_prismacloud_cassette_timing
+    fault_injection:
+        type: dict
+        description:
+            - Inject faults into the requests made over this connection, to
+              measure how runs hold up against a throttled or failing
+              tenant.  For testing only, no faults are injected unless this
+              is set.
+            - C(default) holds the settings for all endpoints, and
+              C(endpoints) overrides them for an endpoint, named as in the
+              stats, such as C(GET /policy/{id}).  C(seed) seeds the choice
+              of requests, so a run can be repeated.
+            - The rates are the fraction of requests, from 0 to 1, given
+              each fault.  C(throttle_rate) answers with a 429 and a
+              C(Retry-After) of C(retry_after) seconds, C(error_rate) with
+              one of the C(error_codes) (which must not be empty),
+              C(malformed_rate) with an error whose C(X-Redlock-Status)
+              header makes no sense, and C(expire_rate) with a 401, as if
+              the token had expired.  None of these reach the tenant.
+              C(truncate_rate) cuts the body of the response short, and
+              C(slow_rate) holds the request back for C(slow_seconds).
+            - Faults are injected as the connection sends each request, so
+              they are handled as if the tenant had answered with them;
+              an expired token is logged in again and the request retried,
+              and retries get faults of their own.  Responses replayed from
+              a I(cassette_file) get no faults, and injected faults are not
+              recorded to it.
+            - Each attempt at a request gets at most one fault, so the rates
+              should add up to no more than 1.
+        vars:
+            - name: ansible_httpapi_prismacloud_fault_injection
 """
 
 import json
+import os
+import sys
+import threading
+import time
 
 from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
-from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.common import profile_file
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.common import run_concurrently
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.common import template_path
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.cassette import Cassette
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.faults import FaultInjector
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.faults import patch_open_url
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.metrics import Metrics
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.profile import Profiler
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.trace import Tracer
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.trace import new_id
 from ansible.module_utils.six.moves.urllib.parse import urlencode
 from ansible.module_utils._text import to_text
-from ansible.module_utils.connection import Connection
 from ansible.module_utils.connection import ConnectionError
 from ansible.plugins.httpapi import HttpApiBase
 
@@ -50,21 +207,210 @@ BASE_HEADERS = {
     'Content-Type': 'application/json',
 }
 
+# The max number of times a request is retried after logging in again.
+LOGIN_RETRIES = 3
+
+# The max number of module invocations being traced or profiled at once.
+# A module that fails never ends its invocation, so once there are more
+# than this, the least recently active one is ended.
+MAX_INVOCATIONS = 64
+
 
 class HttpApi(HttpApiBase):
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._stats_total = 0
+        self._stats_lock = threading.Lock()
+        self._login_lock = threading.Lock()
+        self._metrics = Metrics()
+        self._local = threading.local()
+        self._tracer = None
+        self._connection_span = None
+        self._cassette = None
+        self._faults = None
+        self._invocations = {}
+
     def send_request(self, method, path, query=None, data=None, headers=None):
+        invocation = getattr(self._local, 'invocation', None)
+        if invocation is not None and invocation['profiler'] is not None:
+            return invocation['profiler'].call(self._trace_request, method, path, query, data, headers)
+
+        return self._trace_request(method, path, query, data, headers)
+
+    def _trace_request(self, method, path, query=None, data=None, headers=None):
+        trace_file = self.get_option('trace_file')
+        threshold = self.get_option('slow_request_threshold')
+        if not trace_file and threshold is None:
+            return self._send_request(method, path, query, data, headers)
+
+        timings = {}
+        self._local.timings = timings
+        start = time.time()
+        error = None
+        try:
+            return self._send_request(method, path, query, data, headers)
+        except Exception as e:
+            error = '{0}: {1}'.format(type(e).__name__, e)
+            raise
+        finally:
+            end = time.time()
+            attributes = {
+                'http.request.method': method,
+                'url.full': '{0}{1}'.format(self.connection._url, uri(path, query)),
+                'prismacloud.endpoint': template_path(path),
+            }
+            attributes.update(timings)
+            invocation = getattr(self._local, 'invocation', None)
+            if invocation is not None:
+                attributes['ansible.module.name'] = invocation['name']
+                with self._stats_lock:
+                    invocation['requests'] += 1
+
+            if trace_file:
+                tracer = self._get_tracer(trace_file)
+                tracer.span(
+                    '{0} {1}'.format(method, attributes['prismacloud.endpoint']),
+                    start, end,
+                    parent_id=invocation['spanId'] if invocation and invocation['traced'] else self._connection_span['spanId'],
+                    attributes=attributes, error=error,
+                )
+            if threshold is not None and end - start >= threshold:
+                attributes['prismacloud.elapsed_ms'] = round((end - start) * 1000, 3)
+                if error is not None:
+                    attributes['error'] = error
+                self.connection.queue_message(
+                    'warning',
+                    '(prismacloud) slow request: {0}'.format(json.dumps(attributes, sort_keys=True)),
+                )
+
+    def _send_request(self, method, path, query=None, data=None, headers=None):
         if headers is None:
             headers = BASE_HEADERS
 
+        record = {
+            'method': method,
+            'path': template_path(path),
+            'status': None,
+            'bytes_out': 0,
+            'bytes_in': 0,
+            'start': time.time(),
+            'elapsed': 0,
+            'retries': 0,
+        }
+        self._local.retries = 0
+        timings = getattr(self._local, 'timings', None)
+        self._local.timings = None
+
         path = uri(path, query)
         self.connection.queue_message(
             'vvvv',
             '(prismacloud): {0} {1}{2}'.format(method, self.connection._url, path),
         )
+        payload = json.dumps(data)
+        record['bytes_out'] = len(payload)
+        cassette = self._get_cassette()
+        sent = time.time()
+        self._local.auth = self.connection._auth
+        faults = self._get_faults()
+        fault = None
+        if faults is not None:
+            faults.begin(method, record['path'])
+        try:
+            resp, resp_data = self._exchange(cassette, method, path, payload, headers, sent)
+            record['status'] = resp.getcode()
+            record['bytes_in'] = len(resp_data.getvalue())
+        finally:
+            if faults is not None:
+                fault = faults.end()
+            record['elapsed'] = time.time() - record['start']
+            record['retries'] = self._local.retries
+            self._record(record)
+            if timings is not None:
+                timings.update({
+                    'http.response.status_code': record['status'],
+                    'http.request.body.size': record['bytes_out'],
+                    'http.response.body.size': record['bytes_in'],
+                    'prismacloud.retries': record['retries'],
+                    'prismacloud.serialize_ms': round((sent - record['start']) * 1000, 3),
+                    'prismacloud.network_ms': round((record['start'] + record['elapsed'] - sent) * 1000, 3),
+                })
+                if fault is not None:
+                    timings['prismacloud.fault'] = fault
+                queued = getattr(self._local, 'queued', None)
+                if queued is not None:
+                    timings['prismacloud.queue_ms'] = round((record['start'] - queued) * 1000, 3)
+
+        decoding = time.time()
+        try:
+            return self._decode(resp, resp_data)
+        finally:
+            if timings is not None:
+                timings['prismacloud.decode_ms'] = round((time.time() - decoding) * 1000, 3)
+
+    def _exchange(self, cassette, method, path, payload, headers, sent):
+        if cassette is not None and cassette.replaying:
+            return self._replay(cassette, method, path, payload)
+
         resp, resp_data = self.connection.send(
-            path, data=json.dumps(data), method=method, headers=headers,
+            path, data=payload, method=method, headers=headers,
         )
+        # Injected faults aren't what the tenant answered, so aren't recorded.
+        if cassette is not None and (self._faults is None or self._faults.injected() is None):
+            self._record_exchange(cassette, method, path, payload, resp, resp_data, time.time() - sent)
+
+        return resp, resp_data
+
+    def _get_faults(self):
+        config = self.get_option('fault_injection')
+        if not config:
+            return None
+
+        with self._stats_lock:
+            if self._faults is None:
+                try:
+                    self._faults = FaultInjector(config)
+                except (TypeError, ValueError) as e:
+                    raise ConnectionError('fault_injection is invalid: {0}'.format(e))
+                # Faults are raised where the connection sends requests.
+                patch_open_url(sys.modules[type(self.connection).__module__])
+                self.connection.queue_message(
+                    'warning',
+                    '(prismacloud) injecting faults into requests to {0}'.format(self.connection._url),
+                )
+            return self._faults
+
+    def _get_cassette(self):
+        cassette_file = self.get_option('cassette_file')
+        if not cassette_file:
+            return None
 
+        with self._stats_lock:
+            if self._cassette is None:
+                self._cassette = Cassette(
+                    cassette_file, self.tenant(),
+                    self.get_option('cassette_mode'), self.get_option('cassette_timing'),
+                    self.get_option('cassette_scrub_fields'),
+                )
+            return self._cassette
+
+    def _replay(self, cassette, method, path, payload):
+        try:
+            return cassette.play(method, path, payload)
+        except KeyError:
+            raise ConnectionError('{0} {1} was not recorded in {2}'.format(method, path, cassette.path))
+        except (IOError, OSError) as e:
+            raise ConnectionError('failed to read {0}: {1}'.format(cassette.path, e))
+
+    def _record_exchange(self, cassette, method, path, payload, resp, resp_data, elapsed):
+        try:
+            cassette.record(method, path, payload, resp, resp_data, elapsed)
+        except (IOError, OSError) as e:
+            self.connection.queue_message(
+                'warning',
+                '(prismacloud) failed to record to {0}: {1}'.format(cassette.path, e),
+            )
+
+    def _decode(self, resp, resp_data):
         code = resp.getcode()
         body = to_text(resp_data.getvalue())
 
@@ -73,23 +419,17 @@ class HttpApi(HttpApiBase):
             err_val = resp.getheader(err_loc)
             if err_val is None:
                 raise ConnectionError('{0} header is missing, is this Prisma Cloud?\n{1}'.format(err_loc, body))
-            errinfo = json.loads(err_val)
+            try:
+                errinfo = json.loads(err_val)
+                err = errors.error_for(errinfo)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                raise ConnectionError('{0} header is malformed: {1}\n{2}'.format(err_loc, err_val, body))
             self.connection.queue_message(
                 'vvvv',
                 '(prismacloud) error: {0}'.format(errinfo),
             )
 
-
-            # Only ever seen one error at a time, but it's still a list, so....
-            for x in errinfo:
-                if x['i18nKey'].endswith('_already_exists'):
-                    raise errors.AlreadyExistsError("object already exists", errinfo)
-                elif x['i18nKey'] in ('invalid_id', 'not_found'):
-                    raise errors.ObjectNotFoundError("object not found", errinfo)
-                elif x['i18nKey'] == 'invalid_credentials':
-                    raise errors.AuthenticationError("invalid credentials provided", errinfo)
-            else:
-                raise errors.PrismaCloudError("error", errinfo)
+            raise err
 
         ans = None
         try:
@@ -99,6 +439,248 @@ class HttpApi(HttpApiBase):
 
         return ans
 
+    def send_requests(self, requests, workers=1, invocation=None):
+        """Sends several requests concurrently, using up to workers threads.
+
+        Each request is a list of send_request args.  Returns a dict with
+        the "results", a dict for each request holding either the response
+        or the error raised, and the "records" of the requests made, logins
+        included, for the stats of the module.
+
+        Modules pass their invocation ID, name and label as invocation, so
+        that the requests are traced and profiled as part of it, even while
+        other modules share the connection.  The "invocation" returned is
+        the invocation ID, along with the trace and span IDs of its span if
+        tracing is on, or None if both tracing and profiling are off.
+        """
+        ans = {'results': None, 'records': [], 'invocation': None}
+        current = None
+        if invocation is not None:
+            current = self._begin_invocation(*invocation)
+        if current is not None:
+            ans['invocation'] = {'id': current['id'], 'trace': None}
+            if current['traced']:
+                ans['invocation']['trace'] = {'traceId': current['traceId'], 'spanId': current['spanId']}
+
+        # Log in now, instead of having the first requests all race to do it.
+        self._local.records = ans['records']
+        self._local.invocation = current
+        try:
+            self.connection._connect()
+        finally:
+            self._local.records = None
+            self._local.invocation = None
+
+        queued = time.time()
+
+        def send(req):
+            self._local.queued = queued
+            self._local.records = ans['records']
+            self._local.invocation = current
+            try:
+                return {'response': self.send_request(*req)}
+            except errors.PrismaCloudError as e:
+                return {
+                    'error': type(e).__name__,
+                    'message': e.args[0],
+                    'errlist': e.errlist,
+                }
+            finally:
+                self._local.queued = None
+                self._local.records = None
+                self._local.invocation = None
+
+        try:
+            ans['results'] = run_concurrently(send, requests, workers)
+        finally:
+            if current is not None:
+                current['last'] = time.time()
+
+        return ans
+
+    def handle_httperror(self, exc):
+        if exc.code != 401:
+            return super(HttpApi, self).handle_httperror(exc)
+
+        if getattr(self._local, 'logging_in', False):
+            # Let send_request raise the error for the failed login.
+            return exc
+
+        retries = getattr(self._local, 'retries', 0)
+        if retries >= LOGIN_RETRIES:
+            return False
+
+        self._relogin()
+        self._local.retries = retries + 1
+
+        return True
+
+    def _relogin(self):
+        """Logs in again, unless another thread already has.
+
+        Requests sent concurrently share the token, so they all get a 401
+        once it expires.  Only the first of them logs in, and the rest retry
+        with the token it got.
+        """
+        with self._login_lock:
+            if self.connection._auth in (None, self._local.auth):
+                self._local.logging_in = True
+                try:
+                    self.login(
+                        self.connection.get_option('remote_user'),
+                        self.connection.get_option('password'),
+                    )
+                finally:
+                    self._local.logging_in = False
+            self._local.auth = self.connection._auth
+
+    def _record(self, record):
+        with self._stats_lock:
+            self._stats_total += 1
+            self._metrics.add(record)
+            records = getattr(self._local, 'records', None)
+            if records is not None:
+                records.append(record)
+
+    def add_cache_hits(self, cache_hits):
+        """Adds the cache hits of a module to the metrics."""
+        with self._stats_lock:
+            self._metrics.add_cache_hits(cache_hits)
+
+    def tenant(self):
+        """Returns a string identifying the tenant of this connection."""
+        return '{0} {1} {2}'.format(
+            self.connection._url,
+            self.connection.get_option('remote_user'),
+            self.get_option('customer_name') or '',
+        )
+
+    def _get_tracer(self, trace_file):
+        with self._stats_lock:
+            if self._tracer is None or self._tracer.path != os.path.abspath(os.path.expanduser(trace_file)):
+                self._end_spans()
+                self._tracer = Tracer(trace_file)
+                self._connection_span = {'spanId': new_id(8), 'start': time.time()}
+            return self._tracer
+
+    def _begin_invocation(self, invocation_id, module_name, label=None):
+        """Returns the state of a module invocation, starting it if it's new.
+
+        Returns None if both tracing and profiling are off.
+        """
+        trace_file = self.get_option('trace_file')
+        profile_dir = self.get_option('profile_dir')
+        if not trace_file and not profile_dir:
+            return None
+
+        tracer = None
+        if trace_file:
+            tracer = self._get_tracer(trace_file)
+        with self._stats_lock:
+            ans = self._invocations.get(invocation_id)
+            if ans is not None:
+                return ans
+
+            if len(self._invocations) >= MAX_INVOCATIONS:
+                idle = min(self._invocations.values(), key=lambda x: x['last'])
+                self._end_invocation(idle, completed=False)
+            now = time.time()
+            ans = self._invocations[invocation_id] = {
+                'id': invocation_id,
+                'name': module_name,
+                'label': label,
+                'start': now,
+                'last': now,
+                'requests': 0,
+                'traced': tracer is not None,
+                'traceId': tracer.trace_id if tracer is not None else None,
+                'spanId': new_id(8),
+                'profiler': Profiler() if profile_dir else None,
+            }
+            return ans
+
+    def module_end(self, invocation_id, attributes=None):
+        """Ends a module invocation, writing its span and profile."""
+        with self._stats_lock:
+            invocation = self._invocations.get(invocation_id)
+            if invocation is not None:
+                self._end_invocation(invocation, True, attributes)
+
+    def _end_invocation(self, invocation, completed, attributes=None):
+        self._invocations.pop(invocation['id'], None)
+
+        if invocation['traced'] and self._tracer is not None:
+            attributes = dict(attributes or {})
+            attributes.update({
+                'ansible.module.name': invocation['name'],
+                'ansible.module.completed': completed,
+                'prismacloud.requests': invocation['requests'],
+            })
+            # A module that failed is only known to have run until its
+            # last request, not until whenever it was noticed.
+            end = time.time() if completed else invocation['last']
+            self._tracer.span(
+                invocation['name'], invocation['start'], end,
+                span_id=invocation['spanId'], parent_id=self._connection_span['spanId'],
+                kind='SPAN_KIND_INTERNAL', attributes=attributes,
+            )
+
+        profile_dir = self.get_option('profile_dir')
+        if invocation['profiler'] is not None and profile_dir:
+            try:
+                invocation['profiler'].dump(profile_file(
+                    profile_dir, invocation['name'], invocation['label'],
+                    'connection-{0}'.format(invocation['spanId'])))
+            except (IOError, OSError) as e:
+                self.connection.queue_message(
+                    'warning',
+                    '(prismacloud) failed to write profile to {0}: {1}'.format(profile_dir, e),
+                )
+
+    def _end_invocations(self):
+        # Those of modules that failed were never ended.
+        for invocation in list(self._invocations.values()):
+            self._end_invocation(invocation, completed=False)
+
+    def _end_spans(self):
+        if self._tracer is None:
+            return
+
+        self._end_invocations()
+        self._tracer.span(
+            'prismacloud connection', self._connection_span['start'], time.time(),
+            span_id=self._connection_span['spanId'], kind='SPAN_KIND_INTERNAL',
+            attributes={
+                'server.address': self.connection._url,
+                'prismacloud.requests': self._stats_total,
+            },
+        )
+        self._tracer.close()
+        self._tracer = None
+
+    def logout(self):
+        # Called when the connection is closed.
+        with self._stats_lock:
+            self._end_invocations()
+            self._end_spans()
+            if self._cassette is not None:
+                self._cassette.close()
+                self._cassette = None
+
+        metrics_file = self.get_option('metrics_file')
+        if not metrics_file:
+            return
+
+        with self._stats_lock:
+            try:
+                self._metrics.write(metrics_file, self.connection._url)
+                self._metrics = Metrics()
+            except (IOError, OSError) as e:
+                self.connection.queue_message(
+                    'warning',
+                    '(prismacloud) failed to write metrics to {0}: {1}'.format(metrics_file, e),
+                )
+
     def login(self, username, password):
         path = ['login', ]
 
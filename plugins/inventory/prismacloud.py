@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+name: prismacloud
+plugin_type: inventory
+author:
+    - Garfield Lee Freeman (@shinmog)
+short_description: Prisma Cloud cloud accounts inventory source
+description:
+    - Makes each Prisma Cloud cloud account a host.
+    - Hosts are grouped by their cloud type (such as C(aws)) and by each
+      account group they are in.
+    - The host vars are the fields of the account's listing entry merged
+      with its details (unless I(details=false)), each prefixed with
+      I(vars_prefix), along with C(prismacloud_account_groups), the names
+      of the account groups it is in.
+    - Account details are retrieved concurrently.
+    - Uses a YAML configuration file that ends with C(prismacloud.yml) or
+      C(prismacloud.yaml).
+extends_documentation_fragment:
+    - paloaltonetworks.prismacloud.fragments.client
+    - constructed
+    - inventory_cache
+options:
+    plugin:
+        description:
+            - The name of this plugin.
+        required: true
+        choices:
+            - paloaltonetworks.prismacloud.prismacloud
+    hostname_field:
+        description:
+            - The account field to use as the inventory hostname.
+            - Accounts whose name is already taken by another account fall
+              back to their ID.
+        type: str
+        default: 'name'
+        choices:
+            - name
+            - id
+    vars_prefix:
+        description:
+            - The prefix of the account's host vars.
+            - Account fields such as C(name) are reserved in Ansible, so
+              they can't be used as host vars as they are.
+        type: str
+        default: 'prismacloud_'
+    details:
+        description:
+            - Use the details of each account as its host vars.
+        type: bool
+        default: true
+    concurrency:
+        description:
+            - The max number of requests to have in flight at once.
+        type: int
+        default: 4
+'''
+
+EXAMPLES = '''
+# prismacloud.yml
+plugin: paloaltonetworks.prismacloud.prismacloud
+url: 'https://api.prismacloud.io'
+concurrency: 8
+cache: true
+cache_plugin: jsonfile
+cache_connection: '/tmp/prismacloud_inventory'
+cache_timeout: 3600
+keyed_groups:
+    - key: prismacloud_enabled
+      prefix: enabled
+'''
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_native
+from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible.plugins.inventory import Cacheable
+from ansible.plugins.inventory import Constructable
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.client import PrismaCloudClient
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    NAME = 'paloaltonetworks.prismacloud.prismacloud'
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(('prismacloud.yml', 'prismacloud.yaml'))
+
+        return False
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        data = None
+        if use_cache:
+            try:
+                data = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+
+        if data is None:
+            try:
+                data = self._fetch()
+            except errors.PrismaCloudError as e:
+                raise AnsibleError('prismacloud inventory: {0}'.format(to_native(e)))
+
+        if update_cache:
+            self._cache[cache_key] = data
+
+        self._populate(data)
+
+    def _fetch(self):
+        """Returns the accounts and account groups."""
+        client = PrismaCloudClient(
+            self.get_option('url'),
+            self.get_option('username'),
+            self.get_option('password'),
+            self.get_option('customer_name'),
+            self.get_option('validate_certs'),
+            self.get_option('timeout'),
+        )
+        concurrency = self.get_option('concurrency')
+        if concurrency < 1:
+            raise AnsibleError('prismacloud inventory: concurrency must be at least 1')
+
+        accounts, groups = client.get_many([['cloud', 'name'], ['cloud', 'group']], 2)
+        accounts = accounts or []
+        groups = groups or []
+
+        if self.get_option('details'):
+            paths = [['cloud', x['cloudType'], x['id']] for x in accounts]
+            details = client.get_many(paths, concurrency)
+            # Accounts deleted since the listing was retrieved are dropped.
+            accounts = [
+                dict(item, **obj) for item, obj in zip(accounts, details)
+                if obj is not None
+            ]
+
+        return {'accounts': accounts, 'groups': groups}
+
+    def _populate(self, data):
+        strict = self.get_option('strict')
+        hostname_field = self.get_option('hostname_field')
+        prefix = self.get_option('vars_prefix')
+
+        # Account group membership is in either the account or the group.
+        group_names = dict((x['id'], x['name']) for x in data['groups'])
+        members = {}
+        for group in data['groups']:
+            for account_id in group.get('accountIds') or []:
+                members.setdefault(account_id, set()).add(group['name'])
+
+        ids = {}
+        for account in data['accounts']:
+            account_id = account['id']
+            host = account.get(hostname_field) or account_id
+            if host in ids and ids[host] != account_id:
+                host = account_id
+            ids[host] = account_id
+            self.inventory.add_host(host)
+
+            cloud_type = account.get('cloudType')
+            if cloud_type:
+                group = self.inventory.add_group(self._sanitize_group_name(cloud_type))
+                self.inventory.add_child(group, host)
+
+            account_groups = set(members.get(account_id, ()))
+            for group_id in account.get('groupIds') or []:
+                if group_id in group_names:
+                    account_groups.add(group_names[group_id])
+            for name in sorted(account_groups):
+                group = self.inventory.add_group(self._sanitize_group_name(name))
+                self.inventory.add_child(group, host)
+
+            hostvars = dict((prefix + k, v) for k, v in account.items())
+            hostvars['prismacloud_account_groups'] = sorted(account_groups)
+            for key, val in hostvars.items():
+                self.inventory.set_variable(host, key, val)
+
+            self._set_composite_vars(self.get_option('compose'), hostvars, host, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), hostvars, host, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, host, strict=strict)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+name: prismacloud
+author:
+    - Garfield Lee Freeman (@shinmog)
+short_description: Resolve Prisma Cloud names and IDs
+description:
+    - Looks up Prisma Cloud policies, cloud accounts, account groups and
+      compliance standards by name or ID.
+    - The listing of the given type is retrieved once and indexed by name
+      and ID.  The index is cached on disk for I(cache_ttl) seconds, so
+      every lookup in a play, across all hosts and loops, is answered from
+      the same index.
+extends_documentation_fragment:
+    - paloaltonetworks.prismacloud.fragments.client
+options:
+    _terms:
+        description:
+            - The names (or IDs, if I(key=id)) to look up.
+        required: true
+    type:
+        description:
+            - The type of object to look up.
+        type: str
+        required: true
+        choices:
+            - policy
+            - cloud_account
+            - account_group
+            - compliance_standard
+    key:
+        description:
+            - Whether the terms are names or IDs.
+        type: str
+        default: 'name'
+        choices:
+            - name
+            - id
+    return_field:
+        description:
+            - The field of each object found to return.
+            - If not specified, the ID is returned when I(key=name), and
+              the whole object is returned when I(key=id).
+        type: str
+    on_missing:
+        description:
+            - What to do when a term is not found.
+            - C(skip) and C(warn) return the objects found for the other
+              terms.
+        type: str
+        default: 'error'
+        choices:
+            - error
+            - warn
+            - skip
+    cache_ttl:
+        description:
+            - How long, in seconds, to use the cached index for.
+            - Set to C(0) to always retrieve the listing.
+        type: int
+        default: 300
+    cache_dir:
+        description:
+            - The cache directory on the controller.
+        type: path
+        default: '~/.ansible/cache/prismacloud'
+notes:
+    - Names are not unique for every type of object.  A name that matches
+      more than one object returns all of them.
+'''
+
+EXAMPLES = '''
+- name: add an account to account groups by name
+  paloaltonetworks.prismacloud.prismacloud_aws_cloud_account:
+    name: 'prod'
+    accountId: '123456789012'
+    groupIds: "{{ lookup('paloaltonetworks.prismacloud.prismacloud', 'Prod', 'Audit', type='account_group', wantlist=True) }}"
+
+- name: show the severity of a policy
+  debug:
+    msg: "{{ lookup('paloaltonetworks.prismacloud.prismacloud', 'AWS S3 buckets are accessible to public', type='policy', return_field='severity') }}"
+'''
+
+RETURN = '''
+_raw:
+    description:
+        - The ID, field or object for each object found.
+    type: list
+'''
+
+import time
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_native
+from ansible.plugins.lookup import LookupBase
+from ansible.utils.display import Display
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import cache
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.snapshot import build_index
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.client import PrismaCloudClient
+
+
+display = Display()
+
+# Each type's listing path and ID field.
+TYPES = {
+    'policy': (['policy', ], 'policyId'),
+    'cloud_account': (['cloud', 'name'], 'id'),
+    'account_group': (['cloud', 'group'], 'id'),
+    'compliance_standard': (['compliance', ], 'id'),
+}
+
+# Indexes already loaded by this process, keyed by tenant and type, along
+# with when they were loaded.
+INDEXES = {}
+
+
+class LookupModule(LookupBase):
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+
+        kind = self.get_option('type')
+        key = self.get_option('key')
+        return_field = self.get_option('return_field')
+        id_field = TYPES[kind][1]
+        if key == 'id':
+            key = id_field
+        elif return_field is None:
+            return_field = id_field
+
+        try:
+            data = self.get_index(kind)
+        except AnsibleError:
+            raise
+        except Exception as e:
+            # Not just API errors:  timeouts, TLS errors and anything else
+            # the client raises fail the lookup, rather than the play.
+            raise AnsibleError('prismacloud lookup: {0}'.format(to_native(e)), orig_exc=e)
+
+        ans = []
+        for term in terms:
+            found = data['indexes'][key].get('{0}'.format(term))
+            if not found:
+                msg = 'prismacloud lookup: no {0} with {1} {2}'.format(kind, key, term)
+                if self.get_option('on_missing') == 'error':
+                    raise AnsibleError(msg)
+                elif self.get_option('on_missing') == 'warn':
+                    display.warning(msg)
+                continue
+            for num in found:
+                item = data['listing'][num]
+                ans.append(item if return_field is None else item.get(return_field))
+
+        return ans
+
+    def get_index(self, kind):
+        """Returns the listing of the given type and its indexes."""
+        client = PrismaCloudClient(
+            self.get_option('url'),
+            self.get_option('username'),
+            self.get_option('password'),
+            self.get_option('customer_name'),
+            self.get_option('validate_certs'),
+            self.get_option('timeout'),
+        )
+        cache_ttl = self.get_option('cache_ttl')
+        memo_key = (client.tenant(), kind)
+        if memo_key in INDEXES and time.time() - INDEXES[memo_key][0] <= cache_ttl:
+            return INDEXES[memo_key][1]
+
+        path, id_field = TYPES[kind]
+        disk = cache.tenant_cache(self.get_option('cache_dir'), client.tenant())
+
+        data = None
+        if cache_ttl > 0:
+            data = disk.get(['lookup', kind], cache_ttl)
+        if data is None:
+            listing = client.get(path)
+            data = {
+                'listing': listing,
+                'indexes': build_index(listing, (id_field, 'name')),
+            }
+            if cache_ttl > 0:
+                disk.set(['lookup', kind], data)
+
+        INDEXES[memo_key] = (time.time(), data)
+
+        return data
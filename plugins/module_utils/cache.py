@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils._text import to_text
+
+
+class DiskCache(object):
+    """A cache of JSON values on the controller's disk.
+
+    Each value lives in its own file, so separate forks can share the cache
+    without locking:  writes go to a temp file which is then renamed into
+    place, and anything unreadable is treated as a cache miss.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def filename(self, key):
+        name = hashlib.sha1(to_bytes(json.dumps(key))).hexdigest()
+        return os.path.join(self.path, '{0}.json'.format(name))
+
+    def get(self, key, max_age=None):
+        """Returns the value for key, or None if it is missing or stale.
+
+        Args:
+            key (list): The cache key.
+            max_age (int): Ignore values stored more than this many seconds ago.
+        """
+        try:
+            with open(self.filename(key), 'rb') as fd:
+                data = json.loads(to_text(fd.read()))
+        except (IOError, OSError, ValueError):
+            return None
+
+        if max_age is not None and time.time() - data['stored_at'] > max_age:
+            return None
+
+        return data['value']
+
+    def set(self, key, value):
+        """Stores value for key.
+
+        Failing to write to the cache is not an error, the value is just not
+        cached.
+        """
+        data = {'stored_at': time.time(), 'value': value}
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            fd, tmp = tempfile.mkstemp(dir=self.path)
+        except (IOError, OSError):
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(to_bytes(json.dumps(data)))
+            os.rename(tmp, self.filename(key))
+        except (IOError, OSError):
+            try:
+                os.remove(tmp)
+            except (IOError, OSError):
+                pass
+
+
+def tenant_cache(root, tenant):
+    """Returns the DiskCache for the given tenant under the root dir."""
+    name = hashlib.sha1(to_bytes(tenant)).hexdigest()
+    return DiskCache(os.path.join(os.path.expanduser(root), name))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+# Helpers shared by the modules and the plugins.  The httpapi, inventory
+# and lookup plugins import this on the controller, so it must not import
+# anything that only works inside a module.
+
+import os
+import re
+import threading
+import time
+
+from ansible.module_utils.six.moves import queue
+
+
+# The path parts that are not IDs.
+PATH_NAMES = frozenset([
+    'login', 'cloud', 'name', 'group', 'policy', 'compliance', 'requirement', 'section',
+])
+
+CLOUD_TYPES = frozenset(['aws', 'azure', 'gcp', 'alibaba_cloud'])
+
+
+def template_path(path):
+    """Returns the path with its IDs replaced by placeholders.
+
+    Requests for different objects of the same type then share a path,
+    such as /cloud/{type}/{id}.
+    """
+    ans = []
+    for num, x in enumerate(path):
+        x = '{0}'.format(x)
+        if x in PATH_NAMES:
+            ans.append(x)
+        elif num == 1 and ans[0] == 'cloud' and x in CLOUD_TYPES:
+            ans.append('{type}')
+        else:
+            ans.append('{id}')
+
+    return '/' + '/'.join(ans)
+
+
+def profile_file(directory, name, label, suffix):
+    """Returns the path of a .pstats file in directory, creating it if
+    needed.
+
+    The file name has the time, the short name of the module, the label (if
+    any) and the suffix, which must make it unique.
+    """
+    directory = os.path.expanduser(directory)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    parts = [time.strftime('%Y%m%dT%H%M%S'), name.split('.')[-1]]
+    if label:
+        parts.append(label)
+    parts.append(suffix)
+    return os.path.join(directory, re.sub(r'[^\w.-]+', '_', '-'.join(parts)) + '.pstats')
+
+
+def run_concurrently(func, items, workers):
+    """Calls func for each of the items, using up to workers threads.
+
+    Returns the results in the same order as the items.  If any call raises
+    an exception, the first one is re-raised once all threads are done.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(x) for x in items]
+
+    ans = [None] * len(items)
+    failures = []
+    todo = queue.Queue()
+    for x in enumerate(items):
+        todo.put(x)
+
+    def worker():
+        while not failures:
+            try:
+                num, item = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ans[num] = func(item)
+            except Exception as e:
+                failures.append(e)
+
+    threads = [threading.Thread(target=worker) for x in range(min(workers, len(items)))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+
+    if failures:
+        raise failures[0]
+
+    return ans
@@ -46,3 +46,17 @@ class AuthenticationError(PrismaCloudError):
 
 class ResponseNotJson(PrismaCloudError):
     pass
+
+
+def error_for(errinfo):
+    """Returns the error for the errors in an X-Redlock-Status header."""
+    # Only ever seen one error at a time, but it's still a list, so....
+    for x in errinfo:
+        if x['i18nKey'].endswith('_already_exists'):
+            return AlreadyExistsError("object already exists", errinfo)
+        elif x['i18nKey'] in ('invalid_id', 'not_found'):
+            return ObjectNotFoundError("object not found", errinfo)
+        elif x['i18nKey'] == 'invalid_credentials':
+            return AuthenticationError("invalid credentials provided", errinfo)
+
+    return PrismaCloudError("error", errinfo)
@@ -19,26 +19,139 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 
+import binascii
+import fnmatch
+import gzip
+import heapq
+import itertools
+import json
+import os
 import re
+import tempfile
+import time
 
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import cache
 from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.common import profile_file
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.common import template_path
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import snapshot
+from ansible.module_utils._text import to_bytes
 from ansible.module_utils._text import to_text
 from ansible.module_utils.connection import Connection
 from ansible.module_utils.connection import ConnectionError
+from ansible.module_utils.six import integer_types
+from ansible.module_utils.six import string_types
 from ansible.module_utils.six.moves.urllib.error import HTTPError
-from ansible.module_utils.urls import CertificateError
+
+try:
+    from ansible.module_utils.urls import CertificateError
+except ImportError:
+    # Newer ansible-core only raises the one from ssl.
+    from ssl import CertificateError
+
+
+# The requests sent to the connection in a single RPC, per worker.  Each RPC
+# must finish within the persistent_command_timeout, so the requests are
+# sent in batches instead of all at once.
+REQUESTS_PER_WORKER = 8
 
 
 class PrismaCloudRequest(object):
     def __init__(self, module):
         self.module = module
-        self.connection = Connection(self.module._socket_path)
+        self.snapshot = None
+        if self.module.params.get('source') == 'snapshot':
+            if self.module.params.get('snapshot_file') is None:
+                self.module.fail_json(msg='snapshot_file is required when source is snapshot')
+            # Everything is answered from the snapshot, there is no tenant.
+            self.snapshot = snapshot.Snapshot(self.module.params['snapshot_file'])
+            self.connection = self.snapshot
+        else:
+            self.connection = Connection(self.module._socket_path)
+        self._details = {}
+        self._indexes = {}
+        self._disk_cache = None
+        self.synced = None
+        self.cache_hits = {}
+        self._records = []
+        # Identifies this module invocation to the connection, which may be
+        # shared with other modules running at the same time.
+        self._invocation_id = to_text(binascii.hexlify(os.urandom(8)))
+        self._invocation = None
+        self._rpc_count = 0
+        self._rpc_time = 0
+
+    def send_request(self, method, path, query=None, data=None, raise_not_found=False):
+        """Sends a request, failing the module on any error.
+
+        If raise_not_found is set, ObjectNotFoundError is raised instead for
+        an object that doesn't exist, for the caller to handle.
+        """
+        # Errors raised by the connection only reach the module as a
+        # ConnectionError with their message, so have the connection
+        # return the error instead, to raise ObjectNotFoundError for it.
+        x = self._send([[method, path, query, data]], 1)[0]
+        if 'error' not in x:
+            return x['response']
+        elif x['error'] == 'ObjectNotFoundError' and raise_not_found:
+            raise errors.ObjectNotFoundError(x['message'], x['errlist'])
+
+        self._fail(x)
+
+    def send_requests(self, requests, concurrency=1):
+        """Sends several requests, concurrently.
+
+        The requests are fanned out by the connection, so this is one round
+        trip to it for every REQUESTS_PER_WORKER requests per worker.
+
+        Args:
+            requests (list): A list of send_request args for each request.
+            concurrency (int): The max number of requests in flight.
+
+        Returns:
+            list: The response for each request, or None if the object was
+            not found.
+        """
+        ans = []
+        size = max(concurrency, 1) * REQUESTS_PER_WORKER
+        for num in range(0, len(requests), size):
+            for x in self._send(requests[num:num + size], concurrency):
+                if 'error' not in x:
+                    ans.append(x['response'])
+                elif x['error'] == 'ObjectNotFoundError':
+                    ans.append(None)
+                else:
+                    self._fail(x)
 
-    def send_request(self, method, path, query=None, data=None):
+        return ans
+
+    def _send(self, requests, concurrency):
+        """Returns the results of one send_requests round trip.
+
+        The connection returns the records of the requests along with their
+        results, and begins the module invocation on its first round trip,
+        so the stats, tracing and profiling need no round trips of their own.
+        """
+        invocation = [self._invocation_id, self.module._name, os.environ.get('PRISMACLOUD_PROFILE_LABEL')]
+        ans = self._rpc('send_requests', requests, concurrency, invocation)
+        self._records.extend(ans['records'])
+        if ans['invocation'] is not None:
+            self._invocation = ans['invocation']
+
+        return ans['results']
+
+    def _fail(self, x):
+        """Fails the module with an error returned by the connection."""
+        cls = getattr(errors, x['error'], errors.PrismaCloudError)
+        self.module.fail_json(msg='{0}'.format(cls(x['message'], x['errlist'])))
+
+    def get_many(self, paths, concurrency=1):
+        return self.send_requests([['GET', path, None, None] for path in paths], concurrency)
+
+    def _rpc(self, name, *args):
+        start = time.time()
         try:
-            ans = self.connection.send_request(
-                method, path, query, data,
-            )
+            ans = getattr(self.connection, name)(*args)
         except ConnectionError as e:
             self.module.fail_json(msg="connection error occurred: {0}".format(e))
         except CertificateError as e:
@@ -49,14 +162,53 @@ class PrismaCloudRequest(object):
             raise
         except errors.PrismaCloudError as e:
             self.module.fail_json(msg='{0}'.format(e))
+        finally:
+            self._rpc_count += 1
+            self._rpc_time += time.time() - start
 
         return ans
 
+    def _stats_rpc(self, name, *args):
+        # Stats are best effort, they never fail the module.
+        try:
+            return getattr(self.connection, name)(*args)
+        except Exception:
+            return None
+
+    def cache_hit(self, method, path):
+        """Counts a request that was answered from a cache."""
+        key = '{0} {1}'.format(method, template_path(path))
+        self.cache_hits[key] = self.cache_hits.get(key, 0) + 1
+
+    def stats(self):
+        """Returns the summary of the requests made by this module."""
+        return summarize_stats(self._records, self.cache_hits)
+
+    def exit_json(self, **kwargs):
+        """Exits the module, adding the prismacloud_stats to the results."""
+        kwargs['prismacloud_stats'] = self.stats()
+        if self.cache_hits and self.snapshot is None:
+            # Only the module knows about its cache hits, so pass them on
+            # to the connection for its metrics.
+            self._stats_rpc('add_cache_hits', self.cache_hits)
+        if self._invocation is not None:
+            # The round trips to the connection include the time spent
+            # (de)serializing the requests and responses, and waiting for
+            # the connection to be free.
+            self._stats_rpc('module_end', self._invocation_id, {
+                'prismacloud.rpc_count': self._rpc_count,
+                'prismacloud.rpc_ms': round(self._rpc_time * 1000, 3),
+                'prismacloud.cache_hits': sum(self.cache_hits.values()),
+            })
+            if self._invocation['trace'] is not None:
+                kwargs['prismacloud_stats']['trace'] = self._invocation['trace']
+        self.module.exit_json(**kwargs)
+
     def post(self, path, query=None, data=None):
         return self.send_request('POST', path, query, data)
 
-    def get(self, path, query=None):
-        return self.send_request('GET', path, query)
+    def get(self, path, query=None, raise_not_found=False):
+        return self.send_request('GET', path, query, raise_not_found=raise_not_found)
 
     def put(self, path, data=None):
         return self.send_request('PUT', path, data=data)
@@ -64,63 +216,830 @@ class PrismaCloudRequest(object):
     def delete(self, path):
         return self.send_request('DELETE', path)
 
-    def get_facts_from(self, listing, primary_field, fields, details_path=None, dynamic_path_indexes=None):
+    def get_details(self, path, item=None):
+        """Does a GET for the details at path, remembering the result.
+
+        Facts lookups may need the same details more than once, so this keeps
+        it to one request per path for the life of the module.  Nothing is
+        kept when streaming to an output_file, as that would defeat the point.
+
+        If the listing item is given and is a system default, the details are
+        also kept in the catalog cache, if enabled.  They are reused for as
+        long as the item's lastModifiedOn is unchanged.
+        """
+        key = tuple(path)
+        if key in self._details:
+            self.cache_hit('GET', path)
+            return self._details[key]
+
+        catalog = None
+        if item is not None and item.get('systemDefault') and 'lastModifiedOn' in item:
+            catalog = self.catalog_cache()
+
+        ans = None
+        if catalog is not None:
+            cached = catalog.get(['details', ] + list(path))
+            if cached is not None and cached['lastModifiedOn'] == item['lastModifiedOn']:
+                self.cache_hit('GET', path)
+                ans = cached['details']
+
+        if ans is None:
+            ans = self.get(path, raise_not_found=True)
+            if catalog is not None:
+                catalog.set(['details', ] + list(path), {
+                    'lastModifiedOn': item['lastModifiedOn'],
+                    'details': ans,
+                })
+
+        if self.module.params.get('output_file') is None:
+            self._details[key] = ans
+
+        return ans
+
+    def disk_cache(self):
+        """Returns the DiskCache for this tenant."""
+        if self._disk_cache is None:
+            self._disk_cache = cache.tenant_cache(
+                self.module.params['cache_dir'], self._rpc('tenant'))
+
+        return self._disk_cache
+
+    def catalog_cache(self):
+        """Returns the catalog DiskCache, or None if it is not enabled."""
+        if not self.module.params.get('catalog_cache') or self.snapshot is not None:
+            return None
+
+        return self.disk_cache()
+
+    def sync_details(self, listing, id_field, details_path, dynamic_path_indexes):
+        """Brings the local snapshot of the details of listing up to date.
+
+        Only the details of items that are new, or whose lastModifiedOn has
+        changed since the last sync, are retrieved (concurrently).  Items no
+        longer in the listing are dropped from the snapshot.  The details are
+        then served from the snapshot by get_details().
+
+        The snapshot is saved after each batch of details, so a sync that is
+        cut short carries on from there the next time.
+
+        Returns the listing, so this can wrap the retrieval of it.
+        """
+        key = ['snapshot', ] + [x for num, x in enumerate(details_path) if num not in dynamic_path_indexes]
+        synced = self.disk_cache().get(key) or {}
+
+        current = {}
+        stale = []
+        for item in listing:
+            old = synced.get(item[id_field])
+            if old is not None and old['lastModifiedOn'] == item.get('lastModifiedOn'):
+                current[item[id_field]] = old
+            else:
+                stale.append(item)
+
+        concurrency = self.module.params.get('concurrency') or 1
+        size = concurrency * REQUESTS_PER_WORKER
+        for num in range(0, len(stale), size):
+            batch = stale[num:num + size]
+            paths = [build_path(x, details_path, dynamic_path_indexes) for x in batch]
+            for item, details in zip(batch, self.get_many(paths, concurrency)):
+                # Deleted between retrieving the listing and its details.
+                if details is None:
+                    continue
+                current[item[id_field]] = {
+                    'lastModifiedOn': item.get('lastModifiedOn'),
+                    'details': details,
+                }
+            if num + size < len(stale):
+                progress = dict(synced)
+                progress.update(current)
+                self.disk_cache().set(key, progress)
+
+        self.disk_cache().set(key, current)
+        for item in listing:
+            if item[id_field] in current:
+                self._details[tuple(build_path(item, details_path, dynamic_path_indexes))] = current[item[id_field]]['details']
+
+        self.synced = {
+            'added': len([x for x in stale if x[id_field] not in synced]),
+            'updated': len([x for x in stale if x[id_field] in synced]),
+            'removed': len([x for x in synced if x not in current]),
+            'unchanged': len(listing) - len(stale),
+        }
+
+        return listing
+
+    def get_catalog(self, path):
+        """Returns the listing at path, a catalog of system default and custom
+        items.
+
+        If the catalog cache is enabled, the system default items are saved
+        to it each time the listing is retrieved.  For up to cache_ttl seconds
+        after that, lookups of only system default items are answered from
+        the cache instead.
+        """
+        catalog = self.catalog_cache()
+        if catalog is None:
+            return self.get(path)
+
+        key = ['listing', ] + list(path)
+        wanted = [self.module.params.get('systemDefault'), ]
+        wanted.extend(x.get('systemDefault') for x in self.module.params.get('queries') or [])
+        if wanted[0] is True and all(x in (None, True) for x in wanted):
+            ans = catalog.get(key, self.module.params['cache_ttl'])
+            if ans is not None:
+                self.cache_hit('GET', path)
+                return ans
+
+        ans = self.get(path)
+        catalog.set(key, [x for x in ans if x.get('systemDefault')])
+
+        return ans
+
+    def get_facts_from(self, listing, primary_field, fields, details_path=None, dynamic_path_indexes=None, id_field=None, expand=None,
+                       unique_primary=False, details_have_fields=True):
         """Returns facts for the given listing.
 
+        The listing may also be given as a function that returns it.  Then, if
+        the user specified the id_field, the details path is queried directly
+        and the listing is only retrieved if that object was not found.
+
+        If the user specified an output_file, matching items are written to
+        that file as they are produced instead of being returned.
+
+        If the user specified queries, each query is answered from the same
+        listing and the results are returned keyed by query name.
+
         Args:
             details_path (list): List of the path to query to get details.
+            id_field (str): The field that uniquely identifies an item.
+            expand (function): Takes the params and the facts, and returns
+                the facts with any related objects added to them.
+            unique_primary (bool): If no two items can have the same
+                primary_field, so that the listing is only scanned until
+                every value of an exact match has been found.
+            details_have_fields (bool): If the details have the fields of
+                the listing items.  If not, the id_field is only looked up
+                directly when the user wants the details.
+        """
+        if self.module.params.get('queries'):
+            return self._get_batch_facts(
+                listing, primary_field, fields, details_path, dynamic_path_indexes, id_field, expand,
+                details_have_fields)
+
+        params = self.module.params
+        items = None
+        if id_field is not None:
+            items = self._get_facts_by_id(
+                params, primary_field, fields, details_path, dynamic_path_indexes, id_field,
+                details_have_fields)
+
+        if items is None:
+            if callable(listing):
+                listing = listing()
+            items = self._filter_listing(params, listing, primary_field, fields, unique_primary)
+            items = self._limit_listing(params, items)
+            items = self._render_facts(
+                params, items, primary_field, fields, details_path, dynamic_path_indexes)
+
+        return self._format_facts(params, items, expand)
+
+    def filter_listing(self, listing, primary_field, fields):
+        """Returns the items in the listing that match the user's filters."""
+        return list(self._filter_listing(self.module.params, listing, primary_field, fields))
+
+    def _get_batch_facts(self, listing, primary_field, fields, details_path, dynamic_path_indexes, id_field, expand,
+                         details_have_fields=True):
+        # Every query would write to the same file, each replacing the last.
+        if self.module.params.get('output_file') is not None:
+            self.module.fail_json(msg='output_file must be set per query when using queries')
+
+        queries = []
+        for query in self.module.params['queries']:
+            if any(query['query_name'] == x['query_name'] for x in queries):
+                self.module.fail_json(msg='duplicate query_name: {0}'.format(query['query_name']))
+            output_file = query.get('output_file')
+            if output_file is not None and any(output_file == x.get('output_file') for x in queries):
+                self.module.fail_json(msg='duplicate output_file: {0}'.format(output_file))
+            params = dict(self.module.params)
+            params.update((k, v) for k, v in query.items() if v is not None)
+            queries.append(params)
+
+        answers = [None] * len(queries)
+        if id_field is not None:
+            for num, params in enumerate(queries):
+                answers[num] = self._get_facts_by_id(
+                    params, primary_field, fields, details_path, dynamic_path_indexes, id_field,
+                    details_have_fields)
+
+        pending = [num for num, x in enumerate(answers) if x is None]
+        if pending:
+            if callable(listing):
+                listing = listing()
+            found = self._filter_listing_many(
+                [queries[num] for num in pending], listing, primary_field, fields)
+            for num, items in zip(pending, found):
+                params = queries[num]
+                items = self._limit_listing(params, iter(items))
+                answers[num] = self._render_facts(
+                    params, items, primary_field, fields, details_path, dynamic_path_indexes)
+
+        ans = {}
+        for params, items in zip(queries, answers):
+            result = self._format_facts(params, items, expand)
+            del result['changed']
+            ans[params['query_name']] = result
+
+        return {'changed': False, 'queries': ans}
+
+    def _format_facts(self, params, items, expand=None):
+        if expand is not None:
+            items = expand(params, items)
+
+        return_fields = params.get('return_fields')
+        if return_fields:
+            items = project(items, return_fields)
+
+        output_file = params.get('output_file')
+        if output_file is not None:
+            return self.write_facts(items, output_file, params.get('output_compression'))
+
+        ans = list(items)
+        total = len(ans)
+        result_format = params.get('result_format')
+        if result_format == 'columnar':
+            ans = to_columnar(ans, return_fields)
+        elif result_format == 'columns':
+            ans = to_columns(ans, return_fields)
+
+        return {'changed': False, 'listing': ans, 'total': total}
+
+    def _render_facts(self, params, items, primary_field, fields, details_path, dynamic_path_indexes):
+        """Yields the facts for the given listing items.
+
+        Filtering, sorting and limiting all happen on the listing itself, so
+        details are only retrieved for the items that are actually returned.
+        """
+        details = params.get('details')
+        for item in items:
+            if details is None:
+                yield item
+            elif not details:
+                d = dict((field, item[field]) for field in fields)
+                d[primary_field] = item[primary_field]
+                yield d
+            else:
+                path = build_path(item, details_path, dynamic_path_indexes)
+                try:
+                    yield self.get_details(path, item)
+                except errors.ObjectNotFoundError:
+                    # Deleted since the listing was retrieved.
+                    continue
+
+    def _get_facts_by_id(self, params, primary_field, fields, details_path, dynamic_path_indexes, id_field,
+                         details_have_fields=True):
+        """Returns the facts for the user specified id_field straight from the
+        details path.
+
+        Returns None if the details path can't answer the query, in which case
+        the listing should be used instead.
+        """
+        details = params.get('details')
+        the_id = params.get(id_field)
+        if details is None or the_id is None or isinstance(the_id, list):
+            return None
+        elif not details and not details_have_fields:
+            return None
+
+        path = []
+        path_fields = []
+        for num, p in enumerate(details_path):
+            if num in dynamic_path_indexes:
+                val = params.get(p)
+                if val is None:
+                    return None
+                path.append('{0}'.format(val))
+                path_fields.append(p)
+            else:
+                path.append(p)
+
+        try:
+            obj = self.get_details(path)
+        except errors.ObjectNotFoundError:
+            return None
+
+        # Fields in the path were matched by the details path itself, but any
+        # other filters have to be checked against the object returned.
+        filter_fields = [x for x in fields if x not in path_fields]
+        primary_filter = None if primary_field in path_fields else primary_field
+        if details:
+            needed = [
+                x for x in filter_fields + [primary_filter, ]
+                if x is not None and params.get(x) is not None
+            ]
+        else:
+            needed = fields + [primary_field, ]
+        if any(x not in obj for x in needed):
+            return None
+
+        if not matches(obj, self._build_filters(params, primary_filter, filter_fields)):
+            return []
+
+        ans = []
+        for item in self._limit_listing(params, iter([obj, ])):
+            if details:
+                ans.append(item)
+            else:
+                d = dict((field, item[field]) for field in fields)
+                d[primary_field] = item[primary_field]
+                ans.append(d)
+
+        return ans
+
+    def _build_filters(self, params, primary_field, fields):
+        """Returns the filters the user specified.
+
+        Each filter is a tuple of the field, a function that tests an item's
+        value for that field, and the set of wanted values if the filter is a
+        plain equality check (None otherwise).  Any regexes are compiled here,
+        once, instead of for every item in the listing.
         """
         ans = []
-        search_type = self.module.params['search_type']
-        details = self.module.params.get('details')
+
+        if primary_field is not None and params[primary_field] is not None:
+            try:
+                match, wanted = primary_filter(
+                    params[primary_field],
+                    params['search_type'],
+                    params.get('ignore_case', False),
+                )
+            except re.error as e:
+                self.module.fail_json(msg='invalid {0} pattern: {1}'.format(primary_field, e))
+            ans.append((primary_field, match, wanted))
+
+        for field in fields:
+            val = params.get(field)
+            if val is not None:
+                match, wanted = equality_filter(val)
+                ans.append((field, match, wanted))
+
+        return ans
+
+    def _index(self, listing, field):
+        """Returns a hash index of field value to listing positions.
+
+        The index is built once per listing and field, and reused for any
+        later query against the same listing.
+        """
+        key = (id(listing), field)
+        if key not in self._indexes and self.snapshot is not None:
+            index = self.snapshot.index(listing, field)
+            if index is not None:
+                self._indexes[key] = (listing, index)
+        if key not in self._indexes:
+            index = {}
+            for num, item in enumerate(listing):
+                val = item.get(field)
+                for x in (val if isinstance(val, list) else [val, ]):
+                    try:
+                        index.setdefault(x, []).append(num)
+                    except TypeError:
+                        pass
+            # Keep a reference to the listing so its id can't be reused.
+            self._indexes[key] = (listing, index)
+
+        return self._indexes[key][1]
+
+    def _filter_listing(self, params, listing, primary_field, fields, unique_primary=False):
+        filters = self._build_filters(params, primary_field, fields)
+        equality = [(field, wanted) for field, _, wanted in filters if wanted is not None]
+
+        # Combining equality filters is answered from the hash indexes, then
+        # the candidates are checked against all of the filters as usual.
+        # Snapshots come with their indexes already built, so they are used
+        # for any equality filter.
+        candidates = listing
+        indexed = len(equality) > 1 or (equality and self.snapshot is not None)
+        if indexed and isinstance(listing, list):
+            positions = None
+            for field, wanted in equality:
+                index = self._index(listing, field)
+                found = set()
+                for val in wanted:
+                    found.update(index.get(val, ()))
+                positions = found if positions is None else positions & found
+            candidates = (listing[x] for x in sorted(positions))
+
+        # If the primary field is unique, then once every value given for an
+        # exact match has been found there is nothing more to find.
+        remaining = None
+        if unique_primary and filters and filters[0][0] == primary_field and filters[0][2] is not None:
+            remaining = len(filters[0][2])
+
+        for item in candidates:
+            if matches(item, filters):
+                yield item
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+
+    def _filter_listing_many(self, queries, listing, primary_field, fields):
+        """Filters the listing for all of the queries in a single pass.
+
+        Returns a list of the matching items for each query.
+        """
+        filters = [self._build_filters(params, primary_field, fields) for params in queries]
+        ans = [[] for x in queries]
 
         for item in listing:
-            if self.module.params[primary_field] is not None:
-                val = self.module.params[primary_field]
-                if search_type == 'exact':
-                    if item[primary_field] != val:
-                        continue
-                elif search_type == 'substring':
-                    if val not in item[primary_field]:
-                        continue
-                elif search_type == 'regex':
-                    if not re.search(val, item[primary_field]):
-                        continue
-
-            include_item = True
-            for field in fields:
-                val = self.module.params.get(field)
-                if val is not None and item.get(field) != val:
-                    include_item = False
-                    break
-
-            if include_item:
-                if details is None:
-                    ans.append(item)
-                elif not self.module.params.get('details', False):
-                    d = dict((field, item[field]) for field in fields)
-                    d[primary_field] = item[primary_field]
-                    ans.append(d)
-                else:
-                    path = []
-                    for num, p in enumerate(details_path):
-                        if num in dynamic_path_indexes:
-                            path.append('{0}'.format(item[p]))
-                        else:
-                            path.append(p)
-                    ans.append(self.get(path))
+            for num, query_filters in enumerate(filters):
+                if matches(item, query_filters):
+                    ans[num].append(item)
+
+        return ans
+
+    def _limit_listing(self, params, items):
+        offset = params.get('offset') or 0
+        limit = params.get('limit')
+        sort_by = params.get('sort_by')
+
+        if offset < 0 or (limit is not None and limit < 0):
+            self.module.fail_json(msg='limit and offset must not be negative')
+
+        if sort_by is None:
+            if limit is None:
+                return itertools.islice(items, offset, None)
+            return itertools.islice(items, offset, offset + limit)
+
+        reverse = params.get('sort_order') == 'desc'
+        key = sort_key(sort_by, reverse)
+        try:
+            if limit is None:
+                ans = sorted(items, key=key, reverse=reverse)
+            elif reverse:
+                ans = heapq.nlargest(offset + limit, items, key=key)
+            else:
+                ans = heapq.nsmallest(offset + limit, items, key=key)
+        except TypeError as e:
+            self.module.fail_json(msg='cannot sort by {0}: {1}'.format(sort_by, e))
+
+        return iter(ans[offset:])
+
+    def write_facts(self, items, output_file, compression=None):
+        """Streams items to output_file as NDJSON, one item per line.
+
+        The file is written to a temp file next to the destination and moved
+        into place once all items have been written.
+        """
+        output_file = os.path.abspath(output_file)
+        if compression == 'gzip':
+            opener = gzip.open
+        else:
+            opener = open
+
+        total = 0
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(output_file))
+            os.close(fd)
+            self.module.add_cleanup_file(tmp)
+            with opener(tmp, 'wb') as out:
+                for item in items:
+                    out.write(to_bytes(json.dumps(item)))
+                    out.write(b'\n')
+                    total += 1
+        except (IOError, OSError) as e:
+            self.module.fail_json(msg='failed to write {0}: {1}'.format(output_file, e))
+
+        self.module.atomic_move(tmp, output_file)
+
+        return {
+            'changed': False,
+            'total': total,
+            'output_file': output_file,
+            'checksum': self.module.sha256(output_file),
+        }
+
+
+def build_path(item, details_path, dynamic_path_indexes):
+    """Returns the details path for the given listing item.
+
+    Args:
+        details_path (list): The details path, with the field names of the
+            item at the dynamic_path_indexes.
+    """
+    ans = []
+    for num, p in enumerate(details_path):
+        if num in dynamic_path_indexes:
+            ans.append('{0}'.format(item[p]))
+        else:
+            ans.append(p)
+
+    return ans
+
+
+def summarize_stats(records, cache_hits=None):
+    """Returns a summary of the request records, in total and per endpoint.
+
+    Each endpoint also has the latency in milliseconds of each request, so
+    that percentiles can be worked out across tasks.
+    """
+    def new():
+        return {
+            'requests': 0, 'errors': 0, 'throttled': 0, 'retries': 0,
+            'bytes_in': 0, 'bytes_out': 0, 'elapsed': 0, 'cache_hits': 0,
+        }
+
+    total = new()
+    endpoints = {}
+    for x in records:
+        key = '{0} {1}'.format(x['method'], x['path'])
+        endpoint = endpoints.setdefault(key, dict(new(), latencies=[]))
+        endpoint['latencies'].append(int(round(x['elapsed'] * 1000)))
+        for ans in (total, endpoint):
+            ans['requests'] += 1
+            ans['errors'] += 1 if x['status'] != 200 else 0
+            ans['throttled'] += 1 if x['status'] == 429 else 0
+            ans['retries'] += x['retries']
+            ans['bytes_in'] += x['bytes_in']
+            ans['bytes_out'] += x['bytes_out']
+            ans['elapsed'] += x['elapsed']
+
+    for key, count in (cache_hits or {}).items():
+        endpoints.setdefault(key, dict(new(), latencies=[]))['cache_hits'] += count
+        total['cache_hits'] += count
+
+    total['endpoints'] = endpoints
+
+    return total
+
+
+def run(main):
+    """Runs a module's main().
+
+    If the PRISMACLOUD_PROFILE_DIR environment variable is set, main() is
+    run under cProfile, and its stats are written to a file in that
+    directory.
+    """
+    directory = os.environ.get('PRISMACLOUD_PROFILE_DIR')
+    if not directory:
+        return main()
+
+    import cProfile
+
+    name = os.path.splitext(os.path.basename(main.__code__.co_filename))[0]
+    profile = cProfile.Profile()
+    try:
+        # exit_json() and fail_json() exit by raising SystemExit.
+        return profile.runcall(main)
+    finally:
+        profile.dump_stats(profile_file(
+            directory, name, os.environ.get('PRISMACLOUD_PROFILE_LABEL'),
+            'module-{0}'.format(os.getpid())))
+
+
+def _filter_values(val):
+    """Returns the values of a filter param as a list.
+
+    The filter params take one value or a list of them, so they have no
+    type for Ansible to convert them to.  Numbers, such as an unquoted AWS
+    account ID, are converted to text here instead.
+    """
+    if not isinstance(val, (list, tuple, set, frozenset)):
+        val = [val, ]
+
+    return [
+        to_text(x) if isinstance(x, integer_types + (float, )) and not isinstance(x, bool) else x
+        for x in val
+    ]
+
+
+def equality_filter(val):
+    """Returns a (match, wanted) pair that tests for equality with val.
+
+    If val is a list, then matching any of the values is a match.  If the
+    item's own value is a list, then any of its values matching is a match.
+    """
+    wanted = frozenset(_filter_values(val))
+
+    def match(value):
+        try:
+            if isinstance(value, list):
+                return not wanted.isdisjoint(value)
+            return value in wanted
+        except TypeError:
+            return False
+
+    return match, wanted
+
+
+def primary_filter(val, search_type, ignore_case=False):
+    """Returns a (match, wanted) pair for the primary param.
+
+    All values given are folded into a single compiled regex, except for
+    case sensitive exact matches, which are a plain equality check.
+    """
+    if search_type == 'exact' and not ignore_case:
+        return equality_filter(val)
+
+    patterns = []
+    for x in _filter_values(val):
+        x = to_text(x)
+        if search_type == 'exact':
+            patterns.append(re.escape(x) + r'\Z')
+        elif search_type == 'substring':
+            patterns.append(re.escape(x))
+        elif search_type == 'glob':
+            patterns.append(fnmatch.translate(x))
+        else:
+            patterns.append(x)
+
+    regex = re.compile(
+        '|'.join('(?:{0})'.format(x) for x in patterns),
+        re.IGNORECASE if ignore_case else 0,
+    )
+    if search_type in ('exact', 'glob'):
+        func = regex.match
+    else:
+        func = regex.search
+
+    def match(value):
+        return isinstance(value, string_types) and func(value) is not None
+
+    return match, None
+
+
+def matches(item, filters):
+    """Returns True if the item passes all the filters."""
+    for field, match, _ in filters:
+        if not match(item.get(field)):
+            return False
+
+    return True
+
+
+SORT_RANKS = {
+    'severity': {'low': 0, 'medium': 1, 'high': 2},
+}
+
+
+def sort_key(field, reverse=False):
+    """Returns a sort key function for the given field.
 
-        return {'changed': False, 'listing': ans, 'total': len(ans)}
+    Fields with a natural ordering (such as severity) sort by rank instead of
+    alphabetically, and items missing the field always sort last.
+    """
+    ranks = SORT_RANKS.get(field, {})
+
+    def key(item):
+        val = item.get(field)
+        try:
+            val = ranks.get(val, val)
+        except TypeError:
+            # Unhashable values, such as lists, have no rank.
+            pass
+        return ((val is None) != reverse, val)
+
+    return key
+
+
+def project(items, fields):
+    """Yields only the given fields of each item."""
+    for item in items:
+        yield dict((field, item.get(field)) for field in fields)
+
+
+def _field_names(items, fields=None):
+    if fields:
+        return list(fields)
+
+    ans = []
+    seen = set()
+    for item in items:
+        for key in item:
+            if key not in seen:
+                seen.add(key)
+                ans.append(key)
+
+    return ans
+
+
+def to_columnar(items, fields=None):
+    """Converts a list of dicts to a field list and a list of rows.
+
+    If fields is not given, all keys present in any of the items are used,
+    in the order they are first seen.
+    """
+    fields = _field_names(items, fields)
+
+    return {
+        'fields': fields,
+        'rows': [[item.get(field) for field in fields] for item in items],
+    }
+
+
+def to_columns(items, fields=None):
+    """Converts a list of dicts to a dict of per-field value lists."""
+    fields = _field_names(items, fields)
+
+    return dict((field, [item.get(field) for item in items]) for field in fields)
 
 
 def search_type_spec():
-    return dict(default='exact', choices=['exact', 'substring', 'regex'])
+    return dict(default='exact', choices=['exact', 'substring', 'regex', 'glob'])
+
+
+def ignore_case_spec():
+    return dict(type='bool', default=False)
 
 
 def details_spec():
     return dict(type='bool', default=False)
 
 
+def output_file_spec():
+    return dict(type='path')
+
+
+def output_compression_spec():
+    return dict(default='none', choices=['none', 'gzip'])
+
+
+def result_format_spec():
+    return dict(default='list', choices=['list', 'columnar', 'columns'])
+
+
+def return_fields_spec():
+    return dict(type='list', elements='str')
+
+
+def limit_spec():
+    return dict(type='int')
+
+
+def offset_spec():
+    return dict(type='int', default=0)
+
+
+def sort_by_spec():
+    return dict()
+
+
+def sort_order_spec():
+    return dict(default='asc', choices=['asc', 'desc'])
+
+
+# Params that apply to the module as a whole, and so can't be set per query.
+MODULE_PARAMS = (
+    'source', 'snapshot_file',
+    'catalog_cache', 'cache_ttl', 'cache_dir', 'incremental', 'concurrency',
+)
+
+
+def queries_spec(argument_spec):
+    """Returns the spec for the queries param, built from the module's spec.
+
+    Each query may set any of the module's optional params.  Defaults are
+    dropped so that params a query doesn't set are taken from the module.
+    """
+    options = dict(query_name=dict(required=True))
+    for name, spec in argument_spec.items():
+        if spec.get('required') or name in MODULE_PARAMS:
+            continue
+        spec = dict(spec)
+        spec.pop('default', None)
+        options[name] = spec
+
+    return dict(type='list', elements='dict', options=options)
+
+
+def concurrency_spec():
+    return dict(type='int', default=4)
+
+
+def catalog_cache_spec():
+    return dict(type='bool', default=False)
+
+
+def cache_ttl_spec():
+    return dict(type='int', default=86400)
+
+
+def cache_dir_spec():
+    return dict(type='path', default='~/.ansible/cache/prismacloud')
+
+
+def incremental_spec():
+    return dict(type='bool', default=False)
+
+
+def source_spec():
+    return dict(default='api', choices=['api', 'snapshot'])
+
+
+def snapshot_file_spec():
+    return dict(type='path')
+
+
 def state_spec():
     return dict(
         default='present',
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import gzip
+import json
+import os
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import cache
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible.module_utils._text import to_text
+from ansible.module_utils.six import string_types
+
+
+# The fields of each type of object that are indexed.
+INDEXED_FIELDS = {
+    'cloud_account': ('id', 'name'),
+    'account_group': ('id', 'name'),
+    'policy': ('policyId', 'name'),
+    'compliance_standard': ('id', 'name'),
+    'compliance_requirement': ('id', 'name'),
+    'compliance_section': ('id', 'sectionId'),
+}
+
+
+def route(path):
+    """Returns the object type, the parent ID and the object ID for the path.
+
+    The object ID is None for a listing.  Returns None if the path is not
+    one that a snapshot can answer.
+    """
+    path = ['{0}'.format(x) for x in path]
+    size = len(path)
+
+    if path[0] == 'cloud':
+        if size == 2:
+            if path[1] == 'name':
+                return ('cloud_account', None, None)
+            elif path[1] == 'group':
+                return ('account_group', None, None)
+        elif size == 3:
+            if path[1] == 'group':
+                return ('account_group', None, path[2])
+            return ('cloud_account', None, path[2])
+    elif path[0] == 'policy':
+        if size == 1:
+            return ('policy', None, None)
+        elif size == 2:
+            return ('policy', None, path[1])
+    elif path[0] == 'compliance':
+        if size == 1:
+            return ('compliance_standard', None, None)
+        elif size == 2:
+            return ('compliance_standard', None, path[1])
+        elif size == 3:
+            if path[1] == 'requirement':
+                return ('compliance_requirement', None, path[2])
+            elif path[2] == 'requirement':
+                return ('compliance_requirement', path[1], None)
+            elif path[2] == 'section':
+                return ('compliance_section', path[1], None)
+
+    return None
+
+
+class Snapshot(object):
+    """Answers API requests from a tenant snapshot, as written by the
+    prismacloud_snapshot module.
+
+    The snapshot is split by type into an index cache alongside it, so only
+    the type being queried is loaded.  Each type has its listings (keyed by
+    parent ID), the details of each object by ID, and an index of the
+    positions in the listing of each value of the indexed fields.  The
+    index cache is rebuilt whenever the snapshot file changes.
+
+    This has the same interface as the connection, so it can be used in its
+    place.
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.index_cache = cache.DiskCache(self.path + '.index')
+        self._types = {}
+        self._indexes = {}
+
+    def version(self):
+        st = os.stat(self.path)
+        return [st.st_size, st.st_mtime]
+
+    def load(self, kind):
+        """Returns the indexed data for the given type of object."""
+        if kind in self._types:
+            return self._types[kind]
+
+        try:
+            version = self.version()
+        except (IOError, OSError) as e:
+            raise errors.PrismaCloudError('failed to read snapshot {0}: {1}'.format(self.path, e))
+
+        data = self.index_cache.get([kind, ])
+        if data is None or data['version'] != version:
+            self.build_indexes(version)
+        else:
+            self._add(kind, data)
+
+        return self._types[kind]
+
+    def _add(self, kind, data):
+        self._types[kind] = data
+        for parent, listing in data['listings'].items():
+            for field, index in data['indexes'][parent].items():
+                self._indexes[(id(listing), field)] = index
+
+    def build_indexes(self, version):
+        """Reads the snapshot, saving the indexed data of every type."""
+        types = {}
+        for kind in INDEXED_FIELDS:
+            types[kind] = {
+                'version': version,
+                'listings': {},
+                'details': {},
+                'indexes': {},
+            }
+
+        try:
+            with gzip.open(self.path, 'rb') as fd:
+                for line in fd:
+                    record = json.loads(to_text(line))
+                    data = types.get(record['type'])
+                    if data is None:
+                        continue
+                    parent = '' if record['parent'] is None else '{0}'.format(record['parent'])
+                    data['listings'].setdefault(parent, []).append(record['item'])
+                    if record['details'] is not None:
+                        data['details']['{0}'.format(record['id'])] = record['details']
+        except (IOError, OSError, ValueError, KeyError) as e:
+            raise errors.PrismaCloudError('failed to read snapshot {0}: {1}'.format(self.path, e))
+
+        for kind, data in types.items():
+            for parent, listing in data['listings'].items():
+                data['indexes'][parent] = build_index(listing, INDEXED_FIELDS[kind])
+            self.index_cache.set([kind, ], data)
+            self._add(kind, data)
+
+    def index(self, listing, field):
+        """Returns the prebuilt index of field for the listing, if any."""
+        return self._indexes.get((id(listing), field))
+
+    def tenant(self):
+        return 'snapshot:{0}'.format(self.path)
+
+    def send_request(self, method, path, query=None, data=None):
+        if method != 'GET':
+            raise errors.PrismaCloudError('{0} is not supported when the source is a snapshot'.format(method))
+
+        where = route(path)
+        if where is None:
+            raise errors.PrismaCloudError('/{0} is not in the snapshot'.format('/'.join('{0}'.format(x) for x in path)))
+
+        kind, parent, the_id = where
+        data = self.load(kind)
+        if the_id is None:
+            return data['listings'].get(parent or '', [])
+        elif the_id not in data['details']:
+            raise errors.ObjectNotFoundError('{0} {1} is not in the snapshot'.format(kind, the_id))
+
+        return data['details'][the_id]
+
+    def send_requests(self, requests, workers=1, invocation=None):
+        ans = {'results': [], 'records': [], 'invocation': None}
+        for req in requests:
+            try:
+                ans['results'].append({'response': self.send_request(*req)})
+            except errors.PrismaCloudError as e:
+                ans['results'].append({
+                    'error': type(e).__name__,
+                    'message': e.args[0],
+                    'errlist': e.errlist,
+                })
+
+        return ans
+
+
+def build_index(listing, fields):
+    """Returns a dict of field to the positions in listing of each value."""
+    ans = {}
+    for field in fields:
+        index = {}
+        for num, item in enumerate(listing):
+            val = item.get(field)
+            # JSON only has string keys, so only those can be indexed.
+            if isinstance(val, string_types):
+                index.setdefault(val, []).append(num)
+        ans[field] = index
+
+    return ans
@@ -33,14 +33,40 @@ author:
 version_added: "2.9"
 extends_documentation_fragment:
     - paloaltonetworks.prismacloud.fragments.facts
+    - paloaltonetworks.prismacloud.fragments.snapshot
 options:
     name:
         description:
             - Filter on account groups with this name.
             - Primary param.
+            - May also be a list, to match any of the values given.
+        type: raw
     id:
         description:
             - Specific account group ID.
+            - May also be a list, to match any of the values given.
+        type: raw
+    expand_accounts:
+        description:
+            - Add the cloud accounts in each account group to it, as
+              C(cloudAccounts).
+            - The accounts are joined from a single cloud account listing.
+        type: bool
+        default: false
+    account_details:
+        description:
+            - With I(expand_accounts=true), add the details of each cloud
+              account instead of its listing entry.
+            - Each account's details are only retrieved once, even if it is
+              in more than one account group.
+        type: bool
+        default: false
+    concurrency:
+        description:
+            - The max number of requests to have in flight at once when
+              retrieving account details.
+        type: int
+        default: 4
 '''
 
 EXAMPLES = '''
@@ -50,6 +76,16 @@ EXAMPLES = '''
 
 - debug:
     msg: '{{ ans.listing }}'
+
+- name: get the details of every cloud account in each account group
+  prismacloud_account_group_facts:
+    expand_accounts: true
+    account_details: true
+    concurrency: 8
+  register: ans
+
+- debug:
+    msg: '{{ ans.listing[0].cloudAccounts | map(attribute="cloudType") | list }}'
 '''
 
 RETURN = '''
@@ -58,9 +94,43 @@ total:
     returned: success
     type: int
 listing:
-    description: list of results
+    description:
+        - List of results.
+        - If result_format is C(columnar), this is instead a dict with the
+          C(fields) returned and a C(rows) list with one list of values per
+          result.
+        - If result_format is C(columns), this is instead a dict of field
+          names to the list of values for that field.
+        - With I(expand_accounts=true), each account group also has a
+          C(cloudAccounts) list of its cloud accounts.
+    returned: when output_file is not specified
+    type: raw
+output_file:
+    description: absolute path of the file the results were written to
+    returned: when output_file is specified
+    type: str
+checksum:
+    description: sha256 checksum of the output file
+    returned: when output_file is specified
+    type: str
+queries:
+    description:
+        - The results of each query, keyed by query name.
+        - Each result has the same keys as the results of a single query.
+    returned: when queries is specified
+    type: dict
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
     returned: success
-    type: list
+    type: dict
 '''
 
 
@@ -68,30 +138,132 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
 
 
+class AccountExpander(object):
+    """Adds the cloud accounts of each account group to it.
+
+    The cloud account listing is retrieved once and indexed by ID.  If the
+    account details are wanted, they are retrieved concurrently a batch of
+    groups at a time, and kept so that each account is only retrieved once.
+    """
+    def __init__(self, client, concurrency):
+        self.client = client
+        self.concurrency = concurrency
+        self.accounts = None
+        self.details = {}
+        self.listing = None
+        self.groups = None
+
+    def get_listing(self):
+        """Returns the account group listing, only retrieving it once."""
+        if self.listing is None:
+            self.listing = self.client.get(['cloud', 'group'])
+
+        return self.listing
+
+    def account_ids(self, item):
+        """Returns the IDs of the cloud accounts in the account group."""
+        if 'accountIds' not in item and 'accounts' not in item:
+            # Only the name and ID are returned when details is false.
+            if self.groups is None:
+                self.groups = dict((x['id'], x) for x in self.get_listing())
+            item = self.groups.get(item['id'], {})
+
+        if item.get('accountIds') is not None:
+            return item['accountIds']
+
+        return [x['id'] for x in item.get('accounts') or []]
+
+    def expand(self, params, items):
+        if not params.get('expand_accounts'):
+            return items
+
+        if self.accounts is None:
+            self.accounts = dict((x['id'], x) for x in self.client.get(['cloud', 'name']))
+
+        return self._expand(items, params.get('account_details'))
+
+    def _expand(self, items, account_details):
+        size = self.concurrency * pc.REQUESTS_PER_WORKER
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == size:
+                for x in self._expand_batch(batch, account_details):
+                    yield x
+                batch = []
+
+        for x in self._expand_batch(batch, account_details):
+            yield x
+
+    def _expand_batch(self, batch, account_details):
+        if account_details:
+            wanted = []
+            seen = set()
+            for item in batch:
+                for x in self.account_ids(item):
+                    if x in self.accounts and x not in self.details and x not in seen:
+                        seen.add(x)
+                        wanted.append(x)
+            paths = [['cloud', self.accounts[x]['cloudType'], x] for x in wanted]
+            for account_id, obj in zip(wanted, self.client.get_many(paths, self.concurrency)):
+                self.details[account_id] = obj
+
+        for item in batch:
+            group = dict(item)
+            group['cloudAccounts'] = []
+            for x in self.account_ids(item):
+                # Accounts deleted since the group was retrieved are dropped.
+                obj = self.details.get(x) if account_details else self.accounts.get(x)
+                if obj is not None:
+                    group['cloudAccounts'].append(obj)
+            yield group
+
+
 def main():
+    argument_spec = dict(
+        name=dict(type='raw'),
+        id=dict(type='raw'),
+        details=pc.details_spec(),
+        search_type=pc.search_type_spec(),
+        ignore_case=pc.ignore_case_spec(),
+        output_file=pc.output_file_spec(),
+        output_compression=pc.output_compression_spec(),
+        result_format=pc.result_format_spec(),
+        return_fields=pc.return_fields_spec(),
+        limit=pc.limit_spec(),
+        offset=pc.offset_spec(),
+        sort_by=pc.sort_by_spec(),
+        sort_order=pc.sort_order_spec(),
+        source=pc.source_spec(),
+        snapshot_file=pc.snapshot_file_spec(),
+        expand_accounts=dict(type='bool', default=False),
+        account_details=dict(type='bool', default=False),
+        concurrency=pc.concurrency_spec(),
+    )
+    argument_spec['queries'] = pc.queries_spec(argument_spec)
+
     module = AnsibleModule(
-        argument_spec=dict(
-            name=dict(),
-            id=dict(),
-            details=pc.details_spec(),
-            search_type=pc.search_type_spec(),
-        ),
+        argument_spec=argument_spec,
         supports_check_mode=False,
     )
 
-    client = pc.PrismaCloudRequest(module)
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1')
 
-    path = ['cloud', 'group']
-    listing = client.get(path)
+    client = pc.PrismaCloudRequest(module)
+    expander = AccountExpander(client, module.params['concurrency'])
 
     results = client.get_facts_from(
-        listing,
+        expander.get_listing,
         'name', ['id', ],
         ['cloud', 'group', 'id'], (2, ),
+        id_field='id',
+        expand=expander.expand,
+        unique_primary=True,
     )
 
-    module.exit_json(**results)
+    client.exit_json(**results)
 
 
 if __name__ == '__main__':
-    main()
+    pc.run(main)
@@ -101,6 +101,18 @@ after:
     description: the config after this module is invoked
     returned: success
     type: complex
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
+    returned: success
+    type: dict
 '''
 
 
@@ -151,7 +163,7 @@ def main():
     # Retrieve obj details.
     if module.params['cloudAccount']['accountId'] is not None:
         try:
-            obj = client.get(['cloud', 'azure', module.params['cloudAccount']['accountId']])
+            obj = client.get(['cloud', 'azure', module.params['cloudAccount']['accountId']], raise_not_found=True)
         except errors.ObjectNotFoundError:
             pass
     else:
@@ -190,7 +202,7 @@ def main():
         if obj is None:
             results['changed'] = True
             if not module.check_mode:
-                client.post(['cloud', 'azure'], req_obj)
+                client.post(['cloud', 'azure'], data=req_obj)
                 req_obj['cloudAccount']['accountId'] = identify(client, module.params['cloudAccount']['name'])
         else:
             if not req_obj['cloudAccount']['accountId']:
@@ -216,8 +228,8 @@ def main():
                 client.delete(['cloud', 'azure', obj['cloudAccount']['accountId']])
 
     # Done.
-    module.exit_json(**results)
+    client.exit_json(**results)
 
 
 if __name__ == '__main__':
-    main()
+    pc.run(main)
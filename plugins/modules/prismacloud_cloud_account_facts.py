@@ -33,17 +33,24 @@ author:
 version_added: "2.9"
 extends_documentation_fragment:
     - paloaltonetworks.prismacloud.fragments.facts
+    - paloaltonetworks.prismacloud.fragments.snapshot
 options:
     name:
         description:
             - Filter on cloud accounts with this name.
             - Primary param.
+            - May also be a list, to match any of the values given.
+        type: raw
     id:
         description:
             - Specific account group ID.
+            - May also be a list, to match any of the values given.
+        type: raw
     cloudType:
         description:
             - Filter on cloud accounts with this cloud type.
+            - May also be a list, to match any of the values given.
+        type: raw
         choices:
             - aws
             - azure
@@ -60,6 +67,13 @@ EXAMPLES = '''
 
 - debug:
     msg: '{{ ans.listing }}'
+
+- name: get several cloud accounts at once
+  prismacloud_cloud_account_facts:
+    id:
+      - '123456789012'
+      - '210987654321'
+  register: ans
 '''
 
 RETURN = '''
@@ -68,9 +82,41 @@ total:
     returned: success
     type: int
 listing:
-    description: list of results
+    description:
+        - List of results.
+        - If result_format is C(columnar), this is instead a dict with the
+          C(fields) returned and a C(rows) list with one list of values per
+          result.
+        - If result_format is C(columns), this is instead a dict of field
+          names to the list of values for that field.
+    returned: when output_file is not specified
+    type: raw
+output_file:
+    description: absolute path of the file the results were written to
+    returned: when output_file is specified
+    type: str
+checksum:
+    description: sha256 checksum of the output file
+    returned: when output_file is specified
+    type: str
+queries:
+    description:
+        - The results of each query, keyed by query name.
+        - Each result has the same keys as the results of a single query.
+    returned: when queries is specified
+    type: dict
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
     returned: success
-    type: list
+    type: dict
 '''
 
 
@@ -79,30 +125,46 @@ from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils impor
 
 
 def main():
+    argument_spec = dict(
+        name=dict(type='raw'),
+        id=dict(type='raw'),
+        cloudType=dict(type='raw', choices=['aws', 'azure', 'gcp', 'alibaba_cloud']),
+        details=pc.details_spec(),
+        search_type=pc.search_type_spec(),
+        ignore_case=pc.ignore_case_spec(),
+        output_file=pc.output_file_spec(),
+        output_compression=pc.output_compression_spec(),
+        result_format=pc.result_format_spec(),
+        return_fields=pc.return_fields_spec(),
+        limit=pc.limit_spec(),
+        offset=pc.offset_spec(),
+        sort_by=pc.sort_by_spec(),
+        sort_order=pc.sort_order_spec(),
+        source=pc.source_spec(),
+        snapshot_file=pc.snapshot_file_spec(),
+    )
+    argument_spec['queries'] = pc.queries_spec(argument_spec)
+
     module = AnsibleModule(
-        argument_spec=dict(
-            name=dict(),
-            id=dict(),
-            cloudType=dict(choices=['aws', 'azure', 'gcp', 'alibaba_cloud']),
-            details=pc.details_spec(),
-            search_type=pc.search_type_spec(),
-        ),
+        argument_spec=argument_spec,
         supports_check_mode=False,
     )
 
     client = pc.PrismaCloudRequest(module)
 
     path = ['cloud', 'name']
-    listing = client.get(path)
 
     results = client.get_facts_from(
-        listing,
+        lambda: client.get(path),
         'name', ['cloudType', 'id'],
         ['cloud', 'cloudType', 'id'], (1, 2),
+        id_field='id',
+        # The details have the accountId, not the id of the listing.
+        details_have_fields=False,
     )
 
-    module.exit_json(**results)
+    client.exit_json(**results)
 
 
 if __name__ == '__main__':
-    main()
+    pc.run(main)
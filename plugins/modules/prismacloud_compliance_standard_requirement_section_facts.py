@@ -33,6 +33,8 @@ author:
 version_added: "2.9"
 extends_documentation_fragment:
     - paloaltonetworks.prismacloud.fragments.facts_without_details
+    - paloaltonetworks.prismacloud.fragments.catalog_cache
+    - paloaltonetworks.prismacloud.fragments.snapshot
 options:
     requirementId:
         description:
@@ -42,6 +44,8 @@ options:
         description:
             - Filter on the given section ID.
             - Primary param.
+            - May also be a list, to match any of the values given.
+        type: raw
     systemDefault:
         description:
             - Filter on a specific system default setting.
@@ -63,9 +67,41 @@ total:
     returned: success
     type: int
 listing:
-    description: list of results
+    description:
+        - List of results.
+        - If result_format is C(columnar), this is instead a dict with the
+          C(fields) returned and a C(rows) list with one list of values per
+          result.
+        - If result_format is C(columns), this is instead a dict of field
+          names to the list of values for that field.
+    returned: when output_file is not specified
+    type: raw
+output_file:
+    description: absolute path of the file the results were written to
+    returned: when output_file is specified
+    type: str
+checksum:
+    description: sha256 checksum of the output file
+    returned: when output_file is specified
+    type: str
+queries:
+    description:
+        - The results of each query, keyed by query name.
+        - Each result has the same keys as the results of a single query.
+    returned: when queries is specified
+    type: dict
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
     returned: success
-    type: list
+    type: dict
 '''
 
 
@@ -74,28 +110,45 @@ from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils impor
 
 
 def main():
+    argument_spec = dict(
+        requirementId=dict(required=True),
+        sectionId=dict(type='raw'),
+        systemDefault=dict(type='bool'),
+        search_type=pc.search_type_spec(),
+        ignore_case=pc.ignore_case_spec(),
+        output_file=pc.output_file_spec(),
+        output_compression=pc.output_compression_spec(),
+        result_format=pc.result_format_spec(),
+        return_fields=pc.return_fields_spec(),
+        limit=pc.limit_spec(),
+        offset=pc.offset_spec(),
+        sort_by=pc.sort_by_spec(),
+        sort_order=pc.sort_order_spec(),
+        catalog_cache=pc.catalog_cache_spec(),
+        cache_ttl=pc.cache_ttl_spec(),
+        cache_dir=pc.cache_dir_spec(),
+        source=pc.source_spec(),
+        snapshot_file=pc.snapshot_file_spec(),
+    )
+    argument_spec['queries'] = pc.queries_spec(argument_spec)
+
     module = AnsibleModule(
-        argument_spec=dict(
-            requirementId=dict(required=True),
-            sectionId=dict(),
-            systemDefault=dict(type='bool'),
-            search_type=pc.search_type_spec(),
-        ),
+        argument_spec=argument_spec,
         supports_check_mode=False,
     )
 
     client = pc.PrismaCloudRequest(module)
 
     path = ['compliance', module.params['requirementId'], 'section']
-    listing = client.get(path)
+    listing = client.get_catalog(path)
 
     results = client.get_facts_from(
         listing,
         'sectionId', ['systemDefault', ],
     )
 
-    module.exit_json(**results)
+    client.exit_json(**results)
 
 
 if __name__ == '__main__':
-    main()
+    pc.run(main)
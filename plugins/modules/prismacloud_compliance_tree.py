@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: prismacloud_compliance_tree
+short_description: Retrieves compliance standards with their requirements and sections.
+description:
+    - This module retrieves compliance standards, the requirements of each
+      standard, and the sections of each requirement, as a single tree.
+    - Requirements and sections are retrieved concurrently.
+author:
+    - Garfield Lee Freeman (@shinmog)
+version_added: "2.9"
+extends_documentation_fragment:
+    - paloaltonetworks.prismacloud.fragments.snapshot
+notes:
+    - As this is a facts module, check mode is not supported.
+options:
+    name:
+        description:
+            - Only include compliance standards with this name.
+            - May also be a list, to match any of the values given.
+        type: raw
+    id:
+        description:
+            - Only include the compliance standards with this ID.
+            - May also be a list, to match any of the values given.
+        type: raw
+    cloudType:
+        description:
+            - Only include compliance standards for any of the specified cloud
+              types.
+        type: list
+        elements: str
+    systemDefault:
+        description:
+            - Filter on a specific system default setting.
+        type: bool
+    search_type:
+        description:
+            - How to interpret the value given for I(name).
+        choices:
+            - exact
+            - substring
+            - regex
+            - glob
+        default: 'exact'
+    ignore_case:
+        description:
+            - Match I(name) without regard to case.
+        type: bool
+        default: false
+    concurrency:
+        description:
+            - The max number of requests to have in flight at once.
+        type: int
+        default: 4
+    output_file:
+        description:
+            - Write the tree to this file on the controller instead of
+              returning it.
+            - The tree is written as newline delimited JSON, one compliance
+              standard per line, as each standard is completed.
+            - When specified, only the totals, the output file and its
+              checksum are returned.
+        type: path
+    output_compression:
+        description:
+            - Compression to use for I(output_file).
+        choices:
+            - none
+            - gzip
+        default: 'none'
+'''
+
+EXAMPLES = '''
+- name: get the full compliance tree
+  prismacloud_compliance_tree:
+    concurrency: 8
+  register: ans
+
+- debug:
+    msg: '{{ ans.tree[0].requirements[0].sections }}'
+
+- name: snapshot all system default compliance standards to a file
+  prismacloud_compliance_tree:
+    systemDefault: true
+    output_file: '/tmp/compliance.json.gz'
+    output_compression: 'gzip'
+'''
+
+RETURN = '''
+total:
+    description: number of compliance standards in the tree
+    returned: success
+    type: int
+total_requirements:
+    description: number of requirements in the tree
+    returned: success
+    type: int
+total_sections:
+    description: number of sections in the tree
+    returned: success
+    type: int
+tree:
+    description:
+        - The compliance standards.
+        - Each standard has a C(requirements) list, and each requirement
+          has a C(sections) list.
+    returned: when output_file is not specified
+    type: list
+output_file:
+    description: absolute path of the file the tree was written to
+    returned: when output_file is specified
+    type: str
+checksum:
+    description: sha256 checksum of the output file
+    returned: when output_file is specified
+    type: str
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
+    returned: success
+    type: dict
+'''
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+
+
+def build_tree(client, standards, concurrency, totals):
+    """Yields each compliance standard with its requirements and sections.
+
+    Standards are done a few at a time, so that there is enough work to keep
+    every request slot busy while only a few branches of the tree are ever
+    held in memory.
+    """
+    size = concurrency * pc.REQUESTS_PER_WORKER
+    for num in range(0, len(standards), size):
+        batch = standards[num:num + size]
+
+        paths = [['compliance', x['id'], 'requirement'] for x in batch]
+        for standard, requirements in zip(batch, client.get_many(paths, concurrency)):
+            standard['requirements'] = requirements or []
+
+        requirements = [x for standard in batch for x in standard['requirements']]
+        paths = [['compliance', x['id'], 'section'] for x in requirements]
+        for requirement, sections in zip(requirements, client.get_many(paths, concurrency)):
+            requirement['sections'] = sections or []
+            totals['sections'] += len(requirement['sections'])
+
+        totals['requirements'] += len(requirements)
+        for standard in batch:
+            yield standard
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            name=dict(type='raw'),
+            id=dict(type='raw'),
+            cloudType=dict(type='list', elements='str'),
+            systemDefault=dict(type='bool'),
+            search_type=pc.search_type_spec(),
+            ignore_case=pc.ignore_case_spec(),
+            concurrency=pc.concurrency_spec(),
+            output_file=pc.output_file_spec(),
+            output_compression=pc.output_compression_spec(),
+            source=pc.source_spec(),
+            snapshot_file=pc.snapshot_file_spec(),
+        ),
+        supports_check_mode=False,
+    )
+
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1')
+
+    client = pc.PrismaCloudRequest(module)
+
+    path = ['compliance', ]
+    standards = client.filter_listing(
+        client.get(path),
+        'name', ['id', 'cloudType', 'systemDefault'],
+    )
+
+    totals = {'requirements': 0, 'sections': 0}
+    tree = build_tree(client, standards, module.params['concurrency'], totals)
+
+    if module.params['output_file'] is not None:
+        results = client.write_facts(
+            tree, module.params['output_file'], module.params['output_compression'])
+    else:
+        tree = list(tree)
+        results = {'changed': False, 'tree': tree, 'total': len(tree)}
+
+    results['total_requirements'] = totals['requirements']
+    results['total_sections'] = totals['sections']
+
+    client.exit_json(**results)
+
+
+if __name__ == '__main__':
+    pc.run(main)
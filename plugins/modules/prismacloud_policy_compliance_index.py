@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: prismacloud_policy_compliance_index
+short_description: Maps policies to compliance sections, and back.
+description:
+    - This module returns which compliance standards, requirements and
+      sections each policy maps to, and which policies map to each
+      compliance section.
+    - The mappings come from the C(complianceMetadata) in the details of
+      every policy.  Policy details are kept in I(cache_dir), and only the
+      details of policies added or modified since the last run are
+      retrieved, concurrently.
+    - The index itself is also kept in I(cache_dir), and is reused as is if
+      no policy has changed since it was built.
+author:
+    - Garfield Lee Freeman (@shinmog)
+version_added: "2.9"
+notes:
+    - As this is a facts module, check mode is not supported.
+options:
+    policyId:
+        description:
+            - Only include these policies.
+            - May also be a list, to match any of the values given.
+        type: raw
+    standardName:
+        description:
+            - Only include the sections of these compliance standards.
+            - May also be a list, to match any of the values given.
+        type: raw
+    requirementId:
+        description:
+            - Only include the sections of these compliance requirements.
+            - May also be a list, to match any of the values given.
+        type: raw
+    sectionId:
+        description:
+            - Only include these compliance sections.
+            - May also be a list, to match any of the values given.
+        type: raw
+    complianceId:
+        description:
+            - Only include the compliance sections with these IDs.
+            - May also be a list, to match any of the values given.
+        type: raw
+    concurrency:
+        description:
+            - The max number of policy details to retrieve at once.
+        type: int
+        default: 4
+    cache_dir:
+        description:
+            - The cache directory on the controller.
+            - Each tenant is cached separately under this directory.
+        type: path
+        default: '~/.ansible/cache/prismacloud'
+'''
+
+EXAMPLES = '''
+- name: which policies map to CIS section 1.1
+  prismacloud_policy_compliance_index:
+    standardName: 'CIS v1.2.0 (AWS)'
+    sectionId: '1.1'
+  register: ans
+
+- debug:
+    msg: '{{ ans.compliance_to_policy | dict2items | map(attribute="value.policyIds") | flatten }}'
+
+- name: which compliance sections a policy maps to
+  prismacloud_policy_compliance_index:
+    policyId: '{{ policy_id }}'
+  register: ans
+
+- debug:
+    msg: '{{ ans.policy_to_compliance[policy_id] }}'
+'''
+
+RETURN = '''
+policy_to_compliance:
+    description:
+        - The compliance sections each policy maps to, keyed by policy ID.
+        - Each section has its C(complianceId), C(standardName),
+          C(requirementId), C(requirementName) and C(sectionId).
+    returned: success
+    type: dict
+compliance_to_policy:
+    description:
+        - The policies each compliance section is mapped to, keyed by the
+          section's compliance ID.
+        - Each section has its C(standardName), C(requirementId),
+          C(requirementName), C(sectionId) and the C(policyIds) mapped
+          to it.
+    returned: success
+    type: dict
+total_policies:
+    description: number of policies in policy_to_compliance
+    returned: success
+    type: int
+total_sections:
+    description: number of sections in compliance_to_policy
+    returned: success
+    type: int
+sync:
+    description:
+        - Number of policies whose details were added, updated or removed
+          since the last run, and the number unchanged.
+        - The policy details are shared with
+          M(paloaltonetworks.prismacloud.prismacloud_policy_facts) when
+          it is run with I(incremental=true).
+    returned: success
+    type: dict
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
+    returned: success
+    type: dict
+'''
+
+import hashlib
+import json
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_bytes
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+
+
+# The complianceMetadata fields kept for each section.
+SECTION_FIELDS = ('complianceId', 'standardName', 'requirementId', 'requirementName', 'sectionId')
+
+
+def fingerprint(listing):
+    """Returns a hash of the ID and last modified time of each policy."""
+    data = sorted([x['policyId'], x.get('lastModifiedOn')] for x in listing)
+    return hashlib.sha1(to_bytes(json.dumps(data))).hexdigest()
+
+
+def build_mappings(client, listing):
+    """Returns a list of [policyId, section] for each compliance section
+    that each policy maps to."""
+    details_path = ['policy', 'policyId']
+    client.sync_details(listing, 'policyId', details_path, (1, ))
+
+    ans = []
+    for item in listing:
+        try:
+            details = client.get_details(pc.build_path(item, details_path, (1, )))
+        except errors.ObjectNotFoundError:
+            # Deleted since the listing was retrieved.
+            continue
+        for x in details.get('complianceMetadata') or []:
+            ans.append([item['policyId'], dict((k, x.get(k)) for k in SECTION_FIELDS)])
+
+    return ans
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            policyId=dict(type='raw'),
+            standardName=dict(type='raw'),
+            requirementId=dict(type='raw'),
+            sectionId=dict(type='raw'),
+            complianceId=dict(type='raw'),
+            concurrency=pc.concurrency_spec(),
+            cache_dir=pc.cache_dir_spec(),
+        ),
+        supports_check_mode=False,
+    )
+
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1')
+
+    client = pc.PrismaCloudRequest(module)
+    cache = client.disk_cache()
+
+    listing = client.get(['policy', ])
+    version = fingerprint(listing)
+    index = cache.get(['policy_compliance_index', ])
+    if index is not None and index['version'] == version:
+        sync = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': len(listing)}
+    else:
+        index = {'version': version, 'mappings': build_mappings(client, listing)}
+        cache.set(['policy_compliance_index', ], index)
+        sync = client.synced
+
+    policy_filter = None
+    if module.params['policyId'] is not None:
+        policy_filter, _ = pc.equality_filter(module.params['policyId'])
+
+    section_filters = []
+    for field in ('standardName', 'requirementId', 'sectionId', 'complianceId'):
+        if module.params[field] is not None:
+            match, _ = pc.equality_filter(module.params[field])
+            section_filters.append((field, match, None))
+
+    policy_to_compliance = {}
+    compliance_to_policy = {}
+    for policy_id, section in index['mappings']:
+        if policy_filter is not None and not policy_filter(policy_id):
+            continue
+        if not pc.matches(section, section_filters):
+            continue
+        policy_to_compliance.setdefault(policy_id, []).append(section)
+        if section['complianceId'] not in compliance_to_policy:
+            entry = dict((k, v) for k, v in section.items() if k != 'complianceId')
+            entry['policyIds'] = []
+            compliance_to_policy[section['complianceId']] = entry
+        compliance_to_policy[section['complianceId']]['policyIds'].append(policy_id)
+
+    client.exit_json(
+        changed=False,
+        policy_to_compliance=policy_to_compliance,
+        compliance_to_policy=compliance_to_policy,
+        total_policies=len(policy_to_compliance),
+        total_sections=len(compliance_to_policy),
+        sync=sync,
+    )
+
+
+if __name__ == '__main__':
+    pc.run(main)
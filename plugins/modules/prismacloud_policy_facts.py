@@ -33,17 +33,25 @@ author:
 version_added: "2.9"
 extends_documentation_fragment:
     - paloaltonetworks.prismacloud.fragments.facts
+    - paloaltonetworks.prismacloud.fragments.catalog_cache
+    - paloaltonetworks.prismacloud.fragments.snapshot
 options:
     name:
         description:
             - Filter on account groups with this name.
             - Primary param.
+            - May also be a list, to match any of the values given.
+        type: raw
     policyId:
         description:
             - Specific policy ID.
+            - May also be a list, to match any of the values given.
+        type: raw
     policyType:
         description:
             - Filter on policy type.
+            - May also be a list, to match any of the values given.
+        type: raw
         choices:
             - config
             - audit_event
@@ -55,13 +63,34 @@ options:
     cloudType:
         description:
             - Filter on a specific cloud type.
+            - May also be a list, to match any of the values given.
+        type: raw
     severity:
         description:
             - Filter on a specific severity.
+            - May also be a list, to match any of the values given.
+        type: raw
         choices:
             - low
             - medium
             - high
+    incremental:
+        description:
+            - Keep a snapshot of the details of all policies in I(cache_dir),
+              and only retrieve the details of policies that were added or
+              modified (per their C(lastModifiedOn)) since the last sync.
+            - Policies that no longer exist are removed from the snapshot.
+            - The policy listing itself is still retrieved each time, as that
+              is how changes are detected.
+            - Only used when I(details=true), or a query sets it.
+        type: bool
+        default: false
+    concurrency:
+        description:
+            - The max number of policy details to retrieve at once when
+              syncing with I(incremental=true).
+        type: int
+        default: 4
 '''
 
 EXAMPLES = '''
@@ -71,6 +100,50 @@ EXAMPLES = '''
 
 - debug:
     msg: '{{ ans.listing }}'
+
+- name: get the ten highest severity aws policies
+  prismacloud_policy_facts:
+    cloudType: 'aws'
+    sort_by: 'severity'
+    sort_order: 'desc'
+    limit: 10
+    details: true
+
+- name: get several policy breakdowns from one policy listing
+  prismacloud_policy_facts:
+    return_fields: ['policyId', 'name']
+    queries:
+      - query_name: 'high'
+        severity: 'high'
+      - query_name: 'aws_custom'
+        cloudType: 'aws'
+        systemDefault: false
+      - query_name: 'iam'
+        name: '*IAM*'
+        search_type: 'glob'
+  register: ans
+
+- debug:
+    msg: '{{ ans.queries.high.listing }}'
+
+- name: get all policy details, only retrieving what changed since last time
+  prismacloud_policy_facts:
+    details: true
+    incremental: true
+  register: ans
+
+- name: dump all policy details to a file
+  prismacloud_policy_facts:
+    details: true
+    output_file: '/tmp/policies.json.gz'
+    output_compression: 'gzip'
+
+- name: get high severity policies from last night's snapshot
+  prismacloud_policy_facts:
+    severity: 'high'
+    details: true
+    source: 'snapshot'
+    snapshot_file: '/var/lib/prismacloud/snapshot.json.gz'
 '''
 
 RETURN = '''
@@ -79,9 +152,47 @@ total:
     returned: success
     type: int
 listing:
-    description: list of results
+    description:
+        - List of results.
+        - If result_format is C(columnar), this is instead a dict with the
+          C(fields) returned and a C(rows) list with one list of values per
+          result.
+        - If result_format is C(columns), this is instead a dict of field
+          names to the list of values for that field.
+    returned: when output_file is not specified
+    type: raw
+output_file:
+    description: absolute path of the file the results were written to
+    returned: when output_file is specified
+    type: str
+checksum:
+    description: sha256 checksum of the output file
+    returned: when output_file is specified
+    type: str
+sync:
+    description:
+        - Counts of the policies C(added), C(updated), C(removed) and
+          C(unchanged) in the local snapshot by this sync.
+    returned: when incremental and details are true and the listing was retrieved
+    type: dict
+queries:
+    description:
+        - The results of each query, keyed by query name.
+        - Each result has the same keys as the results of a single query.
+    returned: when queries is specified
+    type: dict
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
     returned: success
-    type: list
+    type: dict
 '''
 
 
@@ -90,33 +201,65 @@ from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils impor
 
 
 def main():
+    argument_spec = dict(
+        name=dict(type='raw'),
+        policyId=dict(type='raw'),
+        policyType=dict(type='raw', choices=['config', 'audit_event', 'network']),
+        systemDefault=dict(type='bool'),
+        cloudType=dict(type='raw'),
+        severity=dict(type='raw', choices=['low', 'medium', 'high']),
+        details=pc.details_spec(),
+        search_type=pc.search_type_spec(),
+        ignore_case=pc.ignore_case_spec(),
+        output_file=pc.output_file_spec(),
+        output_compression=pc.output_compression_spec(),
+        result_format=pc.result_format_spec(),
+        return_fields=pc.return_fields_spec(),
+        limit=pc.limit_spec(),
+        offset=pc.offset_spec(),
+        sort_by=pc.sort_by_spec(),
+        sort_order=pc.sort_order_spec(),
+        catalog_cache=pc.catalog_cache_spec(),
+        cache_ttl=pc.cache_ttl_spec(),
+        cache_dir=pc.cache_dir_spec(),
+        incremental=pc.incremental_spec(),
+        concurrency=pc.concurrency_spec(),
+        source=pc.source_spec(),
+        snapshot_file=pc.snapshot_file_spec(),
+    )
+    argument_spec['queries'] = pc.queries_spec(argument_spec)
+
     module = AnsibleModule(
-        argument_spec=dict(
-            name=dict(),
-            policyId=dict(),
-            policyType=dict(choices=['config', 'audit_event', 'network']),
-            systemDefault=dict(type='bool'),
-            cloudType=dict(),
-            severity=dict(choices=['low', 'medium', 'high']),
-            details=pc.details_spec(),
-            search_type=pc.search_type_spec(),
-        ),
+        argument_spec=argument_spec,
         supports_check_mode=False,
     )
 
     client = pc.PrismaCloudRequest(module)
 
     path = ['policy', ]
-    listing = client.get(path)
+    details_path = ['policy', 'policyId']
+
+    def get_listing():
+        # Only sync the details if something wants them.
+        wanted = [module.params['details'], ]
+        wanted.extend(x.get('details') for x in module.params['queries'] or [])
+        if module.params['incremental'] and any(wanted):
+            return client.sync_details(client.get(path), 'policyId', details_path, (1, ))
+        return client.get_catalog(path)
 
     results = client.get_facts_from(
-        listing,
+        get_listing,
         'name', ['policyId', 'policyType', 'systemDefault', 'cloudType', 'severity'],
-        ['policy', 'policyId'], (1, ),
+        details_path, (1, ),
+        id_field='policyId',
+        unique_primary=True,
     )
 
-    module.exit_json(**results)
+    if client.synced is not None:
+        results['sync'] = client.synced
+
+    client.exit_json(**results)
 
 
 if __name__ == '__main__':
-    main()
+    pc.run(main)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: prismacloud_snapshot
+short_description: Exports a snapshot of a Prisma Cloud tenant to a file.
+description:
+    - This module exports cloud accounts, account groups, policies, and
+      compliance standards, requirements and sections, along with their
+      details, to a single gzip compressed newline delimited JSON file.
+    - Each line of the file is one object, as a dict with the object's
+      C(type), C(id), C(parent) (the ID of the compliance standard or
+      requirement it belongs to, if any), the listing C(item) and the
+      C(details) of the object (if it has any).
+    - Objects are retrieved concurrently and written to the file as they
+      are retrieved.
+    - A manifest with the counts of each type of object and the time taken
+      to export them is written alongside the snapshot.
+author:
+    - Garfield Lee Freeman (@shinmog)
+version_added: "2.9"
+notes:
+    - As this is a facts module, check mode is not supported.
+options:
+    output_file:
+        description:
+            - The file on the controller to write the snapshot to.
+        type: path
+        required: true
+    manifest_file:
+        description:
+            - The file on the controller to write the manifest to.
+            - Defaults to I(output_file) with C(.manifest.json) appended.
+        type: path
+    concurrency:
+        description:
+            - The max number of requests to have in flight at once.
+        type: int
+        default: 4
+'''
+
+EXAMPLES = '''
+- name: snapshot the tenant
+  prismacloud_snapshot:
+    output_file: '/var/lib/prismacloud/snapshot.json.gz'
+    concurrency: 8
+  register: ans
+
+- debug:
+    msg: '{{ ans.counts }}'
+'''
+
+RETURN = '''
+total:
+    description: number of objects in the snapshot
+    returned: success
+    type: int
+counts:
+    description: number of objects of each type in the snapshot
+    returned: success
+    type: dict
+timings:
+    description: seconds taken to export each type of object
+    returned: success
+    type: dict
+output_file:
+    description: absolute path of the snapshot
+    returned: success
+    type: str
+manifest_file:
+    description: absolute path of the manifest
+    returned: success
+    type: str
+checksum:
+    description: sha256 checksum of the snapshot
+    returned: success
+    type: str
+prismacloud_stats:
+    description:
+        - Summary of the API requests made by this module, with the number
+          of C(requests), C(errors), C(throttled) responses, C(retries),
+          C(bytes_in), C(bytes_out), seconds C(elapsed) and C(cache_hits).
+        - C(endpoints) has the same summary for each method and path (with
+          IDs replaced by placeholders, such as C(GET /policy/{id})),
+          along with the C(latencies) in milliseconds of its requests.
+        - C(trace) has the C(traceId) and C(spanId) of this module's span,
+          if the connection is writing a trace file.
+    returned: success
+    type: dict
+'''
+
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_bytes
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+
+
+# The top level listings:  the type, the listing path, the ID field, and the
+# details path and its dynamic path indexes.
+LISTINGS = (
+    ('cloud_account', ['cloud', 'name'], 'id', ['cloud', 'cloudType', 'id'], (1, 2)),
+    ('account_group', ['cloud', 'group'], 'id', ['cloud', 'group', 'id'], (2, )),
+    ('policy', ['policy', ], 'policyId', ['policy', 'policyId'], (1, )),
+    ('compliance_standard', ['compliance', ], 'id', ['compliance', 'id'], (1, )),
+)
+
+
+class SnapshotWriter(object):
+    def __init__(self, client, concurrency):
+        self.client = client
+        self.concurrency = concurrency
+        self.counts = {}
+        self.timings = {}
+
+    def records(self):
+        """Yields a record for each object in the tenant."""
+        paths = [x[1] for x in LISTINGS]
+        listings = self.client.get_many(paths, self.concurrency)
+
+        standards = []
+        for spec, listing in zip(LISTINGS, listings):
+            kind, _, id_field, details_path, dynamic_path_indexes = spec
+            listing = listing or []
+            if kind == 'compliance_standard':
+                standards = listing
+            for x in self._records(kind, listing, id_field, details_path, dynamic_path_indexes):
+                yield x
+
+        # Only the requirement IDs are needed to get their sections.
+        requirements = []
+        for x in self._children('compliance_requirement', standards, 'requirement'):
+            requirements.append({'id': x['id']})
+            yield x
+
+        for x in self._children('compliance_section', requirements, 'section'):
+            yield x
+
+    def _records(self, kind, items, id_field, details_path, dynamic_path_indexes, parents=None):
+        """Yields the records for items, getting their details in batches."""
+        start = time.time()
+        size = self.concurrency * pc.REQUESTS_PER_WORKER
+        for num in range(0, len(items), size):
+            batch = items[num:num + size]
+            if details_path is None:
+                details = [None] * len(batch)
+            else:
+                paths = [pc.build_path(x, details_path, dynamic_path_indexes) for x in batch]
+                details = self.client.get_many(paths, self.concurrency)
+            for offset, (item, item_details) in enumerate(zip(batch, details)):
+                self.counts[kind] = self.counts.get(kind, 0) + 1
+                yield {
+                    'type': kind,
+                    'id': item.get(id_field),
+                    'parent': None if parents is None else parents[num + offset],
+                    'item': item,
+                    'details': item_details,
+                }
+        self.timings[kind] = self.timings.get(kind, 0) + time.time() - start
+
+    def _children(self, kind, parents, child):
+        """Yields the records for the children of each of the parents."""
+        size = self.concurrency * pc.REQUESTS_PER_WORKER
+        for num in range(0, len(parents), size):
+            batch = parents[num:num + size]
+            start = time.time()
+            paths = [['compliance', x['id'], child] for x in batch]
+            listings = self.client.get_many(paths, self.concurrency)
+            self.timings[kind] = self.timings.get(kind, 0) + time.time() - start
+
+            items = []
+            parent_ids = []
+            for parent, listing in zip(batch, listings):
+                items.extend(listing or [])
+                parent_ids.extend(parent['id'] for x in listing or [])
+
+            if kind == 'compliance_requirement':
+                records = self._records(
+                    kind, items, 'id',
+                    ['compliance', 'requirement', 'id'], (2, ), parent_ids)
+            else:
+                records = self._records(
+                    kind, items, 'sectionId', None, None, parent_ids)
+            for x in records:
+                yield x
+
+
+def write_manifest(module, manifest, manifest_file):
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(manifest_file))
+        module.add_cleanup_file(tmp)
+        with os.fdopen(fd, 'wb') as out:
+            out.write(to_bytes(json.dumps(manifest, indent=4, sort_keys=True)))
+    except (IOError, OSError) as e:
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        module.fail_json(msg='failed to write {0}: {1}'.format(manifest_file, e))
+
+    module.atomic_move(tmp, manifest_file)
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            output_file=dict(type='path', required=True),
+            manifest_file=dict(type='path'),
+            concurrency=pc.concurrency_spec(),
+        ),
+        supports_check_mode=False,
+    )
+
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1')
+
+    client = pc.PrismaCloudRequest(module)
+    writer = SnapshotWriter(client, module.params['concurrency'])
+
+    start = time.time()
+    results = client.write_facts(writer.records(), module.params['output_file'], 'gzip')
+    writer.timings['total'] = time.time() - start
+
+    manifest_file = module.params['manifest_file']
+    if manifest_file is None:
+        manifest_file = results['output_file'] + '.manifest.json'
+    manifest_file = os.path.abspath(manifest_file)
+
+    manifest = {
+        'created_at': start,
+        'output_file': results['output_file'],
+        'checksum': results['checksum'],
+        'total': results['total'],
+        'counts': writer.counts,
+        'timings': writer.timings,
+    }
+    write_manifest(module, manifest, manifest_file)
+
+    results['counts'] = writer.counts
+    results['timings'] = writer.timings
+    results['manifest_file'] = manifest_file
+
+    client.exit_json(**results)
+
+
+if __name__ == '__main__':
+    pc.run(main)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+from io import BytesIO
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils._text import to_text
+
+
+# The fields whose values are scrubbed by default, wherever they appear in
+# a request or response body.
+SECRET_FIELDS = (
+    'username', 'password', 'token', 'key', 'secret', 'client_secret',
+    'private_key', 'private_key_id', 'externalId',
+)
+
+SCRUBBED = '********'
+
+# The response headers that are kept.
+HEADERS = ('Content-Type', 'Retry-After', 'X-Redlock-Status')
+
+
+def scrub(data, fields):
+    """Returns a copy of the data with the values of the fields replaced."""
+    if isinstance(data, dict):
+        return dict(
+            (k, SCRUBBED if k in fields and v is not None else scrub(v, fields))
+            for k, v in data.items()
+        )
+    elif isinstance(data, list):
+        return [scrub(x, fields) for x in data]
+
+    return data
+
+
+def scrub_body(body, fields):
+    """Returns the scrubbed body, parsed if it is JSON, and whether it was."""
+    body = to_text(body)
+    try:
+        return scrub(json.loads(body), fields), True
+    except ValueError:
+        return body, False
+
+
+class Response(object):
+    """A recorded response, looking enough like an HTTP response to decode."""
+    def __init__(self, code, headers):
+        self.code = code
+        self.headers = headers
+
+    def getcode(self):
+        return self.code
+
+    def getheader(self, name, default=None):
+        for k, v in self.headers.items():
+            if k.lower() == name.lower():
+                return v
+        return default
+
+
+class Cassette(object):
+    """Records requests and their responses to a file as JSON lines, or
+    replays the responses from one.
+
+    Secrets are scrubbed from both before they are written, and the tenant
+    (whose user is an access key ID) is only written as a hash.  When
+    replaying, requests are matched on their method, path, query and
+    (scrubbed) body, and the responses to each are served in the order they
+    were recorded.  Once they run out, the last one is served again.
+    """
+    def __init__(self, path, tenant, mode='record', timing=False, scrub_fields=SECRET_FIELDS):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.tenant = hashlib.sha1(to_bytes(tenant)).hexdigest()
+        self._raw_tenant = tenant
+        self.mode = mode
+        self.timing = timing
+        self.scrub_fields = frozenset(scrub_fields)
+        self._fd = None
+        self._lock = threading.Lock()
+        self._responses = None
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def record(self, method, path, body, resp, resp_data, elapsed):
+        """Writes a request and the response it got."""
+        request, _ = scrub_body(body, self.scrub_fields)
+        response, is_json = scrub_body(resp_data.getvalue(), self.scrub_fields)
+        headers = {}
+        for name in HEADERS:
+            val = resp.getheader(name)
+            if val is not None:
+                headers[name] = val
+
+        data = {
+            'tenant': self.tenant,
+            'time': time.time(),
+            'method': method,
+            'path': path,
+            'request': request,
+            'status': resp.getcode(),
+            'headers': headers,
+            'elapsed': round(elapsed, 6),
+        }
+        data['response' if is_json else 'text'] = response
+
+        line = to_bytes(json.dumps(data, sort_keys=True) + '\n')
+        with self._lock:
+            if self._fd is None:
+                # Append mode, so connections to other hosts can share the
+                # file, as each line is a single write.
+                self._fd = open(self.path, 'ab')
+            self._fd.write(line)
+            self._fd.flush()
+
+    def play(self, method, path, body):
+        """Returns the recorded response for the request, as the response
+        and its data.
+
+        Raises KeyError if the request was never recorded.
+        """
+        key = self._key(method, path, body)
+        with self._lock:
+            if self._responses is None:
+                self._responses = self._load()
+            found = self._responses.get(key)
+            if not found:
+                raise KeyError(key)
+            ans = found.popleft() if len(found) > 1 else found[0]
+
+        if self.timing and ans.get('elapsed'):
+            time.sleep(ans['elapsed'])
+
+        if 'response' in ans:
+            data = json.dumps(ans['response'])
+        else:
+            data = ans.get('text', '')
+
+        return Response(ans['status'], ans.get('headers') or {}), BytesIO(to_bytes(data))
+
+    def _load(self):
+        ans = {}
+        with open(self.path, 'rb') as fd:
+            for line in fd:
+                try:
+                    x = json.loads(to_text(line))
+                except ValueError:
+                    # A line cut short by a connection that died.
+                    continue
+                # Cassettes recorded before the tenant was hashed have it
+                # in the clear.
+                if x.get('tenant') not in (self.tenant, self._raw_tenant):
+                    continue
+                key = self._key(x['method'], x['path'], json.dumps(x['request']))
+                ans.setdefault(key, collections.deque()).append(x)
+
+        return ans
+
+    def _key(self, method, path, body):
+        """Returns the key a request is matched on when replaying."""
+        data, _ = scrub_body(body, self.scrub_fields)
+        return '{0} {1} {2}'.format(method, path, json.dumps(data, sort_keys=True))
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._fd.close()
+                self._fd = None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import json
+import threading
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.httpapi.prismacloud import BASE_HEADERS
+from ansible_collections.paloaltonetworks.prismacloud.plugins.httpapi.prismacloud import uri
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils.common import run_concurrently
+from ansible.module_utils._text import to_text
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.six.moves.urllib.error import URLError
+from ansible.module_utils.urls import open_url
+
+
+class PrismaCloudClient(object):
+    """A Prisma Cloud API client for plugins that run on the controller.
+
+    This is the same protocol as the httpapi plugin, but without needing a
+    persistent connection:  it logs in on the first request, logs in again
+    if the token expires, and raises the same errors.  It is safe to share
+    between threads.
+    """
+    def __init__(self, url, username, password, customer_name=None, validate_certs=True, timeout=30):
+        self.url = url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.customer_name = customer_name
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.token = None
+        self._lock = threading.Lock()
+
+    def login(self):
+        data = {
+            'username': self.username,
+            'password': self.password,
+        }
+        if self.customer_name is not None:
+            data['customerName'] = self.customer_name
+
+        ans = self._send('POST', ['login', ], data=data)
+        try:
+            self.token = ans['token']
+        except KeyError:
+            raise errors.AuthenticationError("invalid authentication credentials")
+
+    def send_request(self, method, path, query=None, data=None):
+        token = self._token()
+        try:
+            return self._send(method, path, query, data, token)
+        except errors.AuthenticationError:
+            # The token expired, so log in again and retry, once.
+            with self._lock:
+                if self.token == token:
+                    self.login()
+            return self._send(method, path, query, data, self.token)
+
+    def get(self, path, query=None):
+        return self.send_request('GET', path, query)
+
+    def get_many(self, paths, concurrency=1):
+        """Returns the response for each path, or None if it was not found."""
+        def get(path):
+            try:
+                return self.get(path)
+            except errors.ObjectNotFoundError:
+                return None
+
+        return run_concurrently(get, paths, concurrency)
+
+    def tenant(self):
+        """Returns a string identifying the tenant of this client."""
+        return '{0} {1} {2}'.format(self.url, self.username, self.customer_name or '')
+
+    def _token(self):
+        with self._lock:
+            if self.token is None:
+                self.login()
+            return self.token
+
+    def _send(self, method, path, query=None, data=None, token=None):
+        headers = dict(BASE_HEADERS)
+        if token is not None:
+            headers['x-redlock-auth'] = token
+
+        try:
+            resp = open_url(
+                self.url + uri(path, query),
+                data=json.dumps(data) if data is not None else None,
+                headers=headers,
+                method=method,
+                validate_certs=self.validate_certs,
+                timeout=self.timeout,
+            )
+        except HTTPError as e:
+            err = None
+            err_val = (e.headers or {}).get('X-Redlock-Status')
+            if err_val is not None:
+                try:
+                    err = errors.error_for(json.loads(err_val))
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    # Malformed, so fall back to the HTTP status.
+                    pass
+            if err is None:
+                if e.code == 401:
+                    raise errors.AuthenticationError("authentication failed")
+                raise errors.PrismaCloudError('HTTP {0}: {1}'.format(e.code, e.reason))
+            raise err
+        except URLError as e:
+            raise errors.PrismaCloudError('failed to connect to {0}: {1}'.format(self.url, e.reason))
+
+        body = to_text(resp.read())
+        try:
+            return json.loads(body) if body else {}
+        except ValueError:
+            raise errors.ResponseNotJson("response wasn't json", [body, ])
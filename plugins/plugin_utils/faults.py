@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import json
+import random
+import threading
+import time
+
+from io import BytesIO
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+
+
+DEFAULTS = {
+    'throttle_rate': 0,
+    'retry_after': 1,
+    'error_rate': 0,
+    'error_codes': [500, 502, 503],
+    'malformed_rate': 0,
+    'expire_rate': 0,
+    'truncate_rate': 0,
+    'slow_rate': 0,
+    'slow_seconds': 2,
+}
+
+# The faults that are rolled for, in order, and the rate setting of each.
+FAULTS = (
+    ('throttle', 'throttle_rate'),
+    ('error', 'error_rate'),
+    ('malformed', 'malformed_rate'),
+    ('expire', 'expire_rate'),
+    ('truncate', 'truncate_rate'),
+    ('slow', 'slow_rate'),
+)
+
+# X-Redlock-Status header values that can't be made sense of.
+MALFORMED = ('[{"i18nKey": "internal_', '', '{}', '[{}]', '"error"', '[{"severity": "error"}]')
+
+# The requests being sent by each thread, innermost (such as the login of
+# a request whose token expired) last.
+_local = threading.local()
+
+
+def patch_open_url(module):
+    """Has the open_url of module, the one the connection sends with, raise
+    the faults of the request being sent.
+
+    The faults are then handled by the connection, and the httpapi plugin's
+    handle_httperror(), as they would be if they came from the tenant.
+    """
+    if getattr(module.open_url, 'injects_faults', False):
+        return
+
+    open_url = module.open_url
+
+    def faulty_open_url(url, *args, **kwargs):
+        requests = getattr(_local, 'requests', None)
+        if not requests:
+            return open_url(url, *args, **kwargs)
+        return requests[-1]['injector'].open(requests[-1], open_url, url, *args, **kwargs)
+
+    faulty_open_url.injects_faults = True
+    module.open_url = faulty_open_url
+
+
+class _Body(BytesIO):
+    """The body of an injected error, with its headers, as the HTTPError
+    reads them from the response.
+    """
+    def __init__(self, headers, data):
+        BytesIO.__init__(self, to_bytes(data))
+        self.headers = headers
+
+    def getheader(self, name, default=None):
+        for k, v in self.headers.items():
+            if k.lower() == name.lower():
+                return v
+        return default
+
+
+class _Truncated(object):
+    """A response whose body is cut short."""
+    def __init__(self, resp, cut):
+        self._resp = resp
+        self._cut = cut
+
+    def read(self):
+        data = self._resp.read()
+        return data[:int(len(data) * self._cut)]
+
+    def __getattr__(self, name):
+        return getattr(self._resp, name)
+
+
+class FaultInjector(object):
+    """Injects faults into requests, at the rates configured per endpoint.
+
+    The config has the settings for every endpoint in "default", and the
+    settings of any endpoint (such as "GET /policy/{id}") in "endpoints".
+    Each attempt at a request gets at most one fault, picked with a single
+    roll against the rates, so they should add up to no more than 1.
+
+    The faults are raised from the connection's open_url (see
+    patch_open_url()), as an HTTPError for those that are errors, so
+    retries and logins happen as they would against a failing tenant.
+    """
+    def __init__(self, config):
+        config = dict(config)
+        self.seed = config.pop('seed', None)
+        self.defaults = self._settings(DEFAULTS, config.pop('default', None) or {}, 'default')
+        self.endpoints = dict(
+            (name, self._settings(self.defaults, settings or {}, name))
+            for name, settings in (config.pop('endpoints', None) or {}).items()
+        )
+        if config:
+            raise ValueError('unknown keys: {0}'.format(', '.join(sorted(config))))
+
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _settings(base, settings, name):
+        unknown = [x for x in settings if x not in DEFAULTS]
+        if unknown:
+            raise ValueError('unknown settings for {0}: {1}'.format(name, ', '.join(sorted(unknown))))
+        ans = dict(base)
+        ans.update(settings)
+        if not ans['error_codes']:
+            raise ValueError('error_codes for {0} must not be empty'.format(name))
+        return ans
+
+    def begin(self, method, endpoint):
+        """Begins sending a request, for open_url to inject faults into."""
+        requests = getattr(_local, 'requests', None)
+        if requests is None:
+            requests = _local.requests = []
+        requests.append({'injector': self, 'method': method, 'endpoint': endpoint, 'fault': None})
+
+    def end(self):
+        """Ends sending a request, returning the first fault injected into
+        it, or None."""
+        return _local.requests.pop()['fault']
+
+    def injected(self):
+        """Returns the first fault injected into the request being sent."""
+        requests = getattr(_local, 'requests', None)
+        return requests[-1]['fault'] if requests else None
+
+    def open(self, request, open_url, url, *args, **kwargs):
+        """Calls open_url, injecting a fault if one comes up.
+
+        Throttling, errors, malformed errors and expired tokens are raised
+        as an HTTPError, so the request is never sent.  Otherwise the
+        request is sent, maybe slowly, and its response body may be cut
+        short.
+        """
+        conf = self.endpoints.get('{0} {1}'.format(request['method'], request['endpoint']), self.defaults)
+        with self._lock:
+            roll = self._rng.random()
+            fault = None
+            for name, rate in FAULTS:
+                if roll < conf[rate]:
+                    fault = name
+                    break
+                roll -= conf[rate]
+            code = self._rng.choice(conf['error_codes'])
+            malformed = self._rng.choice(MALFORMED)
+            cut = self._rng.random()
+
+        if fault == 'expire' and request['endpoint'] == '/login':
+            # Logging in doesn't need a token.
+            fault = None
+        if fault is not None and request['fault'] is None:
+            request['fault'] = fault
+
+        if fault == 'throttle':
+            raise self._error(url, 429, 'too_many_requests', {'Retry-After': '{0}'.format(conf['retry_after'])})
+        elif fault == 'error' and code == 500:
+            raise self._error(url, code, 'internal_server_error')
+        elif fault == 'error':
+            # Errors from a gateway don't come from Prisma Cloud itself.
+            raise self._reply(url, code, {'Content-Type': 'text/html'}, '<html><body>{0}</body></html>'.format(code))
+        elif fault == 'malformed':
+            raise self._reply(url, 400, {'X-Redlock-Status': malformed}, '')
+        elif fault == 'expire':
+            raise self._reply(url, 401, {}, '')
+        elif fault == 'slow':
+            time.sleep(conf['slow_seconds'])
+
+        resp = open_url(url, *args, **kwargs)
+        if fault == 'truncate':
+            resp = _Truncated(resp, cut)
+
+        return resp
+
+    def _error(self, url, code, i18n_key, headers=None):
+        headers = dict(headers or {})
+        headers['X-Redlock-Status'] = json.dumps([{'i18nKey': i18n_key, 'severity': 'error', 'subject': None}])
+        return self._reply(url, code, headers, '')
+
+    def _reply(self, url, code, headers, body):
+        return HTTPError(url, code, 'Injected fault', headers, _Body(headers, body))
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import fcntl
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils._text import to_text
+
+
+# The upper bounds, in seconds, of the request latency histogram buckets.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metrics(object):
+    """Counters of the requests made by a connection, for Prometheus.
+
+    These are kept separately from the request records, as they have to
+    cover every request made over the life of the connection.  When
+    written, they are added to the counters written by earlier connections,
+    so they only ever go up, as Prometheus expects of counters.
+    """
+    def __init__(self):
+        self.requests = {}
+        self.latency = {}
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.throttled = {}
+        self.cache_hits = {}
+        self.retries = 0
+        self.logins = 0
+        self.closed = None
+
+    def add(self, record):
+        """Adds a request record."""
+        endpoint = (record['method'], record['path'])
+        status = 'error' if record['status'] is None else '{0}'.format(record['status'])
+        key = endpoint + (status, )
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.bytes_in[endpoint] = self.bytes_in.get(endpoint, 0) + record['bytes_in']
+        self.bytes_out[endpoint] = self.bytes_out.get(endpoint, 0) + record['bytes_out']
+        if record['status'] == 429:
+            self.throttled[endpoint] = self.throttled.get(endpoint, 0) + 1
+        self.retries += record['retries']
+        if record['path'] == '/login':
+            self.logins += 1
+
+        hist = self.latency.get(endpoint)
+        if hist is None:
+            hist = self.latency[endpoint] = {'buckets': [0] * len(BUCKETS), 'sum': 0, 'count': 0}
+        for num, bound in enumerate(BUCKETS):
+            if record['elapsed'] <= bound:
+                hist['buckets'][num] += 1
+        hist['sum'] += record['elapsed']
+        hist['count'] += 1
+
+    def add_cache_hits(self, cache_hits):
+        """Adds the cache hits reported by a module, keyed by endpoint."""
+        for key, count in cache_hits.items():
+            endpoint = tuple(key.split(' ', 1))
+            self.cache_hits[endpoint] = self.cache_hits.get(endpoint, 0) + count
+
+    def merge(self, other):
+        """Adds the counters of another Metrics to these ones."""
+        for name in ('requests', 'bytes_in', 'bytes_out', 'throttled', 'cache_hits'):
+            dst = getattr(self, name)
+            for key, val in getattr(other, name).items():
+                dst[key] = dst.get(key, 0) + val
+        for key, hist in other.latency.items():
+            dst = self.latency.setdefault(key, {'buckets': [0] * len(BUCKETS), 'sum': 0, 'count': 0})
+            dst['buckets'] = [x + y for x, y in zip(dst['buckets'], hist['buckets'])]
+            dst['sum'] += hist['sum']
+            dst['count'] += hist['count']
+        self.retries += other.retries
+        self.logins += other.logins
+        self.closed = max(self.closed, other.closed) if self.closed else other.closed
+
+    def to_state(self):
+        """Returns the counters as something that can be saved as JSON."""
+        ans = dict(
+            (name, [list(k) + [v] for k, v in getattr(self, name).items()])
+            for name in ('requests', 'latency', 'bytes_in', 'bytes_out', 'throttled', 'cache_hits')
+        )
+        ans['retries'] = self.retries
+        ans['logins'] = self.logins
+        ans['closed'] = self.closed
+        return ans
+
+    @classmethod
+    def from_state(cls, state):
+        ans = cls()
+        for name in ('requests', 'latency', 'bytes_in', 'bytes_out', 'throttled', 'cache_hits'):
+            setattr(ans, name, dict((tuple(x[:-1]), x[-1]) for x in state.get(name, [])))
+        ans.retries = state.get('retries', 0)
+        ans.logins = state.get('logins', 0)
+        ans.closed = state.get('closed')
+        return ans
+
+    def write(self, path, tenant):
+        """Adds the metrics to those already in path, and writes them.
+
+        The counters are kept in path with C(.json) appended, which the
+        textfile collector ignores.  Connections to different hosts may
+        close at the same time, so that file is locked while in use.
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        state_file = path + '.json'
+
+        with open(path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                total = Metrics()
+                try:
+                    with open(state_file, 'rb') as fd:
+                        state = json.loads(to_text(fd.read()))
+                    total.merge(Metrics.from_state(state.get(tenant) or {}))
+                except (IOError, OSError, ValueError):
+                    state = {}
+                self.closed = time.time()
+                total.merge(self)
+                state[tenant] = total.to_state()
+
+                atomic_write(state_file, json.dumps(state))
+                atomic_write(path, render(dict(
+                    (k, Metrics.from_state(v)) for k, v in state.items())))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def render(tenants):
+    """Returns the Metrics of each tenant in the Prometheus text format."""
+    lines = []
+
+    def metric(name, kind, text, samples):
+        lines.append('# HELP {0} {1}'.format(name, text))
+        lines.append('# TYPE {0} {1}'.format(name, kind))
+        for tenant, m in sorted(tenants.items()):
+            for labels, val in samples(m):
+                lines.append('{0}{1} {2}'.format(name, format_labels(dict(labels, tenant=tenant)), val))
+
+    def per_endpoint(name):
+        return lambda m: [
+            ({'method': k[0], 'endpoint': k[1]}, v)
+            for k, v in sorted(getattr(m, name).items())
+        ]
+
+    def hit_ratio(m):
+        hits = sum(m.cache_hits.values())
+        sent = sum(x['count'] for x in m.latency.values())
+        return [({}, float(hits) / (hits + sent) if hits + sent else 0)]
+
+    metric(
+        'prismacloud_requests_total', 'counter', 'Prisma Cloud API requests.',
+        lambda m: [
+            ({'method': k[0], 'endpoint': k[1], 'status': k[2]}, v)
+            for k, v in sorted(m.requests.items())
+        ],
+    )
+
+    lines.append('# HELP prismacloud_request_duration_seconds Prisma Cloud API request latency.')
+    lines.append('# TYPE prismacloud_request_duration_seconds histogram')
+    bounds = ['{0}'.format(x) for x in BUCKETS] + ['+Inf']
+    for tenant, m in sorted(tenants.items()):
+        for endpoint, hist in sorted(m.latency.items()):
+            labels = {'method': endpoint[0], 'endpoint': endpoint[1], 'tenant': tenant}
+            for bound, count in zip(bounds, hist['buckets'] + [hist['count']]):
+                lines.append('prismacloud_request_duration_seconds_bucket{0} {1}'.format(
+                    format_labels(dict(labels, le=bound)), count))
+            lines.append('prismacloud_request_duration_seconds_sum{0} {1}'.format(
+                format_labels(labels), hist['sum']))
+            lines.append('prismacloud_request_duration_seconds_count{0} {1}'.format(
+                format_labels(labels), hist['count']))
+
+    metric(
+        'prismacloud_response_bytes_total', 'counter',
+        'Bytes received from the Prisma Cloud API.', per_endpoint('bytes_in'))
+    metric(
+        'prismacloud_request_bytes_total', 'counter',
+        'Bytes sent to the Prisma Cloud API.', per_endpoint('bytes_out'))
+    metric(
+        'prismacloud_throttled_total', 'counter',
+        'Prisma Cloud API requests rejected with a 429.', per_endpoint('throttled'))
+    metric(
+        'prismacloud_cache_hits_total', 'counter',
+        'Prisma Cloud API requests answered from a cache.', per_endpoint('cache_hits'))
+    metric(
+        'prismacloud_cache_hit_ratio', 'gauge',
+        'Fraction of Prisma Cloud API requests answered from a cache.', hit_ratio)
+    metric(
+        'prismacloud_retries_total', 'counter',
+        'Prisma Cloud API requests retried after logging in again.',
+        lambda m: [({}, m.retries)])
+    metric(
+        'prismacloud_logins_total', 'counter',
+        'Logins to the Prisma Cloud API.', lambda m: [({}, m.logins)])
+    metric(
+        'prismacloud_last_close_timestamp_seconds', 'gauge',
+        'When a connection to the tenant was last closed.',
+        lambda m: [({}, m.closed)] if m.closed else [])
+
+    return '\n'.join(lines) + '\n'
+
+
+def atomic_write(path, data):
+    """Replaces path atomically, as the textfile collector may read it at
+    any time."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(to_bytes(data))
+        os.chmod(tmp, 0o644)
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        os.remove(tmp)
+        raise
+
+
+def format_labels(labels):
+    def escape(val):
+        return '{0}'.format(val).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join('{0}="{1}"'.format(k, escape(v)) for k, v in sorted(labels.items())) + '}'
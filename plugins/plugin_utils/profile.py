@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import cProfile
+import pstats
+import threading
+
+
+class Profiler(object):
+    """Profiles calls made from any number of threads into one set of stats.
+
+    cProfile only sees the thread that enabled it, so each thread gets its
+    own profile, and they are all added up when dumped.
+    """
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def call(self, func, *args, **kwargs):
+        """Calls func, profiling it unless this thread already is."""
+        if getattr(self._local, 'active', False):
+            return func(*args, **kwargs)
+
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+
+        try:
+            profile.enable()
+        except ValueError:
+            # Another thread is being profiled, and this version of
+            # python only allows one profiler at a time.
+            return func(*args, **kwargs)
+
+        self._local.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.active = False
+
+    def dump(self, path):
+        """Writes the stats of every thread to path, if there are any."""
+        with self._lock:
+            profiles = list(self._profiles)
+
+        stats = None
+        for profile in profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # Never enabled, so there are no stats.
+                continue
+
+        if stats is not None:
+            stats.dump_stats(path)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import binascii
+import json
+import os
+import socket
+import threading
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils._text import to_text
+
+
+def new_id(size):
+    """Returns a random hex ID of size bytes."""
+    return to_text(binascii.hexlify(os.urandom(size)))
+
+
+def nanos(when):
+    return int(when * 1e9)
+
+
+class Tracer(object):
+    """Appends spans to a file as JSON lines.
+
+    Each span has the fields of an OpenTelemetry span, with its attributes
+    as a plain dict and the resource it came from inlined.  Every span
+    written by one Tracer shares the same trace ID.
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.trace_id = new_id(16)
+        self.resource = {
+            'service.name': 'paloaltonetworks.prismacloud',
+            'host.name': socket.gethostname(),
+            'process.pid': os.getpid(),
+        }
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def span(self, name, start, end, span_id=None, parent_id=None,
+             kind='SPAN_KIND_CLIENT', attributes=None, error=None):
+        """Writes a span, returning its ID."""
+        span_id = span_id or new_id(8)
+        data = {
+            'traceId': self.trace_id,
+            'spanId': span_id,
+            'parentSpanId': parent_id or '',
+            'name': name,
+            'kind': kind,
+            'startTimeUnixNano': nanos(start),
+            'endTimeUnixNano': nanos(end),
+            'attributes': attributes or {},
+            'status': {'code': 'STATUS_CODE_OK'},
+            'resource': self.resource,
+        }
+        if error is not None:
+            data['status'] = {'code': 'STATUS_CODE_ERROR', 'message': error}
+
+        line = to_bytes(json.dumps(data, sort_keys=True) + '\n')
+        with self._lock:
+            if self._fd is None:
+                # Append mode, so connections to other hosts can share the
+                # file, as each line is a single write.
+                self._fd = open(self.path, 'ab')
+            self._fd.write(line)
+            self._fd.flush()
+
+        return span_id
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._fd.close()
+                self._fd = None
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+
+# The tests import the collection, and their fakes, as ansible_collections.
+# If this checkout isn't already in such a tree, link it into a temp one.
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PARTS = ROOT.split(os.sep)
+if PARTS[-3:-2] == ['ansible_collections']:
+    sys.path.insert(0, os.sep.join(PARTS[:-3]))
+else:
+    TREE = tempfile.mkdtemp(prefix='prismacloud-units-')
+    os.makedirs(os.path.join(TREE, 'ansible_collections', 'paloaltonetworks'))
+    os.symlink(ROOT, os.path.join(TREE, 'ansible_collections', 'paloaltonetworks', 'prismacloud'))
+    sys.path.insert(0, TREE)
+    atexit.register(shutil.rmtree, TREE, True)
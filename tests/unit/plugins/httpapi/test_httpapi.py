@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import io
+import json
+import os
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.httpapi import prismacloud as httpapi
+
+
+OPTIONS = {
+    'customer_name': None,
+    'metrics_file': None,
+    'trace_file': None,
+    'slow_request_threshold': None,
+    'profile_dir': None,
+    'cassette_file': None,
+    'cassette_mode': 'once',
+    'cassette_scrub_fields': [],
+    'cassette_timing': False,
+    'fault_injection': None,
+}
+
+REQUEST = ['GET', ['policy', ], None, None]
+
+
+class Response(object):
+    def __init__(self, code, headers=None):
+        self.code = code
+        self.headers = headers or {}
+
+    def getcode(self):
+        return self.code
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+class FakeConnection(object):
+    """Stands in for the httpapi connection, answering every request with
+    an empty listing.
+    """
+    def __init__(self):
+        self._url = 'https://api.prismacloud.io'
+        self._auth = {'x-redlock-auth': 'token'}
+        self.messages = []
+        self.sent = []
+
+    def _connect(self):
+        pass
+
+    def get_option(self, name):
+        return {'remote_user': 'user', 'password': 'secret'}[name]
+
+    def queue_message(self, level, message):
+        self.messages.append((level, message))
+
+    def send(self, path, data=None, method=None, headers=None):
+        self.sent.append((method, path))
+        return Response(200), io.BytesIO(b'[]')
+
+
+def make_api(**options):
+    ans = httpapi.HttpApi(FakeConnection())
+    ans._options = dict(OPTIONS, **options)
+    return ans
+
+
+def send(api, invocation_id, name='prismacloud_policy_facts', count=1):
+    return api.send_requests([REQUEST] * count, 1, [invocation_id, name, None])['invocation']
+
+
+def spans(trace_file):
+    with open(trace_file) as fd:
+        return [json.loads(x) for x in fd]
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    return str(tmp_path / 'trace.jsonl')
+
+
+def test_invocations_are_kept_apart(trace_file):
+    api = make_api(trace_file=trace_file)
+
+    first = send(api, 'a')
+    second = send(api, 'b')
+
+    # Another module beginning doesn't end the first one.
+    assert send(api, 'a') == first
+    assert first['id'] == 'a'
+    assert second['id'] == 'b'
+    assert first['trace']['spanId'] != second['trace']['spanId']
+    assert sorted(api._invocations) == ['a', 'b']
+
+
+def test_module_end(trace_file):
+    api = make_api(trace_file=trace_file)
+    first = send(api, 'a', count=2)
+    second = send(api, 'b', 'prismacloud_account_group_facts')
+
+    api.module_end('a', {'prismacloud.rpc_count': 1})
+    api.module_end('a')
+    api.logout()
+
+    modules = dict((x['spanId'], x) for x in spans(trace_file) if x['kind'] == 'SPAN_KIND_INTERNAL')
+    ended = modules[first['trace']['spanId']]['attributes']
+    assert ended['ansible.module.completed'] is True
+    assert ended['prismacloud.requests'] == 2
+    assert ended['prismacloud.rpc_count'] == 1
+    # The second module never ended, so it is ended with the connection.
+    abandoned = modules[second['trace']['spanId']]['attributes']
+    assert abandoned['ansible.module.name'] == 'prismacloud_account_group_facts'
+    assert abandoned['ansible.module.completed'] is False
+    assert abandoned['prismacloud.requests'] == 1
+
+
+def test_profiles(tmp_path):
+    api = make_api(profile_dir=str(tmp_path))
+    send(api, 'a')
+    send(api, 'b', 'prismacloud_account_group_facts')
+
+    api.module_end('a')
+    assert [x.split('-')[1] for x in os.listdir(str(tmp_path))] == ['prismacloud_policy_facts']
+
+    api.logout()
+    names = sorted(x.split('-')[1] for x in os.listdir(str(tmp_path)))
+    assert names == ['prismacloud_account_group_facts', 'prismacloud_policy_facts']
+
+
+def test_max_invocations(monkeypatch, trace_file):
+    monkeypatch.setattr(httpapi, 'MAX_INVOCATIONS', 2)
+    api = make_api(trace_file=trace_file)
+    send(api, 'a')
+    send(api, 'b')
+    send(api, 'a')
+
+    send(api, 'c')
+
+    # The least recently active invocation is ended to make room.
+    assert sorted(api._invocations) == ['a', 'c']
+
+
+def test_invocations_off():
+    api = make_api()
+
+    assert send(api, 'a') is None
+    assert api._invocations == {}
+
+
+def test_request_spans_interleaved(trace_file):
+    # Two modules sharing the connection, taking turns.
+    api = make_api(trace_file=trace_file)
+    first = send(api, 'a')
+    second = send(api, 'b', 'prismacloud_account_group_facts', count=2)
+    send(api, 'a')
+    api.module_end('b')
+    api.module_end('a')
+    api.logout()
+
+    parents = {}
+    for x in spans(trace_file):
+        if x['kind'] == 'SPAN_KIND_CLIENT':
+            parents.setdefault(x['parentSpanId'], []).append(x['attributes']['ansible.module.name'])
+    assert parents == {
+        first['trace']['spanId']: ['prismacloud_policy_facts'] * 2,
+        second['trace']['spanId']: ['prismacloud_account_group_facts'] * 2,
+    }
+
+
+def test_abandoned_span_ends_at_last_request(trace_file):
+    api = make_api(trace_file=trace_file)
+    first = send(api, 'a')
+    last = api._invocations['a']['last']
+    send(api, 'b')
+    api.module_end('b')
+
+    api.logout()
+
+    span = [x for x in spans(trace_file) if x['spanId'] == first['trace']['spanId']][0]
+    assert span['attributes']['ansible.module.completed'] is False
+    assert span['endTimeUnixNano'] == int(last * 1e9)
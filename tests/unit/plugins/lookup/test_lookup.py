@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import socket
+import ssl
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible_collections.paloaltonetworks.prismacloud.plugins.lookup import prismacloud as lookup_module
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+
+
+class FakeClient(object):
+    """Stands in for PrismaCloudClient, answering every GET with listing,
+    or raising error if it is set.
+    """
+    error = None
+    listing = []
+
+    def __init__(self, url, *args):
+        self.url = url
+
+    def get(self, path):
+        if self.error is not None:
+            raise self.error
+        return self.listing
+
+    def tenant(self):
+        return self.url
+
+
+@pytest.fixture
+def lookup(monkeypatch, tmp_path):
+    monkeypatch.setattr(lookup_module, 'PrismaCloudClient', FakeClient)
+    monkeypatch.setattr(lookup_module, 'INDEXES', {})
+    options = {
+        'url': 'https://api.prismacloud.io',
+        'username': 'user',
+        'password': 'secret',
+        'customer_name': None,
+        'validate_certs': True,
+        'timeout': 30,
+        'key': 'name',
+        'return_field': None,
+        'on_missing': 'error',
+        'cache_ttl': 0,
+        'cache_dir': str(tmp_path),
+    }
+    ans = lookup_module.LookupModule()
+    # Stand in for the plugin loader's option handling.
+    monkeypatch.setattr(ans, 'set_options', lambda var_options=None, direct=None: options.update(direct))
+    monkeypatch.setattr(ans, 'get_option', options.get)
+    return ans
+
+
+def test_lookup(monkeypatch, lookup):
+    monkeypatch.setattr(FakeClient, 'listing', [{'policyId': 'p1', 'name': 'a'}, {'policyId': 'p2', 'name': 'b'}])
+
+    assert lookup.run(['b', 'a'], type='policy') == ['p2', 'p1']
+
+
+def test_missing(monkeypatch, lookup):
+    with pytest.raises(AnsibleError, match='no policy with name a'):
+        lookup.run(['a', ], type='policy')
+
+
+@pytest.mark.parametrize('error', [
+    errors.AuthenticationError('invalid authentication credentials'),
+    errors.PrismaCloudError('HTTP 500: Server Error'),
+    socket.timeout('timed out'),
+    ssl.SSLError('certificate verify failed'),
+    ValueError('unexpected'),
+])
+def test_client_errors(monkeypatch, lookup, error):
+    monkeypatch.setattr(FakeClient, 'error', error)
+
+    with pytest.raises(AnsibleError, match='^prismacloud lookup: ') as e:
+        lookup.run(['a', ], type='policy')
+
+    assert e.value.orig_exc is error
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import cache
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FACTS_PARAMS
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeModule
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeTenant
+
+
+class Clock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ans = Clock(1000.0)
+    monkeypatch.setattr(cache.time, 'time', ans)
+    return ans
+
+
+def test_get_set(tmp_path):
+    disk = cache.DiskCache(str(tmp_path / 'cache'))
+
+    assert disk.get(['a', ]) is None
+    disk.set(['a', ], {'b': [1, 2]})
+    assert disk.get(['a', ]) == {'b': [1, 2]}
+    assert disk.get(['b', ]) is None
+
+
+def test_max_age(tmp_path, clock):
+    disk = cache.DiskCache(str(tmp_path))
+    disk.set(['a', ], 1)
+
+    clock.now += 60
+    assert disk.get(['a', ], 60) == 1
+    clock.now += 1
+    assert disk.get(['a', ], 60) is None
+    assert disk.get(['a', ]) == 1
+
+
+def test_unreadable_is_a_miss(tmp_path):
+    disk = cache.DiskCache(str(tmp_path))
+    with open(disk.filename(['a', ]), 'w') as fd:
+        fd.write('{not json')
+
+    assert disk.get(['a', ]) is None
+
+
+def test_unwritable_is_not_cached(tmp_path):
+    (tmp_path / 'file').write_text(u'')
+    disk = cache.DiskCache(str(tmp_path / 'file'))
+
+    disk.set(['a', ], 1)
+
+    assert disk.get(['a', ]) is None
+
+
+def test_tenants_are_separate(tmp_path):
+    one = cache.tenant_cache(str(tmp_path), 'https://api.prismacloud.io a')
+    two = cache.tenant_cache(str(tmp_path), 'https://api.prismacloud.io b')
+    one.set(['a', ], 1)
+
+    assert two.get(['a', ]) is None
+
+
+def test_catalog_ttl(tmp_path, clock):
+    listing = [{'name': 'a', 'systemDefault': True}, {'name': 'b', 'systemDefault': False}]
+    tenant = FakeTenant({'policy': listing})
+
+    def get_catalog():
+        module = FakeModule(dict(FACTS_PARAMS, catalog_cache=True, cache_dir=str(tmp_path), systemDefault=True))
+        client = pc.PrismaCloudRequest(module)
+        client.connection = tenant
+        return client.get_catalog(['policy', ]), client.cache_hits
+
+    assert get_catalog() == (listing, {})
+    # Only the system defaults are cached.
+    clock.now += 3600
+    assert get_catalog() == (listing[:1], {'GET /policy': 1})
+    clock.now += 1
+    assert get_catalog() == (listing, {})
+    assert len(tenant.calls) == 2
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import json
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FACTS_FIELDS
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FACTS_PARAMS
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FailJson
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeModule
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeTenant
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import policies
+
+
+DETAILS_PATH = ['policy', 'policyId']
+
+
+def make_client(tenant=None, **params):
+    module = FakeModule(dict(FACTS_PARAMS))
+    module.params.update(params)
+    client = pc.PrismaCloudRequest(module)
+    if tenant is not None:
+        client.connection = tenant
+
+    return client
+
+
+def facts(listing, client=None, **kwargs):
+    if client is None:
+        client = make_client()
+
+    return client.get_facts_from(listing, 'name', FACTS_FIELDS, DETAILS_PATH, (1, ), **kwargs)
+
+
+def names(result):
+    return [x['name'] for x in result['listing']]
+
+
+@pytest.fixture
+def listing():
+    return policies(500)
+
+
+def test_output_file(listing, tmp_path):
+    out = str(tmp_path / 'out.json')
+    client = make_client(output_file=out, cloudType='aws')
+
+    ans = facts(listing, client)
+
+    with open(out) as fd:
+        written = [json.loads(x) for x in fd]
+    assert ans['total'] == len(written)
+    assert [x['name'] for x in written] == [x['name'] for x in listing if x['cloudType'] == 'aws']
+
+
+def test_write_facts_missing_directory(tmp_path):
+    client = make_client()
+
+    with pytest.raises(FailJson, match='failed to write'):
+        client.write_facts([{'name': 'a'}], str(tmp_path / 'missing' / 'out.json'))
+
+
+def test_duplicate_names(listing):
+    listing = listing[:10] + [dict(listing[3], policyId='other'), ]
+    client = make_client(name=listing[3]['name'])
+
+    ans = facts(listing, client)
+
+    assert [x['policyId'] for x in ans['listing']] == [listing[3]['policyId'], 'other']
+
+
+def test_unique_primary_stops_early(listing):
+    listing = listing[:10] + [dict(listing[3], policyId='other'), ]
+    client = make_client(name=listing[3]['name'])
+
+    ans = facts(listing, client, unique_primary=True)
+
+    assert [x['policyId'] for x in ans['listing']] == [listing[3]['policyId'], ]
+
+
+def test_limit_offset_sort(listing):
+    client = make_client(sort_by='name', sort_order='desc', limit=5, offset=2)
+
+    assert names(facts(listing, client)) == sorted((x['name'] for x in listing), reverse=True)[2:7]
+
+
+def test_limit_offset_unsorted(listing):
+    client = make_client(limit=3, offset=4)
+
+    assert names(facts(listing, client)) == [x['name'] for x in listing[4:7]]
+
+
+def test_sort_by_severity_rank(listing):
+    ans = facts(listing, make_client(sort_by='severity'))
+
+    severities = [x['severity'] for x in ans['listing']]
+    assert severities == sorted(severities, key=('low', 'medium', 'high').index)
+
+
+def test_sort_by_list_field(listing):
+    ans = facts(listing, make_client(sort_by='labels', details=None))
+
+    labels = [x['labels'] for x in ans['listing']]
+    assert labels == sorted(labels)
+
+
+def test_sort_by_unsortable_field():
+    listing = [{'name': 'a', 'mixed': 1}, {'name': 'b', 'mixed': 'x'}]
+    client = make_client(sort_by='mixed')
+
+    with pytest.raises(FailJson, match='cannot sort by mixed'):
+        client.get_facts_from(listing, 'name', ['mixed', ])
+
+
+def test_negative_limit(listing):
+    with pytest.raises(FailJson, match='must not be negative'):
+        facts(listing, make_client(limit=-1))
+
+
+def test_id_lookup(listing):
+    item = listing[7]
+    tenant = FakeTenant({'policy/' + item['policyId']: dict(item, rule={})})
+    client = make_client(tenant, policyId=item['policyId'], details=True)
+
+    def no_listing():
+        raise AssertionError('the listing should not be needed')
+
+    ans = facts(no_listing, client, id_field='policyId')
+
+    assert ans['listing'] == [dict(item, rule={})]
+    assert len(tenant.calls) == 1
+
+
+def test_id_lookup_not_found(listing):
+    item = listing[7]
+    tenant = FakeTenant()
+    client = make_client(tenant, policyId=item['policyId'], details=False)
+
+    ans = facts(lambda: listing, client, id_field='policyId')
+
+    assert names(ans) == [item['name'], ]
+    assert len(tenant.calls) == 1
+
+
+def test_id_lookup_details_without_fields(listing):
+    # The details can't answer a query without details, so only the
+    # listing is used.
+    item = listing[7]
+    tenant = FakeTenant({'policy/' + item['policyId']: {}})
+    client = make_client(tenant, policyId=item['policyId'], details=False)
+
+    ans = facts(lambda: listing, client, id_field='policyId', details_have_fields=False)
+
+    assert names(ans) == [item['name'], ]
+    assert tenant.calls == []
+
+
+def test_field_filter(listing):
+    ans = facts(listing, make_client(cloudType='aws'))
+
+    assert ans['total'] == len([x for x in listing if x['cloudType'] == 'aws'])
+    assert all(x['cloudType'] == 'aws' for x in ans['listing'])
+    assert sorted(ans['listing'][0]) == sorted(FACTS_FIELDS + ['name', ])
+
+
+def test_multi_value_filters(listing):
+    # More than one equality filter is answered from the hash indexes.
+    ans = facts(listing, make_client(cloudType=['aws', 'gcp'], severity='high'))
+
+    expected = [x['name'] for x in listing if x['cloudType'] in ('aws', 'gcp') and x['severity'] == 'high']
+    assert expected
+    assert names(ans) == expected
+
+
+def test_numbers_match_as_text():
+    listing = [{'name': 'a', 'accountId': '123456789012'}, {'name': 'b', 'accountId': '42'}]
+    client = make_client(accountId=123456789012)
+
+    ans = client.get_facts_from(listing, 'name', ['accountId', ])
+
+    assert names(ans) == ['a', ]
+
+
+def test_bools_are_not_converted(listing):
+    ans = facts(listing, make_client(systemDefault=True))
+
+    assert ans['total'] == len([x for x in listing if x['systemDefault'] is True])
+
+
+def test_glob_ignore_case(listing):
+    client = make_client(name='policy 000000[1-3] *', search_type='glob', ignore_case=True)
+
+    assert names(facts(listing, client)) == [listing[num]['name'] for num in (1, 2, 3)]
+
+
+def test_glob_is_case_sensitive(listing):
+    client = make_client(name='policy 000000[1-3] *', search_type='glob')
+
+    assert facts(listing, client)['total'] == 0
+
+
+def test_queries(listing):
+    client = make_client(queries=[
+        {'query_name': 'aws', 'cloudType': 'aws'},
+        {'query_name': 'high', 'severity': 'high', 'limit': 2},
+    ])
+
+    ans = facts(listing, client)
+
+    assert sorted(ans['queries']) == ['aws', 'high']
+    expected = facts(listing, make_client(cloudType='aws'))
+    del expected['changed']
+    assert ans['queries']['aws'] == expected
+    assert names(ans['queries']['high']) == [x['name'] for x in listing if x['severity'] == 'high'][:2]
+
+
+def test_queries_duplicate_name(listing):
+    client = make_client(queries=[{'query_name': 'a'}, {'query_name': 'a'}])
+
+    with pytest.raises(FailJson, match='duplicate query_name: a'):
+        facts(listing, client)
+
+
+def test_queries_module_output_file(listing, tmp_path):
+    client = make_client(output_file=str(tmp_path / 'out.json'), queries=[{'query_name': 'a'}])
+
+    with pytest.raises(FailJson, match='output_file must be set per query'):
+        facts(listing, client)
+
+
+def test_queries_duplicate_output_file(listing, tmp_path):
+    out = str(tmp_path / 'out.json')
+    client = make_client(queries=[
+        {'query_name': 'a', 'output_file': out},
+        {'query_name': 'b', 'output_file': out},
+    ])
+
+    with pytest.raises(FailJson, match='duplicate output_file'):
+        facts(listing, client)
+
+
+def test_queries_output_file(listing, tmp_path):
+    out = str(tmp_path / 'aws.json')
+    client = make_client(queries=[{'query_name': 'aws', 'cloudType': 'aws', 'output_file': out}])
+
+    ans = facts(listing, client)
+
+    with open(out) as fd:
+        written = [json.loads(x) for x in fd]
+    assert ans['queries']['aws']['total'] == len(written)
+    assert written == facts(listing, make_client(cloudType='aws'))['listing']
+
+
+def test_send_requests_batches():
+    tenant = FakeTenant(dict(('policy/{0}'.format(num), {'num': num}) for num in range(19)))
+    client = make_client(tenant)
+    requests = [['GET', ['policy', '{0}'.format(num)], None, None] for num in range(20)]
+
+    ans = client.send_requests(requests, 2)
+
+    assert ans == [{'num': num} for num in range(19)] + [None, ]
+    assert [len(x['requests']) for x in tenant.calls] == [2 * pc.REQUESTS_PER_WORKER, 4]
+    # Every round trip is part of the same module invocation.
+    invocations = [x['invocation'] for x in tenant.calls]
+    assert invocations == [[client._invocation_id, 'prismacloud_test', None]] * 2
+    assert client.stats()['endpoints']['GET /policy/{id}']['requests'] == 20
+
+
+def test_send_requests_error():
+    tenant = FakeTenant(errors={'policy/1': 'AuthenticationError'})
+    client = make_client(tenant)
+
+    with pytest.raises(FailJson, match='error for policy/1'):
+        client.send_requests([['GET', ['policy', '1'], None, None]])
+
+
+def test_not_found_fails():
+    client = make_client(FakeTenant())
+
+    with pytest.raises(FailJson, match='error for policy/gone'):
+        client.get(['policy', 'gone'])
+
+
+def test_not_found_raised_on_request():
+    client = make_client(FakeTenant())
+
+    with pytest.raises(errors.ObjectNotFoundError):
+        client.get(['policy', 'gone'], raise_not_found=True)
+
+
+def test_details_of_deleted_item(listing):
+    # The first item was deleted between the listing and its details.
+    tenant = FakeTenant(dict(('policy/' + x['policyId'], x) for x in listing[1:3]))
+    client = make_client(tenant, details=True)
+
+    assert names(facts(listing[:3], client)) == [x['name'] for x in listing[1:3]]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import gzip
+import json
+import os
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import snapshot
+
+
+STANDARD = {'id': 'c1', 'name': 'Standard 1'}
+REQUIREMENT = {'id': 'r1', 'name': 'Requirement 1'}
+RECORDS = [
+    {'type': 'policy', 'id': 'p1', 'parent': None, 'item': {'policyId': 'p1', 'name': 'a'},
+     'details': {'policyId': 'p1', 'name': 'a', 'rule': {}}},
+    {'type': 'policy', 'id': 'p2', 'parent': None, 'item': {'policyId': 'p2', 'name': 'b'},
+     'details': None},
+    {'type': 'compliance_standard', 'id': 'c1', 'parent': None, 'item': STANDARD, 'details': STANDARD},
+    {'type': 'compliance_requirement', 'id': 'r1', 'parent': 'c1', 'item': REQUIREMENT, 'details': REQUIREMENT},
+    {'type': 'compliance_section', 'id': '1.1', 'parent': 'r1', 'item': {'id': 's1', 'sectionId': '1.1'},
+     'details': None},
+]
+
+
+def write_snapshot(path, records):
+    with gzip.open(path, 'wb') as fd:
+        for record in records:
+            fd.write(json.dumps(record).encode('utf-8') + b'\n')
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / 'snapshot.json.gz')
+    write_snapshot(path, RECORDS)
+    return snapshot.Snapshot(path)
+
+
+@pytest.mark.parametrize('path,expected', [
+    (['cloud', 'name'], ('cloud_account', None, None)),
+    (['cloud', 'aws', 'a1'], ('cloud_account', None, 'a1')),
+    (['cloud', 'group'], ('account_group', None, None)),
+    (['cloud', 'group', 'g1'], ('account_group', None, 'g1')),
+    (['policy', ], ('policy', None, None)),
+    (['policy', 'p1'], ('policy', None, 'p1')),
+    (['compliance', ], ('compliance_standard', None, None)),
+    (['compliance', 'c1'], ('compliance_standard', None, 'c1')),
+    (['compliance', 'requirement', 'r1'], ('compliance_requirement', None, 'r1')),
+    (['compliance', 'c1', 'requirement'], ('compliance_requirement', 'c1', None)),
+    (['compliance', 'r1', 'section'], ('compliance_section', 'r1', None)),
+    (['policy', 1], ('policy', None, '1')),
+])
+def test_route(path, expected):
+    assert snapshot.route(path) == expected
+
+
+@pytest.mark.parametrize('path', [
+    ['alert', ],
+    ['cloud', ],
+    ['policy', 'p1', 'status'],
+    ['compliance', 'c1', 'other'],
+])
+def test_route_unknown(path):
+    assert snapshot.route(path) is None
+
+
+def test_listing(source):
+    assert [x['name'] for x in source.send_request('GET', ['policy', ])] == ['a', 'b']
+    assert source.send_request('GET', ['compliance', 'c1', 'requirement']) == [REQUIREMENT, ]
+    assert source.send_request('GET', ['compliance', 'other', 'requirement']) == []
+
+
+def test_details(source):
+    assert source.send_request('GET', ['policy', 'p1'])['rule'] == {}
+    assert source.send_request('GET', ['compliance', 'requirement', 'r1']) == REQUIREMENT
+
+
+def test_details_not_in_snapshot(source):
+    # The listing has p2, but its details weren't saved.
+    with pytest.raises(errors.ObjectNotFoundError):
+        source.send_request('GET', ['policy', 'p2'])
+
+
+def test_not_a_get(source):
+    with pytest.raises(errors.PrismaCloudError, match='POST is not supported'):
+        source.send_request('POST', ['policy', ], data={})
+
+
+def test_path_not_in_snapshot(source):
+    with pytest.raises(errors.PrismaCloudError, match='/alert is not in the snapshot'):
+        source.send_request('GET', ['alert', ])
+
+
+def test_missing_snapshot(tmp_path):
+    source = snapshot.Snapshot(str(tmp_path / 'missing.json.gz'))
+
+    with pytest.raises(errors.PrismaCloudError, match='failed to read snapshot'):
+        source.send_request('GET', ['policy', ])
+
+
+def test_index_cache_is_rebuilt(source):
+    assert len(source.send_request('GET', ['policy', ])) == 2
+    write_snapshot(source.path, RECORDS[:1])
+    # Make sure the version changes, even on coarse mtimes.
+    st = os.stat(source.path)
+    os.utime(source.path, (st.st_atime, st.st_mtime + 10))
+
+    assert len(snapshot.Snapshot(source.path).send_request('GET', ['policy', ])) == 1
+
+
+def test_send_requests(source):
+    ans = source.send_requests([
+        ['GET', ['policy', 'p1'], None, None],
+        ['GET', ['policy', 'p2'], None, None],
+    ])
+
+    assert ans['results'][0]['response']['policyId'] == 'p1'
+    assert ans['results'][1]['error'] == 'ObjectNotFoundError'
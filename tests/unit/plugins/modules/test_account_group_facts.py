@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.modules import (
+    prismacloud_account_group_facts as account_group_facts,
+)
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeTenant
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import run_module
+
+
+ACCOUNTS = [{'id': x, 'name': 'Account ' + x, 'cloudType': 'aws'} for x in ('a1', 'a2', 'a3', 'a4')]
+GROUPS = [
+    {'id': 'g1', 'name': 'Group 1', 'accountIds': ['a3', 'a1']},
+    {'id': 'g2', 'name': 'Group 2', 'accountIds': ['a1', 'a2', 'a3', 'gone']},
+]
+
+
+def make_tenant():
+    objects = {'cloud/group': GROUPS, 'cloud/name': ACCOUNTS}
+    objects.update(('cloud/aws/' + x['id'], dict(x, details=True)) for x in ACCOUNTS)
+    return FakeTenant(objects)
+
+
+def test_expand_accounts(monkeypatch):
+    tenant = make_tenant()
+
+    ans = run_module(monkeypatch, account_group_facts, {'expand_accounts': True}, tenant)
+
+    assert [[y['id'] for y in x['cloudAccounts']] for x in ans['listing']] == [['a3', 'a1'], ['a1', 'a2', 'a3']]
+    assert len(tenant.calls) == 2
+
+
+def test_expand_account_details(monkeypatch):
+    tenant = make_tenant()
+    params = {'expand_accounts': True, 'account_details': True}
+
+    ans = run_module(monkeypatch, account_group_facts, params, tenant)
+
+    assert all(y['details'] for x in ans['listing'] for y in x['cloudAccounts'])
+    # Each account's details are retrieved once, in the order first seen.
+    fetched = [x[1][2] for call in tenant.calls for x in call['requests'] if len(x[1]) == 3]
+    assert fetched == ['a3', 'a1', 'a2']
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.modules import (
+    prismacloud_compliance_standard_requirement_facts as requirement_facts,
+)
+from ansible_collections.paloaltonetworks.prismacloud.plugins.modules import (
+    prismacloud_compliance_standard_requirement_section_facts as section_facts,
+)
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FailJson
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeTenant
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import run_module
+
+
+REQUIREMENTS = [
+    {'id': 'r1', 'name': 'Requirement 1', 'systemDefault': True},
+    {'id': 'r2', 'name': 'Requirement 2', 'systemDefault': False},
+]
+
+
+def test_requirements(monkeypatch):
+    tenant = FakeTenant({'compliance/c1/requirement': REQUIREMENTS})
+
+    ans = run_module(monkeypatch, requirement_facts, {'complianceId': 'c1', 'systemDefault': True}, tenant)
+
+    assert [x['id'] for x in ans['listing']] == ['r1', ]
+
+
+def test_requirements_bad_compliance_id(monkeypatch):
+    params = {'complianceId': 'does-not-exist'}
+
+    with pytest.raises(FailJson, match='error for compliance/does-not-exist/requirement'):
+        run_module(monkeypatch, requirement_facts, params, FakeTenant())
+
+
+def test_sections_bad_requirement_id(monkeypatch):
+    params = {'requirementId': 'does-not-exist'}
+
+    with pytest.raises(FailJson, match='error for compliance/does-not-exist/section'):
+        run_module(monkeypatch, section_facts, params, FakeTenant())
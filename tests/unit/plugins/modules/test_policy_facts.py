@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.modules import prismacloud_policy_facts as policy_facts
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FailJson
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeTenant
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import policies
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import run_module
+
+
+def make_tenant(listing, failing=None):
+    objects = {'policy': listing}
+    objects.update(('policy/' + x['policyId'], dict(x, rule={})) for x in listing)
+    errors = {}
+    if failing is not None:
+        key = 'policy/' + failing['policyId']
+        del objects[key]
+        errors[key] = 'AuthenticationError'
+
+    return FakeTenant(objects, errors)
+
+
+def details_fetched(tenant):
+    return [x[1][1] for call in tenant.calls for x in call['requests'] if len(x[1]) == 2]
+
+
+@pytest.fixture
+def params(tmp_path):
+    return {'incremental': True, 'details': True, 'cache_dir': str(tmp_path), 'concurrency': 1}
+
+
+def test_sync(monkeypatch, params):
+    listing = policies(20)
+    tenant = make_tenant(listing)
+
+    ans = run_module(monkeypatch, policy_facts, params, tenant)
+
+    assert ans['sync'] == {'added': 20, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    assert len(details_fetched(tenant)) == 20
+    assert ans['listing'][0]['rule'] == {}
+
+
+def test_sync_only_fetches_changes(monkeypatch, params):
+    listing = policies(20)
+    run_module(monkeypatch, policy_facts, params, make_tenant(listing))
+    listing = listing[1:]
+    for item in listing[:2]:
+        item['lastModifiedOn'] += 1
+    tenant = make_tenant(listing)
+
+    ans = run_module(monkeypatch, policy_facts, params, tenant)
+
+    assert ans['sync'] == {'added': 0, 'updated': 2, 'removed': 1, 'unchanged': 17}
+    assert details_fetched(tenant) == [x['policyId'] for x in listing[:2]]
+    assert ans['total'] == 19
+
+
+def test_sync_resumes(monkeypatch, params):
+    # The sync fails in its third batch of details, after saving the
+    # progress of the first two.
+    listing = policies(20)
+    failing = make_tenant(listing, listing[18])
+    with pytest.raises(FailJson):
+        run_module(monkeypatch, policy_facts, params, failing)
+    tenant = make_tenant(listing)
+
+    ans = run_module(monkeypatch, policy_facts, params, tenant)
+
+    assert ans['sync'] == {'added': 4, 'updated': 0, 'removed': 0, 'unchanged': 16}
+    assert details_fetched(tenant) == [x['policyId'] for x in listing[16:]]
+
+
+def test_sync_needs_details(monkeypatch, params):
+    tenant = make_tenant(policies(20))
+
+    ans = run_module(monkeypatch, policy_facts, dict(params, details=False), tenant)
+
+    assert 'sync' not in ans
+    assert details_fetched(tenant) == []
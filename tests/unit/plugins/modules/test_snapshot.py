@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import json
+import os
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.modules import prismacloud_snapshot as snapshot_module
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FailJson
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import FakeTenant
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import policies
+from ansible_collections.paloaltonetworks.prismacloud.tests.unit.utils import run_module
+
+
+@pytest.fixture
+def tenant():
+    listing = policies(10)
+    objects = {
+        'cloud/name': [],
+        'cloud/group': [],
+        'policy': listing,
+        'compliance': [{'id': 'c1', 'name': 'Standard 1'}],
+        'compliance/c1': {'id': 'c1', 'name': 'Standard 1'},
+        'compliance/c1/requirement': [{'id': 'r1', 'name': 'Requirement 1'}],
+        'compliance/requirement/r1': {'id': 'r1', 'name': 'Requirement 1'},
+        'compliance/r1/section': [{'id': 's1', 'sectionId': '1.1'}],
+    }
+    objects.update(('policy/' + x['policyId'], dict(x, rule={})) for x in listing)
+    return FakeTenant(objects)
+
+
+def test_snapshot(monkeypatch, tenant, tmp_path):
+    params = {'output_file': str(tmp_path / 'snapshot.json.gz')}
+
+    ans = run_module(monkeypatch, snapshot_module, params, tenant)
+
+    assert ans['counts'] == {
+        'policy': 10,
+        'compliance_standard': 1,
+        'compliance_requirement': 1,
+        'compliance_section': 1,
+    }
+    with open(ans['manifest_file']) as fd:
+        manifest = json.load(fd)
+    assert manifest['checksum'] == ans['checksum']
+    assert manifest['total'] == 13
+
+
+def test_manifest_missing_directory(monkeypatch, tenant, tmp_path):
+    params = {
+        'output_file': str(tmp_path / 'snapshot.json.gz'),
+        'manifest_file': str(tmp_path / 'missing' / 'manifest.json'),
+    }
+
+    with pytest.raises(FailJson, match='failed to write'):
+        run_module(monkeypatch, snapshot_module, params, tenant)
+
+
+def test_manifest_write_error(monkeypatch, tenant, tmp_path):
+    def broken(fd, mode):
+        os.close(fd)
+        raise IOError('No space left on device')
+
+    monkeypatch.setattr(snapshot_module.os, 'fdopen', broken)
+    params = {'output_file': str(tmp_path / 'snapshot.json.gz')}
+
+    with pytest.raises(FailJson, match='No space left on device'):
+        run_module(monkeypatch, snapshot_module, params, tenant)
+    # Only the snapshot is left, not the temp file of the manifest.
+    assert os.listdir(str(tmp_path)) == ['snapshot.json.gz']
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import io
+import json
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.cassette import Cassette
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.cassette import Response
+
+
+TENANT = 'https://api.prismacloud.io 0f2b1c3d-access-key-id acme'
+LOGIN = json.dumps({'username': '0f2b1c3d-access-key-id', 'password': 'hunter2', 'customerName': 'acme'})
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cassette.jsonl')
+
+
+def record(path, tenant=TENANT):
+    cassette = Cassette(path, tenant)
+    cassette.record(
+        'POST', '/login', LOGIN,
+        Response(200, {'Content-Type': 'application/json'}), io.BytesIO(b'{"token": "abc.def"}'), 0.1)
+    cassette.record('GET', '/policy', 'null', Response(200, {}), io.BytesIO(b'[{"name": "a"}]'), 0.2)
+    cassette.close()
+
+
+def test_no_credentials_written(path):
+    record(path)
+
+    with open(path) as fd:
+        text = fd.read()
+    assert 'access-key-id' not in text
+    assert 'hunter2' not in text
+    assert 'abc.def' not in text
+    assert 'api.prismacloud.io' not in text
+
+
+def test_replay(path):
+    record(path)
+    cassette = Cassette(path, TENANT, 'replay')
+
+    resp, data = cassette.play('GET', '/policy', 'null')
+
+    assert resp.getcode() == 200
+    assert json.loads(data.getvalue().decode('utf-8')) == [{'name': 'a'}]
+    # The login matches, though its secrets were scrubbed.
+    resp, data = cassette.play('POST', '/login', LOGIN)
+    assert json.loads(data.getvalue().decode('utf-8')) == {'token': '********'}
+
+
+def test_replay_other_tenant(path):
+    record(path)
+    cassette = Cassette(path, 'https://api2.prismacloud.io other-key ', 'replay')
+
+    with pytest.raises(KeyError):
+        cassette.play('GET', '/policy', 'null')
+
+
+def test_replay_unhashed_tenant(path):
+    # Recorded before the tenant was hashed.
+    with open(path, 'w') as fd:
+        fd.write(json.dumps({
+            'tenant': TENANT, 'time': 0, 'method': 'GET', 'path': '/policy', 'request': None,
+            'status': 200, 'headers': {}, 'elapsed': 0, 'response': [],
+        }) + '\n')
+    cassette = Cassette(path, TENANT, 'replay')
+
+    resp, data = cassette.play('GET', '/policy', 'null')
+
+    assert data.getvalue() == b'[]'
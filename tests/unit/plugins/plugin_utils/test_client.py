@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import json
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import errors
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils import client as client_module
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.six.moves.urllib.error import URLError
+
+
+URL = 'https://api.prismacloud.io'
+
+
+class Response(object):
+    def __init__(self, body):
+        self.body = body
+
+    def read(self):
+        return self.body
+
+
+def http_error(code, reason, status=None):
+    headers = {}
+    if status is not None:
+        headers['X-Redlock-Status'] = status
+    return HTTPError(URL, code, reason, headers, None)
+
+
+class FakeOpenUrl(object):
+    """Stands in for open_url, answering each request from a list of
+    responses (bytes) or exceptions to raise, in order.
+    """
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def __call__(self, url, data=None, headers=None, method=None, **kwargs):
+        self.calls.append({'url': url, 'method': method, 'headers': headers, 'data': data})
+        ans = self.answers.pop(0)
+        if isinstance(ans, Exception):
+            raise ans
+        return Response(ans)
+
+
+def login(token):
+    return json.dumps({'token': token}).encode('utf-8')
+
+
+@pytest.fixture
+def client():
+    return client_module.PrismaCloudClient(URL, 'user', 'secret')
+
+
+def serve(monkeypatch, *answers):
+    open_url = FakeOpenUrl(*answers)
+    monkeypatch.setattr(client_module, 'open_url', open_url)
+    return open_url
+
+
+def test_logs_in_once(monkeypatch, client):
+    open_url = serve(monkeypatch, login('t1'), b'[]', b'{"a": 1}')
+
+    assert client.get(['policy', ]) == []
+    assert client.get(['policy', 'p1']) == {'a': 1}
+
+    assert [x['url'] for x in open_url.calls] == [URL + '/login', URL + '/policy', URL + '/policy/p1']
+    assert open_url.calls[2]['headers']['x-redlock-auth'] == 't1'
+
+
+def test_relogin(monkeypatch, client):
+    # The token expires, so the client logs in again and retries.
+    open_url = serve(monkeypatch, login('t1'), http_error(401, 'Unauthorized'), login('t2'), b'[]')
+
+    assert client.get(['policy', ]) == []
+
+    assert [x['url'] for x in open_url.calls] == [URL + '/login', URL + '/policy', URL + '/login', URL + '/policy']
+    assert open_url.calls[3]['headers']['x-redlock-auth'] == 't2'
+    assert client.token == 't2'
+
+
+def test_relogin_once(monkeypatch, client):
+    serve(monkeypatch, login('t1'), http_error(401, 'Unauthorized'), login('t2'), http_error(401, 'Unauthorized'))
+
+    with pytest.raises(errors.AuthenticationError):
+        client.get(['policy', ])
+
+
+def test_login_without_token(monkeypatch, client):
+    serve(monkeypatch, b'{}')
+
+    with pytest.raises(errors.AuthenticationError, match='invalid authentication credentials'):
+        client.get(['policy', ])
+
+
+@pytest.mark.parametrize('code,status,error,message', [
+    (400, '[{"i18nKey": "not_found"}]', errors.ObjectNotFoundError, 'object not found'),
+    (400, '[{"i18nKey": "invalid_id"}]', errors.ObjectNotFoundError, 'object not found'),
+    (400, '[{"i18nKey": "policy_name_already_exists"}]', errors.AlreadyExistsError, 'object already exists'),
+    (400, '[{"i18nKey": "something_else"}]', errors.PrismaCloudError, 'error'),
+    (500, None, errors.PrismaCloudError, 'HTTP 500: Server Error'),
+    # Malformed headers fall back to the HTTP status.
+    (400, 'not json', errors.PrismaCloudError, 'HTTP 400: Bad Request'),
+    (400, '[{}]', errors.PrismaCloudError, 'HTTP 400: Bad Request'),
+    (400, '5', errors.PrismaCloudError, 'HTTP 400: Bad Request'),
+    (400, '[5]', errors.PrismaCloudError, 'HTTP 400: Bad Request'),
+])
+def test_error_mapping(monkeypatch, client, code, status, error, message):
+    reason = {400: 'Bad Request', 500: 'Server Error'}[code]
+    serve(monkeypatch, login('t1'), http_error(code, reason, status))
+
+    with pytest.raises(error) as e:
+        client.get(['policy', 'p1'])
+
+    assert type(e.value) is error
+    assert e.value.args[0] == message
+
+
+def test_connect_error(monkeypatch, client):
+    serve(monkeypatch, URLError('connection refused'))
+
+    with pytest.raises(errors.PrismaCloudError, match='failed to connect to .*connection refused'):
+        client.get(['policy', ])
+
+
+def test_response_not_json(monkeypatch, client):
+    serve(monkeypatch, login('t1'), b'<html>')
+
+    with pytest.raises(errors.ResponseNotJson):
+        client.get(['policy', ])
+
+
+def test_get_many_not_found(monkeypatch, client):
+    serve(monkeypatch, login('t1'), b'{"a": 1}', http_error(400, 'Bad Request', '[{"i18nKey": "not_found"}]'))
+
+    assert client.get_many([['policy', 'p1'], ['policy', 'p2']]) == [{'a': 1}, None]
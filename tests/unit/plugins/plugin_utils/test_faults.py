@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import io
+import json
+import sys
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.httpapi import prismacloud as httpapi
+from ansible_collections.paloaltonetworks.prismacloud.plugins.plugin_utils.faults import FaultInjector
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+
+
+OPTIONS = {
+    'customer_name': None,
+    'metrics_file': None,
+    'trace_file': None,
+    'slow_request_threshold': None,
+    'profile_dir': None,
+    'cassette_file': None,
+    'fault_injection': None,
+}
+
+
+class Response(object):
+    def __init__(self, body):
+        self.body = body
+
+    def getcode(self):
+        return 200
+
+    def getheader(self, name, default=None):
+        return default
+
+    def read(self):
+        return self.body
+
+
+def open_url(url, data=None, method=None, headers=None):
+    """Answers as the tenant, with a new token for each login."""
+    TENANT['sent'].append((method, url, dict(headers or {})))
+    if url.endswith('/login'):
+        TENANT['logins'] += 1
+        return Response(json.dumps({'token': 't{0}'.format(TENANT['logins'])}).encode('utf-8'))
+    return Response(b'[{"name": "a"}]')
+
+
+TENANT = {}
+
+# Expires the token of the first attempt at GET /policy, but not the
+# second, with expire_rate 0.5.
+SEED = 35
+
+
+class FakeConnection(object):
+    """Sends requests with this module's open_url, handling HTTP errors the
+    way the httpapi connection does.
+    """
+    _url = 'https://api.prismacloud.io'
+
+    def __init__(self):
+        self._auth = None
+        self.api = None
+
+    def _connect(self):
+        if self._auth is None:
+            self.api.login('user', 'secret')
+
+    def get_option(self, name):
+        return {'remote_user': 'user', 'password': 'secret'}[name]
+
+    def queue_message(self, level, message):
+        pass
+
+    def send(self, path, data, **kwargs):
+        headers = dict(kwargs.get('headers') or {})
+        headers.update(self._auth or {})
+        try:
+            response = open_url(self._url + path, data=data, method=kwargs.get('method'), headers=headers)
+        except HTTPError as exc:
+            handled = self.api.handle_httperror(exc)
+            if handled is True:
+                return self.send(path, data, **kwargs)
+            elif handled is False:
+                raise
+            response = handled
+
+        return response, io.BytesIO(response.read())
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # Restored after each test, along with the faults patched into it.
+    monkeypatch.setattr(sys.modules[__name__], 'open_url', open_url)
+    TENANT.clear()
+    TENANT.update(sent=[], logins=0)
+    connection = FakeConnection()
+    ans = connection.api = httpapi.HttpApi(connection)
+    ans._options = dict(OPTIONS)
+    return ans
+
+
+def send(api, config, path=('policy', )):
+    api._options['fault_injection'] = config
+    return api.send_requests([['GET', list(path), None, None]])
+
+
+@pytest.mark.parametrize('config', [
+    {'default': {'error_codes': []}},
+    {'endpoints': {'GET /policy': {'error_codes': []}}},
+])
+def test_empty_error_codes(config):
+    with pytest.raises(ValueError, match='error_codes for .* must not be empty'):
+        FaultInjector(config)
+
+
+def test_unknown_settings():
+    with pytest.raises(ValueError, match='unknown settings for default: error_rates'):
+        FaultInjector({'default': {'error_rates': 1}})
+
+
+def test_no_faults(api):
+    ans = send(api, {'default': {}})
+
+    assert ans['results'] == [{'response': [{'name': 'a'}]}]
+
+
+def test_expired_token(api):
+    # The token expired, so the connection logs in again and retries, as
+    # it would against the tenant.
+    ans = send(api, {'seed': SEED, 'endpoints': {'GET /policy': {'expire_rate': 0.5}}})
+
+    assert ans['results'] == [{'response': [{'name': 'a'}]}]
+    assert TENANT['logins'] == 2
+    assert ans['records'][-1]['retries'] == 1
+    # Only the retry, with the new token, reached the tenant.
+    assert [(x[0], x[2].get('x-redlock-auth')) for x in TENANT['sent'] if x[0] == 'GET'] == [('GET', 't2')]
+
+
+def test_token_keeps_expiring(api):
+    with pytest.raises(HTTPError, match='401'):
+        send(api, {'endpoints': {'GET /policy': {'expire_rate': 1}}})
+
+    assert TENANT['logins'] == 1 + httpapi.LOGIN_RETRIES
+
+
+def test_throttled(api):
+    ans = send(api, {'endpoints': {'GET /policy': {'throttle_rate': 1}}})
+
+    assert ans['results'][0]['message'] == 'error'
+    assert ans['results'][0]['errlist'][0]['i18nKey'] == 'too_many_requests'
+    assert [x['status'] for x in ans['records']] == [200, 429]
+    # The request never reached the tenant.
+    assert [x[0] for x in TENANT['sent']] == ['POST']
+
+
+def test_server_error(api):
+    ans = send(api, {'endpoints': {'GET /policy/{id}': {'error_rate': 1, 'error_codes': [500]}}}, ['policy', 'p1'])
+
+    assert ans['results'][0]['errlist'][0]['i18nKey'] == 'internal_server_error'
+    assert ans['records'][-1]['status'] == 500
+
+
+def test_faults_are_not_recorded(api, tmp_path):
+    api._options['cassette_file'] = str(tmp_path / 'cassette.jsonl')
+    api._options.update(cassette_mode='record', cassette_timing=False, cassette_scrub_fields=[])
+
+    send(api, {'endpoints': {'GET /policy': {'throttle_rate': 1}}})
+    api.logout()
+
+    with open(api._options['cassette_file']) as fd:
+        assert [json.loads(x)['path'] for x in fd] == ['/login']
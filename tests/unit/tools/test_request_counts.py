@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import json
+import os
+import sys
+
+import pytest
+
+from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+
+
+TOOLS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), 'tools')
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, ), reason='tools/benchmark.py requires python 3')
+
+
+@pytest.fixture(scope='module')
+def benchmark():
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location('benchmark', os.path.join(TOOLS, 'benchmark.py'))
+    ans = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ans)
+    return ans
+
+
+def baseline():
+    with open(os.path.join(TOOLS, 'benchmark_baseline.json')) as fd:
+        return json.load(fd)['counts']
+
+
+def test_baseline_covers_the_scenarios(benchmark):
+    expected = ['{0}[{1}]'.format(name, size) for name, _ in benchmark.COUNTS for size in benchmark.COUNT_SIZES]
+
+    assert sorted(baseline()) == sorted(expected)
+
+
+@pytest.mark.parametrize('key', sorted(baseline()))
+def test_request_counts(benchmark, key):
+    # A change in the counts must update tools/benchmark_baseline.json.
+    name, size = key[:-1].split('[')
+    count = dict(benchmark.COUNTS)[name]
+
+    assert count(pc, int(size)) == baseline()[key]
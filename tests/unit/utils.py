@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import hashlib
+import os
+import random
+import shutil
+
+
+CLOUD_TYPES = ('aws', 'azure', 'gcp', 'alibaba_cloud')
+
+POLICY_TYPES = ('config', 'network', 'audit_event')
+
+SEVERITIES = ('low', 'medium', 'high')
+
+WORDS = ('alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta')
+
+LABELS = ('PCI', 'HIPAA', 'CIS', 'GDPR', 'SOC2', 'NIST')
+
+
+class FailJson(Exception):
+    """Raised by FakeModule.fail_json, with the msg."""
+
+
+class ExitJson(Exception):
+    """Raised by FakeModule.exit_json, with the results."""
+
+
+class FakeModule(object):
+    """Stands in for AnsibleModule, with the params already parsed."""
+    _name = 'prismacloud_test'
+    _socket_path = os.devnull
+    check_mode = False
+
+    def __init__(self, params):
+        self.params = params
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+    def exit_json(self, **kwargs):
+        raise ExitJson(kwargs)
+
+    def add_cleanup_file(self, path):
+        pass
+
+    def atomic_move(self, src, dest):
+        shutil.move(src, dest)
+
+    def sha256(self, path):
+        with open(path, 'rb') as fd:
+            return hashlib.sha256(fd.read()).hexdigest()
+
+
+class FakeTenant(object):
+    """Stands in for the connection, answering GETs from a dict of paths.
+
+    Paths not in objects are not found, unless errors has another error
+    for them.
+    """
+    def __init__(self, objects=None, errors=None):
+        self.objects = objects or {}
+        self.errors = errors or {}
+        self.calls = []
+
+    def send_requests(self, requests, workers=1, invocation=None):
+        self.calls.append({'requests': requests, 'workers': workers, 'invocation': invocation})
+        ans = {'results': [], 'records': [], 'invocation': None}
+        for method, path, query, data in requests:
+            key = '/'.join(path)
+            if key in self.objects:
+                ans['results'].append({'response': self.objects[key]})
+            else:
+                ans['results'].append({
+                    'error': self.errors.get(key, 'ObjectNotFoundError'),
+                    'message': 'error for {0}'.format(key),
+                    'errlist': [],
+                })
+            ans['records'].append({
+                'method': method,
+                'path': '/' + '/'.join('{id}' if num % 2 else x for num, x in enumerate(path)),
+                'status': 200 if key in self.objects else 400,
+                'bytes_out': 0, 'bytes_in': 0, 'elapsed': 0.001, 'retries': 0,
+            })
+
+        return ans
+
+    def tenant(self):
+        return 'https://api.prismacloud.io admin'
+
+
+def with_defaults(spec, params):
+    """Returns the params, with the default of the spec for any not given."""
+    ans = {}
+    for name, opts in spec.items():
+        val = params.get(name, opts.get('default'))
+        if isinstance(val, dict) and 'options' in opts:
+            val = with_defaults(opts['options'], val)
+        ans[name] = val
+
+    return ans
+
+
+def run_module(monkeypatch, module, params, tenant):
+    """Runs the main() of a module with the params, against the tenant.
+
+    Returns the results it exited with, or raises FailJson if it failed.
+    """
+    from ansible_collections.paloaltonetworks.prismacloud.plugins.module_utils import prismacloud as pc
+
+    def make(argument_spec, **kwargs):
+        return FakeModule(with_defaults(argument_spec, params))
+
+    monkeypatch.setattr(module, 'AnsibleModule', make)
+    monkeypatch.setattr(pc, 'Connection', lambda socket_path: tenant)
+    try:
+        module.main()
+    except ExitJson as e:
+        return e.args[0]
+
+    raise AssertionError('{0} did not exit'.format(module.__name__))
+
+
+def policies(size, seed=0):
+    """Returns a synthetic policy listing of the given size."""
+    rand = random.Random(seed)
+    return [{
+        'policyId': '{0:08x}-{1:04x}-{2:012x}'.format(num, rand.getrandbits(16), rand.getrandbits(48)),
+        'name': 'Policy {0:07d} {1}'.format(num, rand.choice(WORDS)),
+        'policyType': rand.choice(POLICY_TYPES),
+        'cloudType': rand.choice(CLOUD_TYPES),
+        'severity': rand.choice(SEVERITIES),
+        'systemDefault': rand.random() < 0.8,
+        'enabled': rand.random() < 0.9,
+        'labels': rand.sample(LABELS, rand.randint(0, 3)),
+        'lastModifiedOn': 1577836800000 + rand.randint(0, 10 ** 10),
+    } for num in range(size)]
+
+
+# The params of the policy facts module, with their defaults.
+FACTS_PARAMS = {
+    'name': None,
+    'policyId': None,
+    'policyType': None,
+    'systemDefault': None,
+    'cloudType': None,
+    'severity': None,
+    'details': False,
+    'search_type': 'exact',
+    'ignore_case': False,
+    'output_file': None,
+    'output_compression': 'none',
+    'result_format': 'list',
+    'return_fields': None,
+    'limit': None,
+    'offset': 0,
+    'sort_by': None,
+    'sort_order': 'asc',
+    'catalog_cache': False,
+    'cache_ttl': 3600,
+    'cache_dir': None,
+    'incremental': False,
+    'concurrency': 1,
+    'source': 'api',
+    'snapshot_file': None,
+    'queries': None,
+}
+
+FACTS_FIELDS = ['policyId', 'policyType', 'systemDefault', 'cloudType', 'severity']
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Compares tools/benchmark.py results against a baseline.
+
+A benchmark regressed if its best time, or its peak memory, grew by more
+than the threshold percent.  Differences under --min-ms or --min-kb are
+noise at these sizes, and never count.  Exits with 1 if anything regressed,
+so this can gate a CI job.
+
+Timings only compare between runs on the same machine under the same load,
+so no baseline of them is kept in the repo.  Instead, run the same
+benchmarks against the base revision and the change back to back, with
+more repeats:
+
+    git worktree add /tmp/base/ansible_collections/paloaltonetworks/prismacloud origin/main
+    PYTHONPATH=/tmp/base python tools/benchmark.py --repeat 10 -o base.json
+    python tools/benchmark.py --repeat 10 -o current.json
+    python tools/compare_benchmarks.py base.json current.json
+
+The request counts of benchmark.py --counts are the same on any machine,
+so their baseline is tools/benchmark_baseline.json.  Counts must match it
+exactly:  fewer requests are welcome, but the baseline must be updated
+with them, so the next change can't quietly add them back.
+
+    python tools/benchmark.py --counts -o counts.json
+    python tools/compare_benchmarks.py tools/benchmark_baseline.json counts.json
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    """Returns the timings and the request counts of a results file."""
+    with open(path) as fd:
+        data = json.load(fd)
+
+    return data.get('results', {}), data.get('counts', {})
+
+
+def change(old, new):
+    """Returns the change from old to new, as a percent."""
+    if not old:
+        return 0.0
+    return (new - old) * 100.0 / old
+
+
+def compare(baseline, current, threshold, memory_threshold, min_ms, min_kb):
+    """Returns a row for each benchmark in both, and the regressions."""
+    rows = []
+    regressions = []
+    for key in sorted(baseline, key=lambda x: (baseline[x]['size'], x)):
+        if key not in current:
+            continue
+        old, new = baseline[key], current[key]
+
+        problems = []
+        time_change = change(old['best'], new['best'])
+        if time_change > threshold and (new['best'] - old['best']) * 1000 >= min_ms:
+            problems.append('time')
+
+        memory_change = None
+        if old.get('peak_bytes') is not None and new.get('peak_bytes') is not None:
+            memory_change = change(old['peak_bytes'], new['peak_bytes'])
+            grown = (new['peak_bytes'] - old['peak_bytes']) / 1024.0
+            if memory_change > memory_threshold and grown >= min_kb:
+                problems.append('memory')
+
+        rows.append((key, old, new, time_change, memory_change, problems))
+        if problems:
+            regressions.append(key)
+
+    return rows, regressions
+
+
+def compare_counts(baseline, current):
+    """Returns the scenarios whose counts are not the same in both."""
+    return [x for x in sorted(baseline) if x in current and baseline[x] != current[x]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n'.join(__doc__.split('\n')[2:]),
+    )
+    parser.add_argument('baseline', help='results to compare against')
+    parser.add_argument('current', help='results to check')
+    parser.add_argument('--threshold', type=float, default=25,
+                        help='percent slower that is a regression (default: 25)')
+    parser.add_argument('--memory-threshold', type=float, default=10,
+                        help='percent more peak memory that is a regression (default: 10)')
+    parser.add_argument('--min-ms', type=float, default=0.5,
+                        help='time differences smaller than this never regress (default: 0.5)')
+    parser.add_argument('--min-kb', type=float, default=256,
+                        help='peak memory differences smaller than this never regress (default: 256)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only print the regressions')
+    args = parser.parse_args(argv)
+
+    baseline, baseline_counts = load(args.baseline)
+    current, current_counts = load(args.current)
+    if baseline_counts or current_counts:
+        return main_counts(baseline_counts, current_counts, args.quiet)
+
+    rows, regressions = compare(baseline, current, args.threshold, args.memory_threshold, args.min_ms, args.min_kb)
+
+    print('{0:<40} {1:>12} {2:>12} {3:>9} {4:>9}  {5}'.format(
+        'benchmark', 'baseline ms', 'current ms', 'time', 'memory', ''))
+    for key, old, new, time_change, memory_change, problems in rows:
+        if args.quiet and not problems:
+            continue
+        print('{0:<40} {1:>12.3f} {2:>12.3f} {3:>+8.1f}% {4:>9}  {5}'.format(
+            key, old['best'] * 1000, new['best'] * 1000, time_change,
+            '-' if memory_change is None else '{0:+.1f}%'.format(memory_change),
+            'REGRESSED ({0})'.format(', '.join(problems)) if problems else '',
+        ))
+
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print('not in the current results: {0}'.format(', '.join(missing)))
+    added = sorted(set(current) - set(baseline))
+    if added:
+        print('not in the baseline: {0}'.format(', '.join(added)))
+
+    if regressions:
+        print('{0} of {1} benchmarks regressed'.format(len(regressions), len(rows)))
+        return 1
+
+    print('no regressions in {0} benchmarks'.format(len(rows)))
+    return 0
+
+
+def main_counts(baseline, current, quiet):
+    changed = compare_counts(baseline, current)
+
+    print('{0:<40} {1:>12} {2:>12}  {3}'.format('scenario', 'requests', 'round trips', ''))
+    for key in sorted(baseline, key=lambda x: (int(x.rsplit('[', 1)[1].rstrip(']')), x)):
+        if key not in current or (quiet and key not in changed):
+            continue
+        old, new = baseline[key], current[key]
+        print('{0:<40} {1:>12} {2:>12}  {3}'.format(
+            key,
+            '{0} -> {1}'.format(old['requests'], new['requests']) if key in changed else new['requests'],
+            '{0} -> {1}'.format(old['round_trips'], new['round_trips']) if key in changed else new['round_trips'],
+            'CHANGED' if key in changed else '',
+        ))
+
+    # A scenario that is missing is as much a change as different counts.
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print('not in the current counts: {0}'.format(', '.join(missing)))
+    added = sorted(set(current) - set(baseline))
+    if added:
+        print('not in the baseline: {0}'.format(', '.join(added)))
+
+    if changed or missing or added:
+        print('{0} of {1} scenarios changed, update the baseline if this is intended'.format(
+            len(changed) + len(missing) + len(added), len(set(baseline) | set(current))))
+        return 1
+
+    print('no changes in {0} scenarios'.format(len(baseline)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,448 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Load tests the collection with ansible-playbook runs against the mock.
+
+For each tenant size, a tools/mock_server.py tenant is started in this
+process with that many accounts and policies.  Then for every loop size and
+fork count, a generated playbook is run against it, with an inventory of
+--hosts hosts (by default, as many as the most forks) that all connect to
+the tenant.  Each host logs in as its own user, so it has its own
+connection, unless --shared-connection is given:  then they all share one,
+as hosts with the same address and user do.  Each host runs the tasks of
+the --workload over a loop of that many items:
+
+    accounts  onboard that many aws accounts, then remove them
+    facts     look up policies and account groups that many times
+    all       both
+
+Each run reports its wall time, the API calls the tenant served and the
+calls per task (from the prismacloud_stats callback), throttled requests,
+hosts that failed, the CPU and peak RSS of ansible-playbook, its forks and the
+connection processes, and the throughput in loop items a second.  Once
+every fork count has run, the throughput curve of each tenant and loop
+size is printed, with the speedup and efficiency against the fewest forks.
+
+    python tools/load_test.py --forks 1 2 4 8 --loops 10 --tenant-sizes 100 3000
+    python tools/load_test.py --forks 4 16 --latency 80 --rate-limit 25 -o load.json --csv load.csv
+
+To see how runs hold up against a degraded tenant, --faults takes a JSON
+file of the httpapi fault_injection setting, which every host is given:
+
+    {"seed": 1, "default": {"throttle_rate": 0.05, "error_rate": 0.01},
+     "endpoints": {"GET /policy/{id}": {"slow_rate": 0.2, "slow_seconds": 1}}}
+
+The completion of each run is the fraction of hosts that got through all
+of their items.  Injected faults never reach the tenant, so injected 429s
+are not counted as throttled.
+
+The collection must be installed where ansible-playbook finds it, such as
+with ANSIBLE_COLLECTIONS_PATH.  CPU and RSS are sampled from /proc, so on
+other platforms only the CPU of ansible-playbook and its forks is known,
+and the connection processes (which detach) are missed.
+
+Requires python 3.
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import mock_server  # noqa: E402
+
+
+ACCOUNT_TASKS = '''
+    - name: onboard accounts
+      paloaltonetworks.prismacloud.prismacloud_aws_cloud_account:
+        name: "load-{{ inventory_hostname }}-{{ item }}"
+        accountId: "{{ '%012d' % (host_index | int * 1000000 + item) }}"
+        roleArn: "arn:aws:iam::{{ '%012d' % (host_index | int * 1000000 + item) }}:role/prisma"
+        externalId: load
+        enabled: true
+      loop: "{{ range(loop_size | int) | list }}"
+
+    - name: remove accounts
+      paloaltonetworks.prismacloud.prismacloud_aws_cloud_account:
+        accountId: "{{ '%012d' % (host_index | int * 1000000 + item) }}"
+        state: absent
+      loop: "{{ range(loop_size | int) | list }}"
+'''
+
+FACTS_TASKS = '''
+    - name: policy facts
+      paloaltonetworks.prismacloud.prismacloud_policy_facts:
+        severity: high
+        sort_by: name
+        limit: 10
+      loop: "{{ range(loop_size | int) | list }}"
+
+    - name: account group facts
+      paloaltonetworks.prismacloud.prismacloud_account_group_facts:
+        expand_accounts: true
+      loop: "{{ range(loop_size | int) | list }}"
+'''
+
+WORKLOADS = {
+    'accounts': ACCOUNT_TASKS,
+    'facts': FACTS_TASKS,
+    'all': ACCOUNT_TASKS + FACTS_TASKS,
+}
+
+RECAP = re.compile(r'^\S+\s+:\s+ok=(\d+)\s+changed=(\d+)\s+unreachable=(\d+)\s+failed=(\d+)', re.M)
+
+
+class ProcessSampler(object):
+    """Samples the CPU and RSS of a process, its descendants, and the
+    ansible-connection processes started while it runs.
+
+    The connection processes detach from ansible-playbook, so they are
+    found by their command line.  CPU used in the last interval before a
+    process exits is missed.
+    """
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.cpu = {}
+        self.peak_rss = 0
+        self.peak_processes = 0
+        self.tick = os.sysconf('SC_CLK_TCK')
+        self.page = resource.getpagesize()
+        self.tracked = set([pid])
+        self.ignored = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    @staticmethod
+    def supported():
+        return os.path.isdir('/proc/self') and hasattr(os, 'sysconf')
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def cpu_seconds(self):
+        return sum(self.cpu.values()) / float(self.tick)
+
+    def _run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                break
+
+    def _stat(self, pid):
+        with open('/proc/{0}/stat'.format(pid)) as fd:
+            fields = fd.read().rpartition(')')[2].split()
+        # Fields from the state on, see proc(5).
+        return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21]) * self.page
+
+    def _is_connection(self, pid):
+        try:
+            with open('/proc/{0}/cmdline'.format(pid), 'rb') as fd:
+                return b'ansible-connection' in fd.read()
+        except (IOError, OSError):
+            return False
+
+    def sample(self):
+        stats = {}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            if pid in self.ignored:
+                continue
+            try:
+                stats[pid] = self._stat(pid)
+            except (IOError, OSError, IndexError, ValueError):
+                continue
+
+        # Parents are not always listed before their children.
+        found = True
+        while found:
+            found = False
+            for pid, (ppid, _, _) in stats.items():
+                if pid not in self.tracked and (ppid in self.tracked or self._is_connection(pid)):
+                    self.tracked.add(pid)
+                    found = True
+
+        rss = 0
+        processes = 0
+        for pid, (_, cpu, pid_rss) in stats.items():
+            if pid in self.tracked:
+                self.cpu[pid] = max(cpu, self.cpu.get(pid, 0))
+                rss += pid_rss
+                processes += 1
+            else:
+                self.ignored.add(pid)
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_processes = max(self.peak_processes, processes)
+
+
+def write_inventory(path, hosts, server, python, shared=False):
+    with open(path, 'w') as fd:
+        fd.write('[tenants]\n')
+        for num in range(hosts):
+            fd.write('load{0:04d} host_index={0}'.format(num))
+            if not shared:
+                fd.write(' ansible_user=load{0:04d}'.format(num))
+            fd.write('\n')
+        fd.write('\n[tenants:vars]\n')
+        fd.write('ansible_host=127.0.0.1\n')
+        fd.write('ansible_httpapi_port={0}\n'.format(server.port))
+        fd.write('ansible_httpapi_use_ssl=false\n')
+        fd.write('ansible_connection=ansible.netcommon.httpapi\n')
+        fd.write('ansible_network_os=paloaltonetworks.prismacloud.prismacloud\n')
+        fd.write('ansible_user={0}\n'.format(server.username))
+        fd.write('ansible_password={0}\n'.format(server.password))
+        fd.write('ansible_python_interpreter={0}\n'.format(python))
+
+
+def write_playbook(path, workload):
+    with open(path, 'w') as fd:
+        fd.write('- hosts: tenants\n  gather_facts: false\n  tasks:')
+        fd.write(WORKLOADS[workload])
+
+
+def run_playbook(args, workdir, server, forks, hosts, loop):
+    """Runs the playbook once, returning its measurements."""
+    inventory = os.path.join(workdir, 'hosts.ini')
+    playbook = os.path.join(workdir, 'load.yml')
+    stats_file = os.path.join(workdir, 'stats.json')
+    log_file = os.path.join(workdir, 'f{0}-h{1}-l{2}.log'.format(forks, hosts, loop))
+    write_inventory(inventory, hosts, server, args.python, args.shared_connection)
+    write_playbook(playbook, args.workload)
+    extra_vars = []
+    if args.faults:
+        faults_file = os.path.join(workdir, 'faults.json')
+        with open(args.faults) as fd:
+            faults = json.load(fd)
+        with open(faults_file, 'w') as fd:
+            json.dump({'ansible_httpapi_prismacloud_fault_injection': faults}, fd)
+        extra_vars = ['-e', '@{0}'.format(faults_file)]
+    if os.path.exists(stats_file):
+        os.remove(stats_file)
+
+    env = dict(os.environ)
+    enabled = [x for x in env.get('ANSIBLE_CALLBACKS_ENABLED', '').split(',') if x]
+    env['ANSIBLE_CALLBACKS_ENABLED'] = ','.join(enabled + ['paloaltonetworks.prismacloud.prismacloud_stats'])
+    env['PRISMACLOUD_STATS_FILE'] = stats_file
+    env['ANSIBLE_HOST_KEY_CHECKING'] = 'false'
+    cmd = [
+        args.ansible_playbook, '-i', inventory, playbook,
+        '-f', '{0}'.format(forks), '-e', 'loop_size={0}'.format(loop),
+    ] + extra_vars + args.ansible_arg
+
+    server.reset_stats()
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.time()
+    with open(log_file, 'w') as log:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, env=env)
+        sampler = None
+        if ProcessSampler.supported():
+            sampler = ProcessSampler(proc.pid)
+            sampler.start()
+        rc = proc.wait()
+        if sampler is not None:
+            sampler.stop()
+    wall = time.time() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    served = server.get_stats()
+
+    with open(log_file) as fd:
+        recap = RECAP.findall(fd.read())
+    failed = sum(int(x[3]) + int(x[2]) for x in recap)
+
+    tasks = {}
+    if os.path.exists(stats_file):
+        with open(stats_file) as fd:
+            for play in json.load(fd)['plays']:
+                for task in play['tasks']:
+                    tasks[task['name']] = task['requests']
+
+    items = hosts * loop * WORKLOADS[args.workload].count('- name:')
+    if sampler is not None:
+        cpu = sampler.cpu_seconds
+        rss = sampler.peak_rss
+    else:
+        cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+        rss = None
+
+    return {
+        'rc': rc,
+        'wall': round(wall, 3),
+        'items': items,
+        'failed_hosts': failed,
+        'completion': round((hosts - failed) / float(hosts), 3),
+        'api_calls': served['total'],
+        'api_calls_per_item': round(served['total'] / float(items), 2) if items else None,
+        'task_api_calls': dict((k, round(v / float(hosts * loop), 2)) for k, v in tasks.items()),
+        'endpoints': served['endpoints'],
+        'statuses': served['statuses'],
+        # Failed modules return no stats, so these are counted by the tenant.
+        'throttled': served['statuses'].get('429', 0),
+        'cpu': round(cpu, 3),
+        'peak_rss': rss,
+        'processes': sampler.peak_processes if sampler is not None else None,
+        'items_per_second': round(items / wall, 3),
+        'api_calls_per_second': round(served['total'] / wall, 3),
+        'log': log_file,
+    }
+
+
+def add_scaling(results):
+    """Adds the speedup and efficiency of each run against the run with the
+    fewest forks for the same tenant and loop size."""
+    def key(x):
+        return (x['tenant_size'], x['loop'], x['hosts'])
+
+    for _, runs in itertools.groupby(sorted(results, key=key), key):
+        runs = sorted(runs, key=lambda x: x['forks'])
+        base = runs[0]
+        for x in runs:
+            x['speedup'] = round(x['items_per_second'] / base['items_per_second'], 3)
+            x['efficiency'] = round(x['speedup'] * base['forks'] / x['forks'], 3)
+
+
+def print_curves(results, width=40):
+    def key(x):
+        return (x['tenant_size'], x['loop'], x['hosts'])
+
+    for (size, loop, hosts), runs in itertools.groupby(sorted(results, key=key), key):
+        runs = sorted(runs, key=lambda x: x['forks'])
+        top = max(x['items_per_second'] for x in runs) or 1
+        print('\nthroughput, tenant size {0}, loop {1}, {2} hosts:'.format(size, loop, hosts))
+        for x in runs:
+            bar = '#' * int(round(width * x['items_per_second'] / top))
+            # Hosts that failed skipped the rest of their items.
+            failed = ' {0} hosts failed, {1:.0f}% complete'.format(
+                x['failed_hosts'], x['completion'] * 100) if x['failed_hosts'] else ''
+            print('  {0:>4} forks {1:>9.2f} items/s  x{2:<6.2f} {3:>4.0f}%  {4}{5}'.format(
+                x['forks'], x['items_per_second'], x['speedup'], x['efficiency'] * 100, bar, failed))
+
+
+def write_csv(path, results):
+    fields = [
+        'tenant_size', 'loop', 'hosts', 'forks', 'rc', 'wall', 'items', 'failed_hosts', 'completion',
+        'api_calls', 'api_calls_per_item', 'throttled', 'cpu', 'peak_rss', 'processes',
+        'items_per_second', 'api_calls_per_second', 'speedup', 'efficiency',
+    ]
+    with open(path, 'w') as fd:
+        writer = csv.DictWriter(fd, fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n')[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n'.join(__doc__.split('\n')[2:]),
+    )
+    parser.add_argument('--forks', type=int, nargs='+', default=[1, 2, 4, 8], help='fork counts (default: 1 2 4 8)')
+    parser.add_argument('--loops', type=int, nargs='+', default=[10], help='loop sizes (default: 10)')
+    parser.add_argument('--tenant-sizes', type=int, nargs='+', default=[100, 1000],
+                        help='accounts and policies in the tenant (default: 100 1000)')
+    parser.add_argument('--hosts', type=int, help='inventory hosts (default: the most forks)')
+    parser.add_argument('--shared-connection', action='store_true', help='have all the hosts share one connection')
+    parser.add_argument('--workload', choices=sorted(WORKLOADS), default='accounts', help='tasks to run (default: accounts)')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds the tenant adds to every request')
+    parser.add_argument('--jitter', type=float, default=0, help='+/- milliseconds of random latency')
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests a second before the tenant returns 429s')
+    parser.add_argument('--faults', help='JSON file of faults to inject into the requests of every host')
+    parser.add_argument('--ansible-playbook', default='ansible-playbook', help='the ansible-playbook to run')
+    parser.add_argument('--ansible-arg', action='append', default=[], help='extra ansible-playbook arg, may be repeated')
+    parser.add_argument('--python', default=sys.executable, help='ansible_python_interpreter for the modules')
+    parser.add_argument('--keep', action='store_true', help='keep the playbooks and logs')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('--csv', help='write the results to this CSV file')
+    args = parser.parse_args(argv)
+
+    hosts = args.hosts or max(args.forks)
+    workdir = tempfile.mkdtemp(prefix='prismacloud-load-')
+    results = []
+    print('{0:>7} {1:>5} {2:>5} {3:>8} {4:>6} {5:>9} {6:>9} {7:>8} {8:>8} {9:>9} {10:>9}'.format(
+        'tenant', 'loop', 'forks', 'wall s', 'failed', 'api calls', 'per item', 'throttle',
+        'cpu s', 'rss MiB', 'items/s'))
+    try:
+        for size in sorted(args.tenant_sizes):
+            server = mock_server.start(
+                accounts=size, policies=size, groups=max(size // 10, 1),
+                latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                users=dict(('load{0:04d}'.format(x), 'admin') for x in range(hosts)),
+            )
+            try:
+                for loop, forks in itertools.product(sorted(args.loops), sorted(args.forks)):
+                    ans = run_playbook(args, workdir, server, forks, hosts, loop)
+                    ans.update(tenant_size=size, loop=loop, forks=forks, hosts=hosts)
+                    results.append(ans)
+                    print('{0:>7} {1:>5} {2:>5} {3:>8.2f} {4:>6} {5:>9} {6:>9} {7:>8} {8:>8.2f} {9:>9} {10:>9.2f}'.format(
+                        size, loop, forks, ans['wall'], ans['failed_hosts'], ans['api_calls'],
+                        ans['api_calls_per_item'], ans['throttled'], ans['cpu'],
+                        '-' if ans['peak_rss'] is None else ans['peak_rss'] // (1024 * 1024),
+                        ans['items_per_second']))
+                    if ans['rc'] != 0 and not ans['failed_hosts']:
+                        print('ansible-playbook exited with {0}, see {1}'.format(ans['rc'], ans['log']), file=sys.stderr)
+                        args.keep = True
+            finally:
+                server.shutdown()
+                server.server_close()
+    finally:
+        if args.keep:
+            print('playbooks and logs kept in {0}'.format(workdir))
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not results:
+        return 1
+
+    add_scaling(results)
+    print_curves(results)
+    for x in results:
+        if not args.keep:
+            del x['log']
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+            fd.write('\n')
+    if args.csv:
+        write_csv(args.csv, results)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Merges the .pstats files written with PRISMACLOUD_PROFILE_DIR.
+
+Files are named <time>-<module>[-<label>]-<module|connection>-<id>.pstats,
+so they can be picked by module, label or side with --match.  The merged
+stats are printed, and optionally written to a single .pstats file for
+tools such as snakeviz.
+
+    python tools/merge_profiles.py /tmp/profiles --match connection
+    python tools/merge_profiles.py /tmp/profiles --match policy_facts -o out.pstats
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import argparse
+import os
+import pstats
+import re
+import sys
+
+
+def find(paths, match=None):
+    """Returns the .pstats files in paths, which may be files or dirs."""
+    ans = []
+    for path in paths:
+        if os.path.isdir(path):
+            ans.extend(
+                os.path.join(path, x) for x in sorted(os.listdir(path))
+                if x.endswith('.pstats')
+            )
+        else:
+            ans.append(path)
+
+    if match is not None:
+        regex = re.compile(match)
+        ans = [x for x in ans if regex.search(os.path.basename(x))]
+
+    return ans
+
+
+def merge(files):
+    """Returns the pstats.Stats of all the files added up."""
+    stats = None
+    for name in files:
+        if stats is None:
+            stats = pstats.Stats(name)
+        else:
+            stats.add(name)
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('paths', nargs='+', help='.pstats files, or directories of them')
+    parser.add_argument('--match', help='only merge files whose name matches this regex')
+    parser.add_argument('--sort', default='cumulative', help='pstats sort key (default: cumulative)')
+    parser.add_argument('--limit', type=int, default=30, help='number of functions to print (default: 30)')
+    parser.add_argument('--strip', action='store_true', help='strip the directories from file names')
+    parser.add_argument('-o', '--output', help='write the merged stats to this file')
+    args = parser.parse_args(argv)
+
+    files = find(args.paths, args.match)
+    if not files:
+        print('no .pstats files found', file=sys.stderr)
+        return 1
+
+    stats = merge(files)
+    print('merged {0} files'.format(len(files)))
+    if args.output:
+        stats.dump_stats(args.output)
+    if args.strip:
+        stats.strip_dirs()
+    stats.sort_stats(args.sort).print_stats(args.limit)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
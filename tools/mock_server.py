@@ -0,0 +1,724 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#  Copyright 2020 Palo Alto Networks, Inc
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A local stand-in for the Prisma Cloud API.
+
+Serves a synthetic tenant, generated from a seed, for the endpoints this
+collection uses, so that it can be exercised and benchmarked with no
+network and no live tenant.  Errors are returned with an X-Redlock-Status
+header, the same as Prisma Cloud does.  Latency, throttling and errors can
+be injected, for every endpoint or just some of them.
+
+Endpoints are named as in prismacloud_stats, such as "GET /policy/{id}".
+GET /_mock/stats returns the number of requests made to each endpoint and
+of each response status, and DELETE /_mock/stats resets them.
+
+Point an inventory at it with:
+
+    ansible_host=127.0.0.1 ansible_httpapi_port=8080
+    ansible_httpapi_use_ssl=false ansible_user=admin ansible_password=admin
+
+Examples:
+
+    python tools/mock_server.py --port 8080 --policies 5000
+    python tools/mock_server.py --latency 80 --jitter 40 --throttle-rate 0.05
+    python tools/mock_server.py --rate-limit 20
+    python tools/mock_server.py --endpoint 'GET /policy/{id}' latency=300,error_rate=0.1
+
+Requires python 3.
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+import argparse
+import binascii
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+
+CLOUD_TYPES = ('aws', 'azure', 'gcp', 'alibaba_cloud')
+
+POLICY_TYPES = ('config', 'network', 'audit_event', 'anomaly')
+
+SEVERITIES = ('low', 'medium', 'high')
+
+# The routes:  method, path regex and endpoint name.  More specific routes
+# come first.
+ROUTES = (
+    ('POST', r'/login', '/login'),
+    ('GET', r'/cloud/name', '/cloud/name'),
+    ('GET', r'/cloud/group', '/cloud/group'),
+    ('GET', r'/cloud/group/(?P<id>[^/]+)', '/cloud/group/{id}'),
+    ('GET', r'/cloud/(?P<type>[^/]+)', '/cloud/{type}'),
+    ('POST', r'/cloud/(?P<type>[^/]+)', '/cloud/{type}'),
+    ('GET', r'/cloud/(?P<type>[^/]+)/(?P<id>[^/]+)', '/cloud/{type}/{id}'),
+    ('PUT', r'/cloud/(?P<type>[^/]+)/(?P<id>[^/]+)', '/cloud/{type}/{id}'),
+    ('DELETE', r'/cloud/(?P<type>[^/]+)/(?P<id>[^/]+)', '/cloud/{type}/{id}'),
+    ('GET', r'/policy', '/policy'),
+    ('GET', r'/policy/(?P<id>[^/]+)', '/policy/{id}'),
+    ('GET', r'/compliance', '/compliance'),
+    ('GET', r'/compliance/requirement/(?P<id>[^/]+)', '/compliance/requirement/{id}'),
+    ('GET', r'/compliance/(?P<id>[^/]+)', '/compliance/{id}'),
+    ('GET', r'/compliance/(?P<id>[^/]+)/requirement', '/compliance/{id}/requirement'),
+    ('GET', r'/compliance/(?P<id>[^/]+)/section', '/compliance/{id}/section'),
+)
+ROUTES = tuple((m, re.compile(r + '$'), n) for m, r, n in ROUTES)
+
+
+class MockError(Exception):
+    """An error response, with the errors for its X-Redlock-Status header."""
+    def __init__(self, code, i18n_key, subject=None, headers=None):
+        super(MockError, self).__init__(i18n_key)
+        self.code = code
+        self.errinfo = [{'i18nKey': i18n_key, 'severity': 'error', 'subject': subject}]
+        self.headers = headers or {}
+
+
+def not_found(subject=None):
+    return MockError(404, 'not_found', subject)
+
+
+class Tenant(object):
+    """A synthetic tenant, the same every time for the same seed and sizes."""
+    def __init__(self, seed=0, accounts=50, groups=10, policies=500,
+                 standards=10, requirements=5, sections=4):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.accounts = {}
+        self.groups = {}
+        self.policies = {}
+        self.standards = {}
+        self.requirements = {}
+        self.sections = {}
+        self.now = 1600000000000
+
+        self._make_accounts(accounts)
+        self._make_groups(groups)
+        self._make_compliance(standards, requirements, sections)
+        self._make_policies(policies)
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _account_id(self, cloud_type):
+        if cloud_type == 'aws':
+            return '{0:012d}'.format(self.rng.randrange(10 ** 12))
+        elif cloud_type == 'azure':
+            return self._uuid()
+        elif cloud_type == 'gcp':
+            return 'project-{0:08x}'.format(self.rng.getrandbits(32))
+        return '{0:016d}'.format(self.rng.randrange(10 ** 16))
+
+    def _make_accounts(self, count):
+        for num in range(count):
+            cloud_type = CLOUD_TYPES[num % len(CLOUD_TYPES)]
+            account_id = self._account_id(cloud_type)
+            self.accounts[account_id] = {
+                'cloudType': cloud_type,
+                'accountId': account_id,
+                'name': 'Account {0:05d}'.format(num),
+                'enabled': self.rng.random() < 0.9,
+                'groupIds': [],
+                'extra': self._account_extra(cloud_type),
+            }
+
+    def _account_extra(self, cloud_type):
+        if cloud_type == 'aws':
+            return {
+                'roleArn': 'arn:aws:iam::{0:012d}:role/PrismaCloud'.format(self.rng.randrange(10 ** 12)),
+                'externalId': self._uuid(),
+            }
+        elif cloud_type == 'azure':
+            return {
+                'clientId': self._uuid(),
+                'tenantId': self._uuid(),
+                'servicePrincipalId': self._uuid(),
+                'monitorFlowLogs': False,
+            }
+        elif cloud_type == 'gcp':
+            return {
+                'compressionEnabled': False,
+                'dataflowEnabledProject': '',
+                'flowLogStorageBucket': '',
+            }
+        return {'ramArn': 'acs:ram::{0:016d}:role/prismacloud'.format(self.rng.randrange(10 ** 16))}
+
+    def _make_groups(self, count):
+        account_ids = sorted(self.accounts)
+        for num in range(count):
+            group_id = self._uuid()
+            members = self.rng.sample(account_ids, min(len(account_ids), self.rng.randint(0, 20)))
+            for x in members:
+                self.accounts[x]['groupIds'].append(group_id)
+            self.groups[group_id] = {
+                'id': group_id,
+                'name': 'Group {0:04d}'.format(num),
+                'description': 'Synthetic account group {0}'.format(num),
+                'accountIds': members,
+                'lastModifiedBy': 'admin',
+                'lastModifiedTs': self.now,
+            }
+
+    def _make_compliance(self, standards, requirements, sections):
+        for snum in range(standards):
+            standard_id = self._uuid()
+            self.standards[standard_id] = {
+                'id': standard_id,
+                'name': 'Standard {0:03d}'.format(snum),
+                'description': 'Synthetic compliance standard {0}'.format(snum),
+                'cloudType': self.rng.sample(CLOUD_TYPES, self.rng.randint(1, len(CLOUD_TYPES))),
+                'systemDefault': snum % 2 == 0,
+                'createdOn': self.now,
+                'lastModifiedOn': self.now,
+            }
+            for rnum in range(requirements):
+                requirement_id = self._uuid()
+                self.requirements[requirement_id] = {
+                    'id': requirement_id,
+                    'complianceId': standard_id,
+                    'name': 'Requirement {0}.{1}'.format(snum, rnum),
+                    'requirementId': '{0}'.format(rnum + 1),
+                    'description': 'Synthetic requirement',
+                    'systemDefault': snum % 2 == 0,
+                    'viewOrder': rnum + 1,
+                }
+                for cnum in range(sections):
+                    section_id = self._uuid()
+                    self.sections[section_id] = {
+                        'id': section_id,
+                        'requirementId': requirement_id,
+                        'sectionId': '{0}.{1}'.format(rnum + 1, cnum + 1),
+                        'description': 'Synthetic section',
+                        'systemDefault': snum % 2 == 0,
+                        'viewOrder': cnum + 1,
+                    }
+
+    def _make_policies(self, count):
+        section_ids = sorted(self.sections)
+        for num in range(count):
+            policy_id = self._uuid()
+            metadata = []
+            for section_id in self.rng.sample(section_ids, min(len(section_ids), self.rng.randint(0, 3))):
+                section = self.sections[section_id]
+                requirement = self.requirements[section['requirementId']]
+                metadata.append({
+                    'complianceId': section_id,
+                    'standardName': self.standards[requirement['complianceId']]['name'],
+                    'requirementId': requirement['requirementId'],
+                    'requirementName': requirement['name'],
+                    'sectionId': section['sectionId'],
+                    'sectionDescription': section['description'],
+                })
+            self.policies[policy_id] = {
+                'policyId': policy_id,
+                'name': 'Policy {0:06d}'.format(num),
+                'policyType': self.rng.choice(POLICY_TYPES),
+                'cloudType': self.rng.choice(CLOUD_TYPES),
+                'severity': self.rng.choice(SEVERITIES),
+                'enabled': self.rng.random() < 0.8,
+                'systemDefault': self.rng.random() < 0.7,
+                'description': 'Synthetic policy {0}'.format(num),
+                'labels': [],
+                'lastModifiedOn': self.now - self.rng.randrange(10 ** 9),
+                'rule': {
+                    'name': 'Rule {0}'.format(num),
+                    'criteria': self._uuid(),
+                    'type': 'Config',
+                },
+                'complianceMetadata': metadata,
+            }
+
+    # Account representations.
+
+    def account_item(self, x):
+        return {
+            'id': x['accountId'],
+            'name': x['name'],
+            'cloudType': x['cloudType'],
+            'accountType': 'account',
+        }
+
+    def account_details(self, x):
+        if x['cloudType'] in ('azure', 'gcp'):
+            ans = {
+                'cloudAccount': {
+                    'accountId': x['accountId'],
+                    'name': x['name'],
+                    'enabled': x['enabled'],
+                    'groupIds': list(x['groupIds']),
+                    'accountType': 'account',
+                },
+            }
+        else:
+            ans = {
+                'accountId': x['accountId'],
+                'name': x['name'],
+                'enabled': x['enabled'],
+                'groupIds': list(x['groupIds']),
+                'accountType': 'account',
+            }
+        ans.update(x['extra'])
+        return ans
+
+    def _account(self, cloud_type, account_id):
+        x = self.accounts.get(account_id)
+        if x is None or x['cloudType'] != cloud_type:
+            raise not_found(account_id)
+        return x
+
+    # Handlers, by endpoint.
+
+    def handle(self, method, endpoint, args, query, body):
+        cloud_type = args.get('type')
+        if cloud_type is not None and cloud_type not in CLOUD_TYPES:
+            raise MockError(400, 'invalid_cloud_type', cloud_type)
+
+        with self.lock:
+            if endpoint == '/cloud/name':
+                wanted = query.get('cloudType')
+                return [
+                    self.account_item(x) for x in self.accounts.values()
+                    if wanted is None or x['cloudType'] == wanted
+                ]
+            elif endpoint == '/cloud/group':
+                return list(self.groups.values())
+            elif endpoint == '/cloud/group/{id}':
+                group = self.groups.get(args['id'])
+                if group is None:
+                    raise not_found(args['id'])
+                return dict(group, accounts=[
+                    self.account_item(self.accounts[x])
+                    for x in group['accountIds'] if x in self.accounts
+                ])
+            elif endpoint == '/cloud/{type}':
+                if method == 'POST':
+                    return self._create_account(cloud_type, body)
+                return [
+                    self.account_details(x) for x in self.accounts.values()
+                    if x['cloudType'] == cloud_type
+                ]
+            elif endpoint == '/cloud/{type}/{id}':
+                account = self._account(cloud_type, args['id'])
+                if method == 'PUT':
+                    return self._update_account(account, body)
+                elif method == 'DELETE':
+                    del self.accounts[account['accountId']]
+                    for x in self.groups.values():
+                        if account['accountId'] in x['accountIds']:
+                            x['accountIds'].remove(account['accountId'])
+                    return None
+                return self.account_details(account)
+            elif endpoint == '/policy':
+                return [
+                    dict((k, v) for k, v in x.items() if k not in ('rule', 'complianceMetadata'))
+                    for x in self.policies.values()
+                ]
+            elif endpoint == '/policy/{id}':
+                if args['id'] not in self.policies:
+                    raise not_found(args['id'])
+                return self.policies[args['id']]
+            elif endpoint == '/compliance':
+                return list(self.standards.values())
+            elif endpoint == '/compliance/{id}':
+                if args['id'] not in self.standards:
+                    raise not_found(args['id'])
+                return self.standards[args['id']]
+            elif endpoint == '/compliance/{id}/requirement':
+                if args['id'] not in self.standards:
+                    raise not_found(args['id'])
+                return [
+                    dict((k, v) for k, v in x.items() if k != 'complianceId')
+                    for x in self.requirements.values() if x['complianceId'] == args['id']
+                ]
+            elif endpoint == '/compliance/requirement/{id}':
+                if args['id'] not in self.requirements:
+                    raise not_found(args['id'])
+                return self.requirements[args['id']]
+            elif endpoint == '/compliance/{id}/section':
+                if args['id'] not in self.requirements:
+                    raise not_found(args['id'])
+                return [
+                    dict((k, v) for k, v in x.items() if k != 'requirementId')
+                    for x in self.sections.values() if x['requirementId'] == args['id']
+                ]
+
+        raise not_found()
+
+    def _config(self, cloud_type, body):
+        """Splits an account body into its common fields and the rest."""
+        body = dict(body or {})
+        if cloud_type in ('azure', 'gcp'):
+            common = dict(body.pop('cloudAccount', None) or {})
+        else:
+            common = dict((k, body.pop(k)) for k in ('accountId', 'name', 'enabled', 'groupIds') if k in body)
+        body.pop('accountType', None)
+        return common, body
+
+    def _create_account(self, cloud_type, body):
+        common, extra = self._config(cloud_type, body)
+        if not common.get('name'):
+            raise MockError(400, 'missing_required_parameter', 'name')
+        for x in self.accounts.values():
+            if x['name'] == common['name']:
+                raise MockError(409, 'cloud_account_already_exists', common['name'])
+        account_id = common.get('accountId') or self._account_id(cloud_type)
+        if account_id in self.accounts:
+            raise MockError(409, 'cloud_account_already_exists', account_id)
+
+        self.accounts[account_id] = {
+            'cloudType': cloud_type,
+            'accountId': account_id,
+            'name': common['name'],
+            'enabled': bool(common.get('enabled')),
+            'groupIds': [],
+            'extra': extra,
+        }
+        self._set_groups(self.accounts[account_id], common.get('groupIds') or [])
+        return None
+
+    def _update_account(self, account, body):
+        common, extra = self._config(account['cloudType'], body)
+        if 'name' in common:
+            account['name'] = common['name']
+        if 'enabled' in common:
+            account['enabled'] = bool(common['enabled'])
+        if 'groupIds' in common:
+            self._set_groups(account, common['groupIds'] or [])
+        account['extra'].update(extra)
+        return None
+
+    def _set_groups(self, account, group_ids):
+        for x in group_ids:
+            if x not in self.groups:
+                raise MockError(400, 'invalid_account_group_id', x)
+        for x in self.groups.values():
+            if account['accountId'] in x['accountIds'] and x['id'] not in group_ids:
+                x['accountIds'].remove(account['accountId'])
+            elif account['accountId'] not in x['accountIds'] and x['id'] in group_ids:
+                x['accountIds'].append(account['accountId'])
+        account['groupIds'] = list(group_ids)
+
+
+class Faults(object):
+    """Injected latency, throttling and errors.
+
+    The defaults apply to every endpoint, and are overridden per endpoint
+    by the settings for it.  Latency and jitter are in milliseconds, and
+    rates are the fraction of requests from 0 to 1.
+    """
+    SETTINGS = ('latency', 'jitter', 'error_rate', 'throttle_rate', 'retry_after')
+
+    def __init__(self, seed=0, latency=0, jitter=0, error_rate=0, throttle_rate=0,
+                 retry_after=1, endpoints=None):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.defaults = {
+            'latency': latency,
+            'jitter': jitter,
+            'error_rate': error_rate,
+            'throttle_rate': throttle_rate,
+            'retry_after': retry_after,
+        }
+        self.endpoints = endpoints or {}
+
+    def apply(self, method, endpoint):
+        """Sleeps for the latency of a request, then raises the error to
+        return for it, if any."""
+        conf = dict(self.defaults, **self.endpoints.get('{0} {1}'.format(method, endpoint), {}))
+        with self.lock:
+            delay = conf['latency'] + self.rng.uniform(-1, 1) * conf['jitter']
+            roll = self.rng.random()
+
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if roll < conf['throttle_rate']:
+            raise MockError(
+                429, 'too_many_requests',
+                headers={'Retry-After': '{0}'.format(conf['retry_after'])})
+        elif roll < conf['throttle_rate'] + conf['error_rate']:
+            raise MockError(500, 'internal_server_error')
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super(Handler, self).log_message(fmt, *args)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        query = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+        size = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(size) if size else b''
+
+        if url.path == '/_mock/stats':
+            if method == 'DELETE':
+                self.server.reset_stats()
+            return self._reply(200, self.server.get_stats())
+
+        endpoint = None
+        args = {}
+        for route_method, regex, name in ROUTES:
+            match = regex.match(url.path)
+            if match is not None and route_method == method:
+                endpoint = name
+                args = match.groupdict()
+                break
+
+        self.server.count('{0} {1}'.format(method, endpoint or url.path))
+        try:
+            if endpoint is None:
+                raise not_found(url.path)
+            self.server.throttle()
+            self.server.faults.apply(method, endpoint)
+            try:
+                body = json.loads(raw.decode('utf-8')) if raw else None
+            except ValueError:
+                raise MockError(400, 'invalid_json')
+            if endpoint == '/login':
+                ans = {'token': self.server.login(body or {}), 'message': 'login_successful'}
+            else:
+                self.server.check_token(self.headers.get('x-redlock-auth'))
+                ans = self.server.tenant.handle(method, endpoint, args, query, body)
+        except MockError as e:
+            self.server.count_status(e.code)
+            return self._reply(e.code, {}, e.errinfo, e.headers)
+
+        self.server.count_status(200)
+        self._reply(200, ans)
+
+    def _reply(self, code, body, errinfo=None, headers=None):
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '{0}'.format(len(data)))
+        if errinfo is not None:
+            self.send_header('X-Redlock-Status', json.dumps(errinfo))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tenant, faults, username='admin', password='admin',
+                 token_ttl=600, verbose=False, rate_limit=0, users=None):
+        HTTPServer.__init__(self, address, Handler)
+        self.tenant = tenant
+        self.faults = faults
+        self.username = username
+        self.password = password
+        self.token_ttl = token_ttl
+        # Other usernames that may log in, and their passwords.
+        self.users = dict(users or {})
+        self.users[username] = password
+        self.verbose = verbose
+        self.tokens = {}
+        self.stats = {}
+        self.statuses = {}
+        self.stats_lock = threading.Lock()
+        self.rate_limit = rate_limit
+        self.allowance = rate_limit
+        self.checked = time.time()
+
+    def login(self, body):
+        password = self.users.get(body.get('username'))
+        if password is None or body.get('password') != password:
+            raise MockError(401, 'invalid_credentials')
+        token = binascii.hexlify(os.urandom(16)).decode('ascii')
+        with self.stats_lock:
+            self.tokens[token] = time.time() + self.token_ttl
+        return token
+
+    def check_token(self, token):
+        with self.stats_lock:
+            expires = self.tokens.get(token)
+        if expires is None or expires < time.time():
+            raise MockError(401, 'invalid_token')
+
+    def throttle(self):
+        """Raises a 429 if the tenant is over rate_limit requests a second.
+
+        Up to a second's worth of requests may be sent in a burst.
+        """
+        if not self.rate_limit:
+            return
+
+        with self.stats_lock:
+            now = time.time()
+            self.allowance = min(self.rate_limit, self.allowance + (now - self.checked) * self.rate_limit)
+            self.checked = now
+            if self.allowance < 1:
+                wait = (1 - self.allowance) / self.rate_limit
+                raise MockError(
+                    429, 'too_many_requests',
+                    headers={'Retry-After': '{0}'.format(int(math.ceil(wait)))})
+            self.allowance -= 1
+
+    def count(self, endpoint):
+        with self.stats_lock:
+            self.stats[endpoint] = self.stats.get(endpoint, 0) + 1
+
+    def count_status(self, code):
+        with self.stats_lock:
+            self.statuses[code] = self.statuses.get(code, 0) + 1
+
+    def get_stats(self):
+        with self.stats_lock:
+            return {
+                'total': sum(self.stats.values()),
+                'endpoints': dict(self.stats),
+                'statuses': dict(('{0}'.format(k), v) for k, v in self.statuses.items()),
+            }
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {}
+            self.statuses = {}
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+def start(port=0, **kwargs):
+    """Starts a mock server in a background thread, returning it.
+
+    Keyword args are the sizes and seed for the Tenant, the settings for
+    the Faults, and the rest of the MockServer args.  Use port=0 to pick a
+    free port, then read it from the server's port.
+    """
+    tenant_args = dict(
+        (k, kwargs.pop(k)) for k in list(kwargs)
+        if k in ('accounts', 'groups', 'policies', 'standards', 'requirements', 'sections')
+    )
+    fault_args = dict(
+        (k, kwargs.pop(k)) for k in list(kwargs)
+        if k in Faults.SETTINGS or k == 'endpoints'
+    )
+    seed = kwargs.pop('seed', 0)
+    server = MockServer(
+        ('127.0.0.1', port), Tenant(seed, **tenant_args), Faults(seed, **fault_args), **kwargs)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def parse_endpoint(spec):
+    """Parses 'key=value,...' endpoint settings."""
+    ans = {}
+    for item in spec.split(','):
+        key, _, value = item.partition('=')
+        key = key.strip().replace('-', '_')
+        if key not in Faults.SETTINGS:
+            raise argparse.ArgumentTypeError('unknown setting: {0}'.format(key))
+        ans[key] = float(value)
+    return ans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n')[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--token-ttl', type=float, default=600, help='seconds until a login token expires')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the dataset and the injected faults')
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--policies', type=int, default=500)
+    parser.add_argument('--standards', type=int, default=10)
+    parser.add_argument('--requirements', type=int, default=5, help='per compliance standard')
+    parser.add_argument('--sections', type=int, default=4, help='per compliance requirement')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0, help='+/- milliseconds of random latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests that get a 500')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='fraction of requests that get a 429')
+    parser.add_argument('--retry-after', type=float, default=1, help='Retry-After of 429 responses')
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests a second before the tenant returns 429s')
+    parser.add_argument(
+        '--endpoint', nargs=2, action='append', default=[], metavar=('ENDPOINT', 'SETTINGS'),
+        help="override settings for an endpoint, e.g. 'GET /policy/{id}' latency=200,error_rate=0.1")
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    try:
+        endpoints = dict((name, parse_endpoint(spec)) for name, spec in args.endpoint)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error('--endpoint: {0}'.format(e))
+
+    start_time = time.time()
+    tenant = Tenant(
+        args.seed, args.accounts, args.groups, args.policies,
+        args.standards, args.requirements, args.sections)
+    faults = Faults(
+        args.seed, args.latency, args.jitter, args.error_rate,
+        args.throttle_rate, args.retry_after, endpoints)
+    server = MockServer(
+        (args.host, args.port), tenant, faults,
+        args.username, args.password, args.token_ttl, args.verbose, args.rate_limit)
+    print('generated {0} accounts, {1} groups, {2} policies, {3} standards, {4} requirements, {5} sections in {6:.1f}s'.format(
+        len(tenant.accounts), len(tenant.groups), len(tenant.policies), len(tenant.standards),
+        len(tenant.requirements), len(tenant.sections), time.time() - start_time))
+    print('listening on http://{0}:{1}'.format(args.host, server.port))
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())